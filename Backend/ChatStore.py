@@ -0,0 +1,371 @@
+"""
+ChatStore.py — append-only chat log storage for Nio.
+
+Messages are stored as one JSON object per line in numbered segment files
+(Data/ChatLog/segment-000001.jsonl, ...). Appends only ever touch the tail of
+the active segment, fsyncs are batched, and a torn last line left behind by a
+crash is cut off on replay, so the log always reopens cleanly.
+
+compact() commits through a marker file: the rewritten segments are written
+under temporary names, then COMPACT_MARKER records which files replace which,
+and only then are files renamed or removed. Replay finishes a compaction whose
+marker exists and discards the temporary files of one whose marker does not.
+"""
+
+import os
+import json
+import time
+import atexit
+import threading
+
+CHAT_LOG_DIR = "Data/ChatLog"
+SEGMENT_PREFIX = "segment-"
+SEGMENT_SUFFIX = ".jsonl"
+SEGMENT_MAX_BYTES = 4 * 1024 * 1024
+FSYNC_EVERY = 16          # records between fsyncs
+FSYNC_INTERVAL = 1.0      # seconds between fsyncs
+COMPACT_MARKER = "compact.json"
+COMPACT_SUFFIX = ".compact"
+
+
+def _segment_name(seg_id: int) -> str:
+    return f"{SEGMENT_PREFIX}{seg_id:06d}{SEGMENT_SUFFIX}"
+
+
+def _fsync_dir(directory: str):
+    """Make renames and deletions in `directory` durable (not supported on Windows)."""
+    try:
+        fd = os.open(directory, os.O_RDONLY)
+    except OSError:
+        return
+    try:
+        os.fsync(fd)
+    except OSError:
+        pass
+    finally:
+        os.close(fd)
+
+
+class Segment:
+    """One JSONL file plus the byte offset of every record in it."""
+
+    def __init__(self, seg_id: int, path: str):
+        self.id = seg_id
+        self.path = path
+        self.offsets = []
+        self.size = 0
+
+
+class ChatLogStore:
+    """Append-only, crash-safe message log made of rotating JSONL segments."""
+
+    def __init__(self, directory: str = CHAT_LOG_DIR, segment_max_bytes: int = SEGMENT_MAX_BYTES,
+                 fsync_every: int = FSYNC_EVERY, fsync_interval: float = FSYNC_INTERVAL):
+        self.directory = directory
+        self.segment_max_bytes = segment_max_bytes
+        self.fsync_every = fsync_every
+        self.fsync_interval = fsync_interval
+        self.lock = threading.RLock()
+        self.segments = []
+        self._messages = []
+        self._fh = None
+        self._unsynced = 0
+        self._last_sync = time.monotonic()
+        os.makedirs(directory, exist_ok=True)
+        self._replay()
+        atexit.register(self.close)
+
+    # ---------- startup ----------
+    def _replay(self):
+        self._recover_compaction()
+        ids = sorted(
+            int(name[len(SEGMENT_PREFIX):-len(SEGMENT_SUFFIX)])
+            for name in os.listdir(self.directory)
+            if name.startswith(SEGMENT_PREFIX) and name.endswith(SEGMENT_SUFFIX)
+        )
+        for seg_id in ids:
+            seg = Segment(seg_id, os.path.join(self.directory, _segment_name(seg_id)))
+            self._scan_segment(seg)
+            self.segments.append(seg)
+        if not self.segments:
+            self.segments.append(Segment(1, os.path.join(self.directory, _segment_name(1))))
+        self._open_active()
+
+    def _recover_compaction(self):
+        """Finish a compaction that committed its marker; drop the leftovers of one that did not."""
+        marker = os.path.join(self.directory, COMPACT_MARKER)
+        if os.path.exists(marker):
+            with open(marker, "r", encoding="utf-8") as f:
+                plan = json.load(f)
+            print(f"[ChatStore] Finishing interrupted compaction in {self.directory}")
+            self._apply_compaction(plan["segments"], plan["remove"])
+            os.remove(marker)
+            _fsync_dir(self.directory)
+        for name in os.listdir(self.directory):
+            if name.endswith(COMPACT_SUFFIX) or name == COMPACT_MARKER + ".tmp":
+                os.remove(os.path.join(self.directory, name))
+
+    def _apply_compaction(self, segments: list, remove: list):
+        """Rename the compacted files into place and delete the segments they replace; safe to repeat."""
+        for seg_id in segments:
+            path = os.path.join(self.directory, _segment_name(seg_id))
+            if os.path.exists(path + COMPACT_SUFFIX):
+                os.replace(path + COMPACT_SUFFIX, path)
+        for seg_id in remove:
+            if seg_id not in segments:
+                path = os.path.join(self.directory, _segment_name(seg_id))
+                if os.path.exists(path):
+                    os.remove(path)
+
+    def _scan_segment(self, seg: Segment):
+        """Load every intact record and truncate anything after the last good one."""
+        good = 0
+        with open(seg.path, "rb") as f:
+            while True:
+                offset = f.tell()
+                line = f.readline()
+                if not line:
+                    break
+                if not line.endswith(b"\n"):
+                    break
+                try:
+                    record = json.loads(line)
+                except ValueError:
+                    break
+                seg.offsets.append(offset)
+                self._messages.append(record)
+                good = f.tell()
+        if good != os.path.getsize(seg.path):
+            print(f"[ChatStore] Truncating torn tail of {seg.path} at byte {good}")
+            with open(seg.path, "r+b") as f:
+                f.truncate(good)
+        seg.size = good
+
+    def _open_active(self):
+        self._fh = open(self.segments[-1].path, "ab")
+
+    # ---------- writes ----------
+    def append(self, *messages: dict):
+        """Append messages to the active segment; cost is independent of history size."""
+        with self.lock:
+            for msg in messages:
+                data = (json.dumps(msg, ensure_ascii=False) + "\n").encode("utf-8")
+                seg = self.segments[-1]
+                if seg.size and seg.size + len(data) > self.segment_max_bytes:
+                    self._rotate()
+                    seg = self.segments[-1]
+                seg.offsets.append(seg.size)
+                self._fh.write(data)
+                seg.size += len(data)
+                self._messages.append(msg)
+                self._unsynced += 1
+            self._fh.flush()
+            if (self._unsynced >= self.fsync_every
+                    or time.monotonic() - self._last_sync >= self.fsync_interval):
+                self.sync()
+
+    def sync(self):
+        with self.lock:
+            if self._fh is None or not self._unsynced:
+                return
+            self._fh.flush()
+            os.fsync(self._fh.fileno())
+            self._unsynced = 0
+            self._last_sync = time.monotonic()
+
+    def _rotate(self):
+        self.sync()
+        self._fh.close()
+        new_id = self.segments[-1].id + 1
+        self.segments.append(Segment(new_id, os.path.join(self.directory, _segment_name(new_id))))
+        self._open_active()
+
+    def close(self):
+        with self.lock:
+            if self._fh is not None:
+                self.sync()
+                self._fh.close()
+                self._fh = None
+
+    # ---------- reads ----------
+    def __len__(self):
+        return len(self._messages)
+
+    def messages(self) -> list:
+        with self.lock:
+            return list(self._messages)
+
+    def tail(self, n: int) -> list:
+        with self.lock:
+            return list(self._messages[-n:]) if n > 0 else []
+
+    def read(self, index: int) -> dict:
+        """Read one record straight from disk through the segment offset index."""
+        with self.lock:
+            if index < 0:
+                index += len(self._messages)
+            for seg in self.segments:
+                if index < len(seg.offsets):
+                    if seg is self.segments[-1]:
+                        self._fh.flush()
+                    with open(seg.path, "rb") as f:
+                        f.seek(seg.offsets[index])
+                        return json.loads(f.readline())
+                index -= len(seg.offsets)
+            raise IndexError("chat log index out of range")
+
+    # ---------- maintenance ----------
+    def compact(self, keep_last: int = None):
+        """
+        Rewrite sealed segments into as few full segments as possible, optionally
+        dropping everything but the newest `keep_last` messages. The active segment
+        is left alone. The new segment files are fully written and fsynced and the
+        marker is committed before any old file is touched, so a crash at any
+        point replays either the old segments or the new ones, never both.
+        """
+        with self.lock:
+            self.sync()
+            sealed = self.segments[:-1]
+            if not sealed:
+                return
+            active = self.segments[-1]
+            sealed_count = sum(len(s.offsets) for s in sealed)
+            drop = 0
+            if keep_last is not None:
+                drop = min(sealed_count, max(0, len(self._messages) - keep_last))
+            kept = self._messages[drop:sealed_count]
+
+            # sealed ids are always below the active id, so compacted segments reuse
+            # the lowest ids and stay ordered ahead of the active one
+            next_id = sealed[0].id
+            new_segments = []
+            tmp_paths = []
+            seg = None
+            out = None
+            for msg in kept:
+                data = (json.dumps(msg, ensure_ascii=False) + "\n").encode("utf-8")
+                if seg is None or (seg.size and seg.size + len(data) > self.segment_max_bytes):
+                    if out is not None:
+                        out.flush()
+                        os.fsync(out.fileno())
+                        out.close()
+                    seg = Segment(next_id, os.path.join(self.directory, _segment_name(next_id)))
+                    next_id += 1
+                    new_segments.append(seg)
+                    tmp_paths.append(seg.path + COMPACT_SUFFIX)
+                    out = open(tmp_paths[-1], "wb")
+                seg.offsets.append(seg.size)
+                out.write(data)
+                seg.size += len(data)
+            if out is not None:
+                out.flush()
+                os.fsync(out.fileno())
+                out.close()
+            if next_id > active.id:
+                for tmp in tmp_paths:
+                    os.remove(tmp)
+                raise RuntimeError("compaction produced more segments than it replaced")
+
+            plan = {"segments": [seg.id for seg in new_segments], "remove": [old.id for old in sealed]}
+            marker = os.path.join(self.directory, COMPACT_MARKER)
+            with open(marker + ".tmp", "w", encoding="utf-8") as f:
+                json.dump(plan, f)
+                f.flush()
+                os.fsync(f.fileno())
+            os.replace(marker + ".tmp", marker)  # commit point
+            _fsync_dir(self.directory)
+            self._apply_compaction(plan["segments"], plan["remove"])
+            _fsync_dir(self.directory)
+            os.remove(marker)
+            self.segments = new_segments + [active]
+            self._messages = self._messages[drop:]
+
+
+# ----------------------- Legacy JSON migration -----------------------
+def _salvage_json_array(text: str) -> list:
+    """Decode as many complete objects as possible from a (possibly truncated) JSON array."""
+    decoder = json.JSONDecoder()
+    records = []
+    pos = text.find("[")
+    if pos < 0:
+        return records
+    pos += 1
+    while True:
+        while pos < len(text) and text[pos] in " \t\r\n,":
+            pos += 1
+        if pos >= len(text) or text[pos] == "]":
+            break
+        try:
+            obj, pos = decoder.raw_decode(text, pos)
+        except ValueError:
+            break
+        records.append(obj)
+    return records
+
+
+def _normalize_record(record: dict) -> dict:
+    """Map the GUI's {sender, message, timestamp} rows onto {role, content}."""
+    if "role" in record and "content" in record:
+        return record
+    sender = str(record.get("sender", "user")).lower()
+    out = {
+        "role": "assistant" if sender in ("ai", "assistant", "nio", "chatbot") else "user",
+        "content": record.get("message", ""),
+    }
+    if "timestamp" in record:
+        out["timestamp"] = record["timestamp"]
+    return out
+
+
+def migrate_json_log(src_path: str, store: ChatLogStore) -> int:
+    """
+    One-shot import of a legacy JSON-array chat log into `store`.
+    Truncated files are salvaged up to the last complete message. The source
+    file is renamed to *.migrated afterwards so the import never runs twice.
+    Returns the number of messages imported.
+    """
+    if not os.path.exists(src_path):
+        return 0
+    with open(src_path, "r", encoding="utf-8") as f:
+        text = f.read()
+    try:
+        records = json.loads(text)
+    except ValueError:
+        records = _salvage_json_array(text)
+        print(f"[ChatStore] {src_path} is damaged; salvaged {len(records)} messages")
+    if not isinstance(records, list):
+        records = []
+    records = [_normalize_record(r) for r in records if isinstance(r, dict)]
+    if records:
+        store.append(*records)
+        store.sync()
+    os.replace(src_path, src_path + ".migrated")
+    return len(records)
+
+
+def migrate_segment_log(directory: str, target) -> int:
+    """
+    Move every message of a segment log into `target` (anything with append()),
+    then rename the directory to *.migrated. Returns the number of messages moved.
+    """
+    if not os.path.isdir(directory):
+        return 0
+    source = ChatLogStore(directory)
+    records = source.messages()
+    source.close()
+    if records:
+        target.append(*records)
+    os.replace(directory, directory + ".migrated")
+    return len(records)
+
+
+if __name__ == "__main__":
+    import sys
+
+    if len(sys.argv) < 2:
+        print("Usage: python ChatStore.py <legacy.json> [more.json ...]")
+        sys.exit(1)
+    target = ChatLogStore()
+    for legacy in sys.argv[1:]:
+        print(f"{legacy}: imported {migrate_json_log(legacy, target)} messages")
+    target.close()
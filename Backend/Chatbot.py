@@ -1,14 +1,30 @@
-from groq import Groq
-from json import load, dump
+from Clients import lazy_client, lazy_async_client
+from ChatStore import migrate_json_log, migrate_segment_log
+from ConversationStore import shared_store, DEFAULT_SESSION
+from ContextWindow import ContextWindow
+from Resilience import call, call_async, record_failure, CircuitOpenError
+from ResponseCache import shared_cache, is_cacheable
+import asyncio
+import inspect
+import threading
 import datetime
+import hashlib
+import json
 import os
 
 USERNAME = "SHI"
 ASSISTANT_NAME = "Nio"
 GROQ_API_KEY = "GROQ_API_KEY"
 
-client = Groq(api_key=GROQ_API_KEY)
-CHAT_LOG_PATH = "Data/ChatLog.json"
+client = lazy_client("groq", api_key=GROQ_API_KEY)
+async_client = lazy_async_client("groq", api_key=GROQ_API_KEY)
+CHAT_LOG_PATH = "Data/ChatLog.json"  # legacy whole-file log, migrated on first start
+CHAT_LOG_DIR = "Data/ChatLog"        # legacy segment log, migrated on first start
+SUMMARY_DIR = "Data/ChatSummary"
+CONTEXT_TOKEN_BUDGET = 4096  # prompt budget; llama3-70b-8192 leaves 8192 - max_tokens for input
+CHAT_MODEL = "llama3-70b-8192"
+SUMMARY_MODEL = "llama3-8b-8192"
+USE_RESPONSE_CACHE = False  # serve repeated standalone questions from ResponseCache
 
 SYSTEM_PROMPT = f"""
 Hello, I am {USERNAME}, You are a very accurate and advanced AI chatbot named {ASSISTANT_NAME} which also has real-time up-to-date information from the internet.
@@ -17,7 +33,23 @@ Hello, I am {USERNAME}, You are a very accurate and advanced AI chatbot named {A
 *** Do not provide notes in the output, just answer the question and never mention your training data. ***
 """
 
-os.makedirs("Data", exist_ok=True)
+conversations = None
+_init_lock = threading.Lock()
+
+
+def init():
+    """One-time setup: open the conversation store and import the legacy chat logs. Safe to call again."""
+    global conversations
+    if conversations is not None:
+        return conversations
+    with _init_lock:
+        if conversations is None:
+            os.makedirs("Data", exist_ok=True)
+            store = shared_store()
+            migrate_segment_log(CHAT_LOG_DIR, store.session(DEFAULT_SESSION))
+            migrate_json_log(CHAT_LOG_PATH, store.session(DEFAULT_SESSION))
+            conversations = store
+    return conversations
 
 
 def get_realtime_info():
@@ -35,45 +67,169 @@ def get_realtime_info():
 def format_answer(raw_answer):
     return '\n'.join([line for line in raw_answer.split('\n') if line.strip()])
 
-def load_chat_log():
-    try:
-        with open(CHAT_LOG_PATH, "r") as f:
-            return load(f)
-    except (FileNotFoundError, ValueError):
-        return []
-
-def save_chat_log(messages):
-    with open(CHAT_LOG_PATH, "w") as f:
-        dump(messages, f, indent=4)
-
-def chat_bot(query):
-    messages = load_chat_log()
-    messages.append({"role": "user", "content": query})
+def load_chat_log(session=DEFAULT_SESSION):
+    return [{"role": m["role"], "content": m["content"]} for m in init().session(session).messages()]
+
+def append_chat_log(*messages, session=DEFAULT_SESSION):
+    init().append(session, *messages)
+
+def summarize_history(previous_summary, messages):
+    transcript = "\n".join(f"{m['role']}: {m['content']}" for m in messages)
+    completion = call(
+        "groq", client.chat.completions.create,
+        model=SUMMARY_MODEL,
+        messages=[
+            {"role": "system", "content": "Update the running summary of a conversation between a user and an AI assistant. "
+                                          "Keep names, facts, preferences and open questions. Reply with the summary only, at most 200 words."},
+            {"role": "user", "content": f"Current summary:\n{previous_summary or '(none)'}\n\nNew messages:\n{transcript}"}
+        ],
+        max_tokens=400,
+        temperature=0.2,
+        stream=False
+    )
+    return completion.choices[0].message.content.strip()
+
+context_windows = {}
+context_windows_lock = threading.Lock()
+
+def context_for(session=DEFAULT_SESSION):
+    with context_windows_lock:
+        if session not in context_windows:
+            context_windows[session] = ContextWindow(
+                budget=CONTEXT_TOKEN_BUDGET,
+                summarize=summarize_history,
+                summary_path=os.path.join(SUMMARY_DIR, f"{session}.json"),
+            )
+        return context_windows[session]
+
+def build_prompt(query, session=DEFAULT_SESSION):
+    context_window = context_for(session)
+    system = [{"role": "system", "content": get_realtime_info()}]
+    prompt = context_window.build(system, init().session(session), pending=[{"role": "user", "content": query}])
+    report = context_window.last_report
+    print(f"[Context] prompt ~{report['prompt_tokens']} tokens, {report['recent_messages']} recent "
+          f"of {report['total_messages']} messages, {report['summarized_messages']} summarized")
+    return [{"role": m["role"], "content": m["content"]} for m in prompt]
+
+def cache_context(messages):
+    """
+    ResponseCache context for a built prompt: the model plus every message between
+    the clock and the query (rolling summary, recent turns), so a cached answer is
+    only reused for the same conversation state.
+    """
+    conversation = json.dumps(messages[1:-1], ensure_ascii=False, sort_keys=True)
+    return hashlib.sha1(f"{CHAT_MODEL}\0{conversation}".encode("utf-8")).hexdigest()
+
+def chat_bot_stream(query, cancel_event=None, session=DEFAULT_SESSION):
+    """Yield answer deltas as they arrive; the turn is logged once, when the stream ends or is cancelled."""
+    user_message = {"role": "user", "content": query}
+    messages = build_prompt(query, session)
+    cache = shared_cache() if USE_RESPONSE_CACHE and is_cacheable(query) else None
+    context = cache_context(messages) if cache is not None else ""
+    if cache is not None:
+        cached = cache.get("general", query, context)
+        if cached is not None:
+            append_chat_log(user_message, {"role": "assistant", "content": cached}, session=session)
+            yield cached
+            return
+
+    response = call(
+        "groq", client.chat.completions.create,
+        model=CHAT_MODEL,
+        messages=messages,
+        max_tokens=1874,
+        temperature=0.7,
+        top_p=1,
+        stream=True
+    )
 
+    full_response = ""
+    failed = False
+    complete = False
     try:
-        response = client.chat.completions.create(
-            model="llama3-70b-8192",
-            messages=[{"role": "system", "content": get_realtime_info()}] + messages,
-            max_tokens=1874,
-            temperature=0.7,
-            top_p=1,
-            stream=True
-        )
-
-        full_response = ""
         for chunk in response:
+            if cancel_event is not None and cancel_event.is_set():
+                break
             content = chunk.choices[0].delta.content
             if content:
                 full_response += content
+                yield content
+        else:
+            complete = True
+    except Exception:
+        failed = True
+        record_failure("groq")
+        raise
+    finally:
+        close = getattr(response, "close", None)
+        if close is not None:
+            close()
+        if full_response and not failed:
+            append_chat_log(user_message, {"role": "assistant", "content": full_response}, session=session)
+        if cache is not None and complete:
+            cache.put("general", query, full_response, context)
+
+async def chat_bot_stream_async(query, cancel_event=None, session=DEFAULT_SESSION):
+    """Async twin of chat_bot_stream for the shared event loop (EventLoop.py)."""
+    user_message = {"role": "user", "content": query}
+    # prompt building may call the summarizer, which is blocking
+    messages = await asyncio.to_thread(build_prompt, query, session)
+    cache = shared_cache() if USE_RESPONSE_CACHE and is_cacheable(query) else None
+    context = cache_context(messages) if cache is not None else ""
+    if cache is not None:
+        cached = cache.get("general", query, context)
+        if cached is not None:
+            append_chat_log(user_message, {"role": "assistant", "content": cached}, session=session)
+            yield cached
+            return
+
+    response = await call_async(
+        "groq", async_client.chat.completions.create,
+        model=CHAT_MODEL,
+        messages=messages,
+        max_tokens=1874,
+        temperature=0.7,
+        top_p=1,
+        stream=True
+    )
 
-        messages.append({"role": "assistant", "content": full_response})
-        save_chat_log(messages)
-        return format_answer(full_response)
+    full_response = ""
+    failed = False
+    complete = False
+    try:
+        async for chunk in response:
+            if cancel_event is not None and cancel_event.is_set():
+                break
+            content = chunk.choices[0].delta.content
+            if content:
+                full_response += content
+                yield content
+        else:
+            complete = True
+    except Exception:
+        failed = True
+        record_failure("groq")
+        raise
+    finally:
+        close = getattr(response, "close", None)
+        if close is not None:
+            closing = close()
+            if inspect.isawaitable(closing):
+                await closing
+        if full_response and not failed:
+            append_chat_log(user_message, {"role": "assistant", "content": full_response}, session=session)
+        if cache is not None and complete:
+            cache.put("general", query, full_response, context)
+
+def chat_bot(query, session=DEFAULT_SESSION):
+    try:
+        return format_answer("".join(chat_bot_stream(query, session=session)))
 
+    except CircuitOpenError as error:
+        return f"Chat service unavailable: {error}"
     except Exception as error:
         print(f"[ERROR] {error}")
-        save_chat_log(messages)
-        return chat_bot(query)  # Retry on failure
+        return f"Error occurred: {error}"
 
 
 if __name__ == "__main__":
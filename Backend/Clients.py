@@ -0,0 +1,231 @@
+"""
+Clients.py — one lazily built, connection-pooled SDK client per provider.
+
+Backends used to build their own Groq / Cohere clients (Automation even built
+a new one per request), so every module held a separate HTTP pool and
+ContentWriterAI paid a fresh TCP + TLS handshake on each call. Modules now
+ask the registry instead:
+
+    client = lazy_client("groq", api_key=GROQ_API_KEY)
+    client.chat.completions.create(...)   # built on first use, shared afterwards
+
+Pool sizes and timeouts are set with configure() before first use;
+warm_up() opens the keep-alive connections ahead of the first request.
+Backends that talk plain HTTP with `requests` (the Hugging Face image
+endpoint) get a shared keep-alive Session from session(), with timeouts split
+into (connect, read) by request_timeout().
+"""
+
+import os
+import threading
+
+import httpx
+
+POOL_LIMITS = {"max_connections": 20, "max_keepalive_connections": 10, "keepalive_expiry": 120.0}
+TIMEOUTS = {"connect": 5.0, "read": 60.0, "write": 30.0, "pool": 10.0}
+WARMUP_ON_START = False
+
+# NIO_*_BASE_URL point the backends at another endpoint, e.g. FakeProviders.py
+PROVIDERS = {
+    "groq": {"base_url": os.environ.get("NIO_GROQ_BASE_URL", "https://api.groq.com"), "max_retries": 0},
+    "cohere": {"base_url": os.environ.get("NIO_COHERE_BASE_URL", "https://api.cohere.com"), "max_retries": 0},
+    "huggingface": {"base_url": os.environ.get("NIO_HF_BASE_URL", "https://api-inference.huggingface.co"),
+                    "timeouts": {"connect": 5.0, "read": 120.0}},  # SDXL can take a while to first byte
+}
+
+_lock = threading.RLock()
+_clients = {}
+_http = {}
+_async_clients = {}
+_async_http = {}
+_sessions = {}
+_api_keys = {}
+
+
+def configure(provider: str, **options):
+    """Override pool/timeouts/base_url for a provider; only affects clients not built yet."""
+    with _lock:
+        PROVIDERS.setdefault(provider, {}).update(options)
+
+
+def _setting(provider: str, name: str, default):
+    return PROVIDERS.get(provider, {}).get(name, default)
+
+
+def http_client(provider: str) -> httpx.Client:
+    """Shared keep-alive httpx pool for a provider."""
+    with _lock:
+        if provider not in _http:
+            limits = dict(POOL_LIMITS, **_setting(provider, "pool", {}))
+            timeouts = dict(TIMEOUTS, **_setting(provider, "timeouts", {}))
+            _http[provider] = httpx.Client(
+                limits=httpx.Limits(**limits),
+                timeout=httpx.Timeout(**timeouts),
+            )
+        return _http[provider]
+
+
+def async_http_client(provider: str) -> httpx.AsyncClient:
+    """
+    Shared async pool for a provider. Async pools belong to the event loop that
+    first uses them, so they are meant for the long-lived loop in EventLoop.py.
+    """
+    with _lock:
+        if provider not in _async_http:
+            limits = dict(POOL_LIMITS, **_setting(provider, "pool", {}))
+            timeouts = dict(TIMEOUTS, **_setting(provider, "timeouts", {}))
+            _async_http[provider] = httpx.AsyncClient(
+                limits=httpx.Limits(**limits),
+                timeout=httpx.Timeout(**timeouts),
+            )
+        return _async_http[provider]
+
+
+def session(provider: str):
+    """Shared keep-alive requests.Session for a provider, pooled like http_client()."""
+    import requests
+    from requests.adapters import HTTPAdapter
+    with _lock:
+        if provider not in _sessions:
+            limits = dict(POOL_LIMITS, **_setting(provider, "pool", {}))
+            adapter = HTTPAdapter(pool_connections=1, pool_maxsize=limits["max_keepalive_connections"])
+            s = requests.Session()
+            s.mount("https://", adapter)
+            s.mount("http://", adapter)
+            _sessions[provider] = s
+        return _sessions[provider]
+
+
+def request_timeout(provider: str) -> tuple:
+    """(connect, read) timeout for requests calls to a provider."""
+    timeouts = dict(TIMEOUTS, **_setting(provider, "timeouts", {}))
+    return timeouts["connect"], timeouts["read"]
+
+
+def _build(provider: str, api_key: str):
+    base_url = _setting(provider, "base_url", None)
+    retries = _setting(provider, "max_retries", 0)  # retries are handled by Resilience
+    if provider == "groq":
+        from groq import Groq
+        return Groq(api_key=api_key, base_url=base_url, max_retries=retries, http_client=http_client(provider))
+    if provider == "cohere":
+        import cohere
+        timeout = dict(TIMEOUTS, **_setting(provider, "timeouts", {}))["read"]
+        try:
+            return cohere.Client(api_key=api_key, base_url=base_url, timeout=timeout,
+                                 httpx_client=http_client(provider))
+        except TypeError:
+            # cohere < 5 has no pluggable httpx client and calls the endpoint api_url
+            legacy = {"api_url": base_url} if base_url else {}
+            try:
+                return cohere.Client(api_key=api_key, timeout=timeout, max_retries=retries, **legacy)
+            except TypeError as e:
+                target = base_url or "the default endpoint"
+                raise RuntimeError(f"Installed cohere SDK cannot be configured for {target}; "
+                                   f"upgrade to cohere>=5 ({e})") from e
+    raise KeyError(f"Unknown provider: {provider}")
+
+
+def _build_async(provider: str, api_key: str):
+    base_url = _setting(provider, "base_url", None)
+    retries = _setting(provider, "max_retries", 0)
+    if provider == "groq":
+        from groq import AsyncGroq
+        return AsyncGroq(api_key=api_key, base_url=base_url, max_retries=retries,
+                         http_client=async_http_client(provider))
+    if provider == "cohere":
+        import cohere
+        timeout = dict(TIMEOUTS, **_setting(provider, "timeouts", {}))["read"]
+        return cohere.AsyncClient(api_key=api_key, base_url=base_url, timeout=timeout,
+                                  httpx_client=async_http_client(provider))
+    raise KeyError(f"Unknown provider: {provider}")
+
+
+def get_client(provider: str, api_key: str = None):
+    """Return the provider's shared client, constructing it on first use."""
+    with _lock:
+        if api_key is not None:
+            _api_keys.setdefault(provider, api_key)
+        if provider not in _clients:
+            _clients[provider] = _build(provider, _api_keys.get(provider))
+        return _clients[provider]
+
+
+def get_async_client(provider: str, api_key: str = None):
+    """Async counterpart of get_client(), sharing the same API keys."""
+    with _lock:
+        if api_key is not None:
+            _api_keys.setdefault(provider, api_key)
+        if provider not in _async_clients:
+            _async_clients[provider] = _build_async(provider, _api_keys.get(provider))
+        return _async_clients[provider]
+
+
+class LazyClient:
+    """Stand-in that resolves to the registry client on first attribute access."""
+
+    def __init__(self, provider: str, api_key: str = None, is_async: bool = False):
+        self._provider = provider
+        self._api_key = api_key
+        self._getter = get_async_client if is_async else get_client
+
+    def __getattr__(self, name):
+        return getattr(self._getter(self._provider, self._api_key), name)
+
+
+def lazy_client(provider: str, api_key: str = None) -> LazyClient:
+    with _lock:
+        if api_key is not None:
+            _api_keys.setdefault(provider, api_key)
+    return LazyClient(provider, api_key)
+
+
+def lazy_async_client(provider: str, api_key: str = None) -> LazyClient:
+    with _lock:
+        if api_key is not None:
+            _api_keys.setdefault(provider, api_key)
+    return LazyClient(provider, api_key, is_async=True)
+
+
+def warm_up(providers=None, background: bool = True):
+    """Open keep-alive connections (TCP + TLS) to each provider ahead of the first real request."""
+    def run():
+        for provider in providers or list(PROVIDERS):
+            base_url = _setting(provider, "base_url", None)
+            if not base_url:
+                continue
+            try:
+                http_client(provider).head(base_url)
+            except Exception as e:
+                print(f"[Clients] warm-up of {provider} failed: {e}")
+
+    if background:
+        threading.Thread(target=run, daemon=True, name="clients-warmup").start()
+    else:
+        run()
+
+
+def stats() -> dict:
+    with _lock:
+        return {
+            provider: {
+                "client_built": provider in _clients,
+                "async_client_built": provider in _async_clients,
+                "pool_open": provider in _http,
+                "async_pool_open": provider in _async_http,
+                "session_open": provider in _sessions,
+                "pool": dict(POOL_LIMITS, **_setting(provider, "pool", {})),
+            }
+            for provider in PROVIDERS
+        }
+
+
+def close_all():
+    with _lock:
+        for client in _http.values():
+            client.close()
+        _http.clear()
+        for s in _sessions.values():
+            s.close()
+        _sessions.clear()
+        _clients.clear()
@@ -0,0 +1,159 @@
+"""
+ContextWindow.py — token-budgeted prompt construction for Nio.
+
+The most recent turns are sent verbatim as long as they fit the token budget.
+Turns that fall out of the window are folded into a running summary in
+batches: when the window overflows it is trimmed down to a low-water mark, so
+the summarizer runs once every several turns instead of on every request.
+The summary and how far it reaches are cached on disk between runs.
+"""
+
+import os
+import re
+import json
+import math
+import threading
+
+SUMMARY_PATH = "Data/ChatSummary.json"
+MESSAGE_OVERHEAD_TOKENS = 4
+LOW_WATER_RATIO = 0.6
+
+_TOKEN_RE = re.compile(r"\w+|[^\w\s]", re.UNICODE)
+
+
+def count_tokens(text: str) -> int:
+    """Cheap BPE-style estimate: punctuation is one token, words about four characters per token."""
+    if not text:
+        return 0
+    return sum(max(1, math.ceil(len(t) / 4)) for t in _TOKEN_RE.findall(text))
+
+
+def message_tokens(message: dict) -> int:
+    return count_tokens(message.get("content", "")) + MESSAGE_OVERHEAD_TOKENS
+
+
+class ContextWindow:
+    """Keeps the prompt under `budget` tokens with a cached rolling summary of older turns."""
+
+    def __init__(self, budget: int = 4096, summarize=None, summary_path: str = SUMMARY_PATH,
+                 low_water_ratio: float = LOW_WATER_RATIO):
+        self.budget = budget
+        self.summarize = summarize  # callable(previous_summary: str, messages: list) -> str
+        self.summary_path = summary_path
+        self.low_water_ratio = low_water_ratio
+        self.lock = threading.Lock()
+        self.summary = ""
+        self.summarized_upto = 0
+        self._counts = []
+        self.last_report = {}
+        self._load_summary()
+
+    # ---------- summary cache ----------
+    def _load_summary(self):
+        try:
+            with open(self.summary_path, "r", encoding="utf-8") as f:
+                data = json.load(f)
+            self.summary = data.get("summary", "")
+            self.summarized_upto = int(data.get("summarized_upto", 0))
+        except (FileNotFoundError, ValueError):
+            pass
+
+    def _save_summary(self):
+        os.makedirs(os.path.dirname(self.summary_path) or ".", exist_ok=True)
+        tmp = self.summary_path + ".tmp"
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump({"summary": self.summary, "summarized_upto": self.summarized_upto}, f, ensure_ascii=False)
+        os.replace(tmp, self.summary_path)
+
+    def _summary_message(self):
+        if not self.summary:
+            return None
+        return {"role": "system", "content": f"Summary of the earlier conversation:\n{self.summary}"}
+
+    # ---------- token accounting ----------
+    def _update_counts(self, history: list):
+        if len(history) < len(self._counts) or len(history) < self.summarized_upto:
+            # the log was compacted underneath us; start over
+            self._counts = []
+            self.summarized_upto = min(self.summarized_upto, len(history))
+        for msg in history[len(self._counts):]:
+            self._counts.append(message_tokens(msg))
+
+    def _window_start(self, end: int, limit: int) -> int:
+        """Index of the oldest message that still fits `limit` tokens, walking back from `end`."""
+        used = 0
+        start = end
+        while start > self.summarized_upto:
+            cost = self._counts[start - 1]
+            if used + cost > limit:
+                break
+            used += cost
+            start -= 1
+        return start
+
+    # ---------- public API ----------
+    def build(self, system_messages: list, history: list, pending: list = ()) -> list:
+        """
+        Return the messages to send: system prompt, running summary, the newest
+        turns of `history` that fit, then `pending` (the not-yet-stored request),
+        which is always included.
+        """
+        with self.lock:
+            self._update_counts(history)
+            fixed = sum(message_tokens(m) for m in system_messages) + sum(message_tokens(m) for m in pending)
+            summary_msg = self._summary_message()
+            available = self.budget - fixed - (message_tokens(summary_msg) if summary_msg else 0)
+
+            start = self._window_start(len(history), available)
+            folded = 0
+            if start > self.summarized_upto:
+                # overflow: fold down to the low-water mark so the next few turns fit untouched
+                target = self._window_start(len(history), int(available * self.low_water_ratio))
+                folded = self._fold(history, target)
+                summary_msg = self._summary_message()
+                available = self.budget - fixed - (message_tokens(summary_msg) if summary_msg else 0)
+                start = self._window_start(len(history), available)
+
+            recent = history[start:]
+            prompt = list(system_messages) + ([summary_msg] if summary_msg else []) + recent + list(pending)
+            summary_tokens = message_tokens(summary_msg) if summary_msg else 0
+            self.last_report = {
+                "prompt_tokens": fixed + summary_tokens + sum(self._counts[start:]),
+                "budget": self.budget,
+                "recent_messages": len(recent) + len(pending),
+                "total_messages": len(history) + len(pending),
+                "summary_tokens": summary_tokens,
+                "summarized_messages": self.summarized_upto,
+                "folded_this_turn": folded,
+            }
+            return prompt
+
+    def _fold(self, history: list, upto: int) -> int:
+        """Fold history[summarized_upto:upto] into the running summary; returns messages folded."""
+        begin = self.summarized_upto
+        if upto <= begin:
+            return 0
+        # a long legacy backlog is only summarized from its newest `budget` tokens;
+        # anything older than that is dropped rather than costing dozens of calls
+        skip_to = upto
+        used = 0
+        while skip_to > begin and used + self._counts[skip_to - 1] <= self.budget:
+            used += self._counts[skip_to - 1]
+            skip_to -= 1
+        chunk = history[skip_to:upto]
+        if self.summarize is not None and chunk:
+            try:
+                self.summary = self.summarize(self.summary, chunk) or self.summary
+            except Exception as e:
+                # without a summary the old turns are simply dropped from the window
+                print(f"[Context] Summarization failed: {e}")
+        self.summarized_upto = upto
+        self._save_summary()
+        return upto - begin
+
+    def reset(self):
+        with self.lock:
+            self.summary = ""
+            self.summarized_upto = 0
+            self._counts = []
+            self._save_summary()
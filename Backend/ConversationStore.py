@@ -0,0 +1,250 @@
+"""
+ConversationStore.py — multi-session conversation history on SQLite (WAL mode).
+
+Every named conversation ("default", "realtime", ...) is a session. Messages
+carry a per-session sequence number, so "last N turns" and positional slices
+are index lookups instead of full scans. Writers to the same session are
+serialized by a per-session lock while readers run concurrently on their own
+thread-local connections; WAL keeps readers from blocking the writer.
+
+    store = shared_store()
+    chat = store.session("default")
+    chat.append({"role": "user", "content": "hi"})
+    chat.recent(10)
+"""
+
+import os
+import time
+import sqlite3
+import threading
+from datetime import datetime
+
+DB_PATH = "Data/Conversations.db"
+DEFAULT_SESSION = "default"
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS sessions (
+    name TEXT PRIMARY KEY,
+    created REAL NOT NULL,
+    updated REAL NOT NULL,
+    length INTEGER NOT NULL DEFAULT 0
+);
+CREATE TABLE IF NOT EXISTS messages (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    session TEXT NOT NULL,
+    seq INTEGER NOT NULL,
+    role TEXT NOT NULL,
+    content TEXT NOT NULL,
+    created REAL NOT NULL
+);
+CREATE UNIQUE INDEX IF NOT EXISTS messages_session_seq ON messages(session, seq);
+"""
+
+
+def _row_to_message(row) -> dict:
+    return {"role": row[0], "content": row[1], "timestamp": row[2]}
+
+
+def _created(msg: dict, now: float) -> float:
+    """Epoch seconds of a message: its "created", else the "timestamp" legacy logs carry, else now."""
+    value = msg.get("created") or msg.get("timestamp")
+    if isinstance(value, (int, float)) and not isinstance(value, bool):
+        return float(value)
+    if isinstance(value, str):
+        try:
+            return float(value)
+        except ValueError:
+            pass
+        try:
+            return datetime.fromisoformat(value).timestamp()
+        except ValueError:
+            pass  # e.g. the GUI's bare "HH:MM", which has no date
+    return now
+
+
+class ConversationStore:
+    def __init__(self, path: str = DB_PATH):
+        self.path = path
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        self._local = threading.local()
+        self._locks = {}
+        self._locks_guard = threading.Lock()
+        self._listeners = []
+        self._delete_listeners = []
+        conn = self._conn()
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.executescript(SCHEMA)
+        conn.commit()
+
+    def _conn(self) -> sqlite3.Connection:
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=30, isolation_level=None)
+            conn.execute("PRAGMA synchronous=NORMAL")
+            conn.execute("PRAGMA busy_timeout=30000")
+            self._local.conn = conn
+        return conn
+
+    def _lock_for(self, session: str) -> threading.Lock:
+        with self._locks_guard:
+            if session not in self._locks:
+                self._locks[session] = threading.Lock()
+            return self._locks[session]
+
+    def add_listener(self, fn):
+        """fn(session, records) is called after every append; records carry their seq numbers."""
+        self._listeners.append(fn)
+
+    def add_delete_listener(self, fn):
+        """fn(session) is called after a session and its messages are deleted."""
+        self._delete_listeners.append(fn)
+
+    # ---------- writes ----------
+    def append(self, session: str, *messages: dict) -> list:
+        """Append messages to a session in one transaction; returns their sequence numbers."""
+        if not messages:
+            return []
+        now = time.time()
+        with self._lock_for(session):
+            conn = self._conn()
+            conn.execute("BEGIN IMMEDIATE")
+            try:
+                row = conn.execute("SELECT length FROM sessions WHERE name = ?", (session,)).fetchone()
+                start = row[0] if row else 0
+                if row is None:
+                    conn.execute("INSERT INTO sessions (name, created, updated, length) VALUES (?, ?, ?, 0)",
+                                 (session, now, now))
+                records = []
+                for i, msg in enumerate(messages):
+                    created = _created(msg, now)
+                    conn.execute(
+                        "INSERT INTO messages (session, seq, role, content, created) VALUES (?, ?, ?, ?, ?)",
+                        (session, start + i, msg.get("role", "user"), msg.get("content", ""), created),
+                    )
+                    records.append({"seq": start + i, "role": msg.get("role", "user"),
+                                    "content": msg.get("content", ""), "timestamp": created})
+                conn.execute("UPDATE sessions SET length = ?, updated = ? WHERE name = ?",
+                             (start + len(messages), now, session))
+                conn.execute("COMMIT")
+            except Exception:
+                conn.execute("ROLLBACK")
+                raise
+        for fn in self._listeners:
+            try:
+                fn(session, records)
+            except Exception as e:
+                print(f"[ConversationStore] listener failed: {e}")
+        return [r["seq"] for r in records]
+
+    def delete_session(self, session: str):
+        with self._lock_for(session):
+            conn = self._conn()
+            conn.execute("BEGIN IMMEDIATE")
+            try:
+                conn.execute("DELETE FROM messages WHERE session = ?", (session,))
+                conn.execute("DELETE FROM sessions WHERE name = ?", (session,))
+                conn.execute("COMMIT")
+            except Exception:
+                conn.execute("ROLLBACK")
+                raise
+        for fn in self._delete_listeners:
+            try:
+                fn(session)
+            except Exception as e:
+                print(f"[ConversationStore] delete listener failed: {e}")
+
+    # ---------- reads ----------
+    def length(self, session: str) -> int:
+        row = self._conn().execute("SELECT length FROM sessions WHERE name = ?", (session,)).fetchone()
+        return row[0] if row else 0
+
+    def slice(self, session: str, start: int = 0, stop: int = None) -> list:
+        """Messages with start <= seq < stop, oldest first."""
+        if stop is None:
+            rows = self._conn().execute(
+                "SELECT role, content, created FROM messages WHERE session = ? AND seq >= ? ORDER BY seq",
+                (session, start)).fetchall()
+        else:
+            rows = self._conn().execute(
+                "SELECT role, content, created FROM messages WHERE session = ? AND seq >= ? AND seq < ? ORDER BY seq",
+                (session, start, stop)).fetchall()
+        return [_row_to_message(r) for r in rows]
+
+    def recent(self, session: str, n: int) -> list:
+        """Last n messages of a session, oldest first."""
+        rows = self._conn().execute(
+            "SELECT role, content, created FROM messages WHERE session = ? ORDER BY seq DESC LIMIT ?",
+            (session, n)).fetchall()
+        return [_row_to_message(r) for r in reversed(rows)]
+
+    def iter_all(self, batch: int = 5000):
+        """Yield (session, seq, message) for every stored message, in insertion order."""
+        last_id = 0
+        while True:
+            rows = self._conn().execute(
+                "SELECT id, session, seq, role, content, created FROM messages WHERE id > ? ORDER BY id LIMIT ?",
+                (last_id, batch)).fetchall()
+            if not rows:
+                return
+            for row in rows:
+                yield row[1], row[2], _row_to_message(row[3:])
+            last_id = rows[-1][0]
+
+    def sessions(self) -> list:
+        rows = self._conn().execute(
+            "SELECT name, created, updated, length FROM sessions ORDER BY updated DESC").fetchall()
+        return [{"name": r[0], "created": r[1], "updated": r[2], "messages": r[3]} for r in rows]
+
+    def session(self, name: str = DEFAULT_SESSION) -> "SessionView":
+        return SessionView(self, name)
+
+
+class SessionView:
+    """List-like view of one session: len(), slicing and append()."""
+
+    def __init__(self, store: ConversationStore, name: str):
+        self.store = store
+        self.name = name
+
+    def __len__(self):
+        return self.store.length(self.name)
+
+    def __getitem__(self, item):
+        if isinstance(item, slice):
+            n = len(self)
+            start, stop, step = item.indices(n)
+            if step != 1:
+                raise ValueError("SessionView slices must be contiguous")
+            return self.store.slice(self.name, start, stop) if start < stop else []
+        n = len(self)
+        if item < 0:
+            item += n
+        rows = self.store.slice(self.name, item, item + 1)
+        if not rows:
+            raise IndexError("session index out of range")
+        return rows[0]
+
+    def append(self, *messages: dict) -> list:
+        return self.store.append(self.name, *messages)
+
+    def recent(self, n: int) -> list:
+        return self.store.recent(self.name, n)
+
+    def messages(self) -> list:
+        return self.store.slice(self.name)
+
+    def sync(self):
+        """Commits are durable already; kept so views can stand in for ChatLogStore."""
+
+
+_shared = None
+_shared_lock = threading.Lock()
+
+
+def shared_store(path: str = DB_PATH) -> ConversationStore:
+    """Process-wide store so every backend shares one set of session locks."""
+    global _shared
+    with _shared_lock:
+        if _shared is None:
+            _shared = ConversationStore(path)
+        return _shared
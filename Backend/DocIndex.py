@@ -0,0 +1,507 @@
+"""
+DocIndex.py — local document retrieval for RealtimeSearch.
+
+    index = shared_doc_index()          # indexes DOC_DIRS in the background
+    index.search("vpn setup for the office", limit=5)
+
+Text files under DOC_DIRS are split into overlapping chunks and written to
+INDEX_DIR as immutable segments:
+
+    seg-N.json      term -> (offset, count) dictionary and per-chunk metadata
+    seg-N.post      int32 postings, for each term its chunk ids then term frequencies
+    seg-N.text      chunk texts, addressed through seg-N.offs (int64 start offsets)
+    seg-N.vec       float32 hashed-embedding vectors, one row per chunk (NumPy only)
+
+Postings, texts and vectors are memory-mapped, so a lookup touches only the
+pages it needs. manifest.json records which file produced which chunks. A
+refresh compares each file's mtime/size (and then its SHA-1) with the
+manifest: only new or changed files are chunked into a new segment, and
+chunks of changed or deleted files are tombstoned. Segments are merged once
+tombstones or segment count pile up.
+
+Scores are BM25 over the chunks plus, with NumPy, a cosine similarity between
+hashed bag-of-words embeddings that rescues paraphrased queries.
+"""
+
+import os
+import re
+import json
+import math
+import mmap
+import time
+import zlib
+import hashlib
+import threading
+from array import array
+
+from HistorySearch import tokenize
+
+try:
+    import numpy as np
+    NUMPY_AVAILABLE = True
+except Exception:
+    NUMPY_AVAILABLE = False
+
+DOC_DIRS = [d for d in os.environ.get("NIO_DOC_DIRS", "Data/Documents").split(os.pathsep) if d]
+INDEX_DIR = "Data/DocIndex"
+EXTENSIONS = (".txt", ".md", ".rst", ".py", ".json", ".csv", ".log", ".html", ".htm")
+MAX_FILE_BYTES = 5 * 1024 * 1024
+CHUNK_WORDS = 180
+CHUNK_OVERLAP = 30
+EMBED_DIM = 256
+EMBED_WEIGHT = 0.35           # share of the hybrid score that comes from the embedding cosine
+EMBED_MIN_SIMILARITY = 0.3    # cosine a chunk without any query term needs to be returned at all
+BM25_K1 = 1.2
+BM25_B = 0.75
+MAX_SEGMENTS = 8
+MAX_DEAD_RATIO = 0.3          # merge once this share of chunks is tombstoned
+REFRESH_INTERVAL = 300.0      # seconds between background rescans of DOC_DIRS
+
+_TAG_RE = re.compile(r"<[^>]+>")
+_PARA_RE = re.compile(r"\n\s*\n")
+
+
+# ---------------- chunking / features ----------------
+def read_text(path: str) -> str:
+    with open(path, "r", encoding="utf-8", errors="ignore") as f:
+        text = f.read(MAX_FILE_BYTES)
+    if path.lower().endswith((".html", ".htm")):
+        text = _TAG_RE.sub(" ", text)
+    return text
+
+
+def chunk_text(text: str, size: int = CHUNK_WORDS, overlap: int = CHUNK_OVERLAP) -> list:
+    """Paragraph-aligned chunks of about `size` words; long paragraphs are split with `overlap` words of carry-over."""
+    chunks, current = [], []
+    for para in _PARA_RE.split(text):
+        words = para.split()
+        if not words:
+            continue
+        if current and len(current) + len(words) > size:
+            chunks.append(" ".join(current))
+            current = current[-overlap:] if len(words) > size else []
+        current.extend(words)
+        while len(current) > size:
+            chunks.append(" ".join(current[:size]))
+            current = current[size - overlap:]
+    if current:
+        chunks.append(" ".join(current))
+    return chunks
+
+
+def embed(tokens: list):
+    """Signed feature-hashing embedding, L2-normalized (float32 row)."""
+    vec = np.zeros(EMBED_DIM, dtype=np.float32)
+    for t in tokens:
+        h = zlib.crc32(t.encode("utf-8"))
+        vec[h % EMBED_DIM] += 1.0 if (h >> 16) & 1 else -1.0
+    norm = float(np.linalg.norm(vec))
+    return vec / norm if norm else vec
+
+
+def file_digest(path: str) -> str:
+    h = hashlib.sha1()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(1 << 20), b""):
+            h.update(block)
+    return h.hexdigest()
+
+
+# ---------------- segments ----------------
+def write_segment(directory: str, name: str, chunks: list):
+    """chunks: [(path, ordinal, text)] -> files for one immutable segment."""
+    postings, doc_len, meta_chunks = {}, [], []
+    vectors = []
+    for local_id, (path, ordinal, text) in enumerate(chunks):
+        tokens = tokenize(text)
+        counts = {}
+        for t in tokens:
+            counts[t] = counts.get(t, 0) + 1
+        for t, tf in counts.items():
+            postings.setdefault(t, []).append((local_id, tf))
+        doc_len.append(len(tokens))
+        meta_chunks.append([path, ordinal])
+        if NUMPY_AVAILABLE:
+            vectors.append(embed(tokens))
+
+    terms, post = {}, array("i")
+    for term, plist in postings.items():
+        terms[term] = [len(post), len(plist)]
+        post.extend(d for d, _ in plist)
+        post.extend(min(tf, 2 ** 31 - 1) for _, tf in plist)
+
+    base = os.path.join(directory, name)
+    offsets, data = array("q"), bytearray()
+    for _, _, text in chunks:
+        offsets.append(len(data))
+        data += text.encode("utf-8")
+    offsets.append(len(data))
+
+    with open(base + ".post", "wb") as f:
+        post.tofile(f)
+    with open(base + ".text", "wb") as f:
+        f.write(data)
+    with open(base + ".offs", "wb") as f:
+        offsets.tofile(f)
+    if vectors:
+        np.vstack(vectors).astype(np.float32).tofile(base + ".vec")
+    meta = {"terms": terms, "chunks": meta_chunks, "doc_len": doc_len, "total_len": sum(doc_len)}
+    with open(base + ".json", "w", encoding="utf-8") as f:
+        json.dump(meta, f)
+
+
+def _map(path: str):
+    if not os.path.exists(path) or os.path.getsize(path) == 0:
+        return None
+    with open(path, "rb") as f:
+        return mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+
+
+class Segment:
+    def __init__(self, directory: str, name: str):
+        self.name = name
+        base = os.path.join(directory, name)
+        with open(base + ".json", "r", encoding="utf-8") as f:
+            meta = json.load(f)
+        self.terms = meta["terms"]
+        self.chunks = meta["chunks"]
+        self.doc_len = meta["doc_len"]
+        self.total_len = meta["total_len"]
+        self.n = len(self.chunks)
+        self._post_map = _map(base + ".post")
+        self._text_map = _map(base + ".text")
+        self.post = memoryview(self._post_map).cast("i") if self._post_map else memoryview(array("i"))
+        offs = array("q")
+        with open(base + ".offs", "rb") as f:
+            offs.frombytes(f.read())
+        self.offsets = offs
+        self.vectors = None
+        if NUMPY_AVAILABLE and os.path.exists(base + ".vec") and self.n:
+            self.vectors = np.memmap(base + ".vec", dtype=np.float32, mode="r", shape=(self.n, EMBED_DIM))
+        self.doc_len_arr = np.asarray(self.doc_len, dtype=np.float64) if NUMPY_AVAILABLE else None
+
+    def postings(self, term: str):
+        entry = self.terms.get(term)
+        if entry is None:
+            return None
+        offset, count = entry
+        return self.post[offset:offset + count], self.post[offset + count:offset + 2 * count]
+
+    def text(self, local_id: int) -> str:
+        start, end = self.offsets[local_id], self.offsets[local_id + 1]
+        return self._text_map[start:end].decode("utf-8", errors="ignore") if self._text_map else ""
+
+    def close(self):
+        self.post.release()
+        for m in (self._post_map, self._text_map):
+            if m is not None:
+                m.close()
+        self.vectors = None
+
+
+# ---------------- index ----------------
+class DocIndex:
+    def __init__(self, directories=None, index_dir: str = INDEX_DIR):
+        self.directories = list(directories if directories is not None else DOC_DIRS)
+        self.index_dir = index_dir
+        os.makedirs(index_dir, exist_ok=True)
+        self.lock = threading.RLock()        # guards manifest + segment list swaps
+        self.refresh_lock = threading.Lock() # one refresh at a time
+        self.manifest = self._load_manifest()
+        self.segments = {}
+        for seg in self.manifest["segments"]:
+            try:
+                self.segments[seg["name"]] = Segment(index_dir, seg["name"])
+            except Exception as e:
+                print(f"[DocIndex] dropping unreadable segment {seg['name']}: {e}")
+        self.manifest["segments"] = [s for s in self.manifest["segments"] if s["name"] in self.segments]
+        self._remove_orphans()
+        self.last_refresh = None
+
+    # ---- manifest ----
+    def _manifest_path(self) -> str:
+        return os.path.join(self.index_dir, "manifest.json")
+
+    def _load_manifest(self) -> dict:
+        try:
+            with open(self._manifest_path(), "r", encoding="utf-8") as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return {"next_segment": 0, "segments": [], "files": {}}
+
+    def _save_manifest(self):
+        tmp = self._manifest_path() + ".tmp"
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump(self.manifest, f)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp, self._manifest_path())
+
+    def _remove_orphans(self):
+        live = {s["name"] for s in self.manifest["segments"]}
+        for fname in os.listdir(self.index_dir):
+            if fname.startswith("seg-") and fname.split(".", 1)[0] not in live:
+                try:
+                    os.remove(os.path.join(self.index_dir, fname))
+                except OSError:
+                    pass
+
+    def _new_segment_name(self) -> str:
+        name = f"seg-{self.manifest['next_segment']}"
+        self.manifest["next_segment"] += 1
+        return name
+
+    # ---- refresh ----
+    def _scan(self) -> dict:
+        found = {}
+        for directory in self.directories:
+            if not os.path.isdir(directory):
+                continue
+            for root, _, files in os.walk(directory):
+                for fname in files:
+                    if fname.lower().endswith(EXTENSIONS):
+                        path = os.path.abspath(os.path.join(root, fname))
+                        try:
+                            st = os.stat(path)
+                        except OSError:
+                            continue
+                        found[path] = (st.st_mtime, st.st_size)
+        return found
+
+    def refresh(self) -> dict:
+        """Reindex new/changed files and tombstone removed ones; returns what changed."""
+        with self.refresh_lock:
+            started = time.perf_counter()
+            found = self._scan()
+            known = self.manifest["files"]
+            changed, touched, removed = [], 0, [p for p in known if p not in found]
+            for path, (mtime, size) in found.items():
+                entry = known.get(path)
+                if entry and entry["mtime"] == mtime and entry["size"] == size:
+                    continue
+                digest = file_digest(path)
+                if entry and entry["sha1"] == digest:
+                    entry["mtime"], entry["size"] = mtime, size  # touched, same content
+                    touched += 1
+                    continue
+                changed.append((path, mtime, size, digest))
+
+            chunks, owners = [], []
+            for path, mtime, size, digest in changed:
+                try:
+                    parts = chunk_text(read_text(path))
+                except OSError as e:
+                    print(f"[DocIndex] cannot read {path}: {e}")
+                    continue
+                owners.append((path, mtime, size, digest, len(chunks), len(parts)))
+                chunks.extend((path, i, text) for i, text in enumerate(parts))
+
+            with self.lock:
+                name = None
+                if chunks:
+                    name = self._new_segment_name()
+                    write_segment(self.index_dir, name, chunks)
+                    self.segments[name] = Segment(self.index_dir, name)
+                    self.manifest["segments"].append({"name": name, "dead": []})
+                for path in removed + [o[0] for o in owners]:
+                    self._tombstone(path)
+                for path in removed:
+                    known.pop(path, None)
+                for path, mtime, size, digest, start, count in owners:
+                    known[path] = {"mtime": mtime, "size": size, "sha1": digest,
+                                   "segment": name, "chunks": list(range(start, start + count))}
+                self._save_manifest()
+            if self._needs_merge():
+                self.merge()
+            self.last_refresh = time.time()
+            report = {"indexed_files": len(owners), "chunks": len(chunks), "removed_files": len(removed),
+                      "touched_files": touched, "seconds": round(time.perf_counter() - started, 3)}
+            if owners or removed:
+                print(f"[DocIndex] refresh: {report}")
+            return report
+
+    def refresh_if_stale(self, max_age: float = REFRESH_INTERVAL) -> bool:
+        """Start a background refresh when the last one is older than max_age; never blocks."""
+        if self.last_refresh is not None and time.time() - self.last_refresh < max_age:
+            return False
+        if self.refresh_lock.locked():
+            return False
+        threading.Thread(target=self._refresh_quietly, daemon=True, name="doc-index").start()
+        return True
+
+    def _refresh_quietly(self):
+        try:
+            self.refresh()
+        except Exception as e:
+            print(f"[DocIndex] refresh failed: {e}")
+
+    def _tombstone(self, path: str):
+        entry = self.manifest["files"].get(path)
+        if not entry or entry.get("segment") is None:
+            return
+        for seg in self.manifest["segments"]:
+            if seg["name"] == entry["segment"]:
+                seg["dead"] = sorted(set(seg["dead"]) | set(entry["chunks"]))
+
+    def _needs_merge(self) -> bool:
+        with self.lock:
+            total = sum(self.segments[s["name"]].n for s in self.manifest["segments"])
+            dead = sum(len(s["dead"]) for s in self.manifest["segments"])
+            return len(self.manifest["segments"]) > MAX_SEGMENTS or (total and dead / total > MAX_DEAD_RATIO)
+
+    def merge(self):
+        """Rewrite all live chunks into a single segment."""
+        with self.lock:
+            chunks, remap = [], {}
+            for seg_info in self.manifest["segments"]:
+                seg, dead = self.segments[seg_info["name"]], set(seg_info["dead"])
+                for local_id in range(seg.n):
+                    if local_id not in dead:
+                        path, ordinal = seg.chunks[local_id]
+                        remap[(seg.name, local_id)] = len(chunks)
+                        chunks.append((path, ordinal, seg.text(local_id)))
+            old = list(self.segments.values())
+            name = self._new_segment_name()
+            write_segment(self.index_dir, name, chunks)
+            self.segments = {name: Segment(self.index_dir, name)}
+            self.manifest["segments"] = [{"name": name, "dead": []}]
+            for entry in self.manifest["files"].values():
+                if entry.get("segment") is not None:
+                    entry["chunks"] = [remap[(entry["segment"], c)] for c in entry["chunks"]
+                                       if (entry["segment"], c) in remap]
+                    entry["segment"] = name
+            self._save_manifest()
+            for seg in old:
+                seg.close()
+            self._remove_orphans()
+
+    # ---- search ----
+    def __len__(self):
+        with self.lock:
+            return sum(self.segments[s["name"]].n - len(s["dead"]) for s in self.manifest["segments"])
+
+    def search(self, query: str, limit: int = 5) -> list:
+        """Best chunks as search-result dicts (title, body, url, path, score)."""
+        terms = list(dict.fromkeys(tokenize(query)))
+        if not terms:
+            return []
+        with self.lock:
+            segs = [(self.segments[s["name"]], s["dead"]) for s in self.manifest["segments"]]
+            n = sum(seg.n - len(dead) for seg, dead in segs)
+            if not n:
+                return []
+            avg_len = (sum(seg.total_len for seg, _ in segs) / sum(seg.n for seg, _ in segs)) or 1.0
+            df = {t: sum(seg.terms[t][1] for seg, _ in segs if t in seg.terms) for t in terms}
+            idf = {t: math.log(1 + (n - d + 0.5) / (d + 0.5)) for t, d in df.items() if d}
+            if NUMPY_AVAILABLE:
+                hits = self._search_numpy(segs, terms, idf, avg_len, query, limit)
+            else:
+                hits = self._search_python(segs, idf, avg_len, limit)
+            return [self._result(seg, local_id, score) for seg, local_id, score in hits]
+
+    def _search_numpy(self, segs, terms, idf, avg_len, query, limit):
+        qvec = embed(tokenize(query))
+        per_seg = []
+        top_bm25 = 0.0
+        for seg, dead in segs:
+            if not seg.n:
+                continue
+            scores = np.zeros(seg.n, dtype=np.float64)
+            for t, w in idf.items():
+                p = seg.postings(t)
+                if p is None:
+                    continue
+                docs = np.frombuffer(p[0], dtype=np.int32)
+                tfs = np.frombuffer(p[1], dtype=np.int32).astype(np.float64)
+                norm = BM25_K1 * (1 - BM25_B + BM25_B * seg.doc_len_arr[docs] / avg_len)
+                scores[docs] += w * tfs * (BM25_K1 + 1) / (tfs + norm)
+            if dead:
+                scores[np.asarray(dead, dtype=np.int64)] = -np.inf
+            top_bm25 = max(top_bm25, float(scores.max(initial=0.0)))
+            per_seg.append((seg, dead, scores))
+        hits = []
+        for seg, dead, scores in per_seg:
+            combined = scores / top_bm25 if top_bm25 > 0 else np.where(np.isfinite(scores), 0.0, -np.inf)
+            if seg.vectors is not None:
+                cosine = seg.vectors @ qvec
+                combined = (1 - EMBED_WEIGHT) * combined + EMBED_WEIGHT * cosine
+                combined[(scores <= 0) & (cosine < EMBED_MIN_SIMILARITY)] = -np.inf  # hash-collision noise
+            else:
+                combined[scores <= 0] = -np.inf
+            k = min(limit, seg.n)
+            top = np.argpartition(-combined, k - 1)[:k]
+            hits.extend((seg, int(i), float(combined[i])) for i in top if np.isfinite(combined[i]) and combined[i] > 0)
+        hits.sort(key=lambda h: h[2], reverse=True)
+        return hits[:limit]
+
+    def _search_python(self, segs, idf, avg_len, limit):
+        hits = []
+        for seg, dead in segs:
+            dead = set(dead)
+            scores = {}
+            for t, w in idf.items():
+                p = seg.postings(t)
+                if p is None:
+                    continue
+                for d, tf in zip(p[0], p[1]):
+                    if d in dead:
+                        continue
+                    norm = BM25_K1 * (1 - BM25_B + BM25_B * seg.doc_len[d] / avg_len)
+                    scores[d] = scores.get(d, 0.0) + w * tf * (BM25_K1 + 1) / (tf + norm)
+            hits.extend((seg, d, s) for d, s in scores.items())
+        hits.sort(key=lambda h: h[2], reverse=True)
+        return hits[:limit]
+
+    @staticmethod
+    def _result(seg: Segment, local_id: int, score: float) -> dict:
+        path, ordinal = seg.chunks[local_id]
+        return {
+            "title": f"{os.path.basename(path)} (part {ordinal + 1})",
+            "body": seg.text(local_id),
+            "url": "file://" + path.replace(os.sep, "/"),
+            "publisher": "local document",
+            "path": path,
+            "score": round(score, 4),
+        }
+
+    def stats(self) -> dict:
+        with self.lock:
+            return {
+                "directories": self.directories,
+                "files": len(self.manifest["files"]),
+                "segments": len(self.manifest["segments"]),
+                "live_chunks": len(self),
+                "dead_chunks": sum(len(s["dead"]) for s in self.manifest["segments"]),
+                "last_refresh": self.last_refresh,
+            }
+
+
+_shared = None
+_shared_lock = threading.Lock()
+
+
+def shared_doc_index() -> DocIndex:
+    """Process-wide index over DOC_DIRS, rescanned in the background every REFRESH_INTERVAL."""
+    global _shared
+    with _shared_lock:
+        if _shared is None:
+            _shared = DocIndex()
+    _shared.refresh_if_stale()
+    return _shared
+
+
+def stats() -> dict:
+    with _shared_lock:
+        return _shared.stats() if _shared is not None else {}
+
+
+if __name__ == "__main__":
+    import sys
+    index = DocIndex()
+    print(index.refresh())
+    for q in sys.argv[1:]:
+        started = time.perf_counter()
+        hits = index.search(q)
+        print(f"{q!r}: {len(hits)} hits in {(time.perf_counter() - started) * 1000:.2f} ms")
+        for hit in hits:
+            print(f"  {hit['score']:.3f}  {hit['title']}")
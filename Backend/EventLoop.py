@@ -0,0 +1,89 @@
+"""
+EventLoop.py — one long-lived asyncio loop on a background thread.
+
+The GUI used to start a new OS thread per action and backends called
+asyncio.run() per request, creating and tearing down an event loop every
+time. Async work is now submitted to this loop from any thread:
+
+    future = shared_loop().submit(core.achat("hi"))   # concurrent.futures.Future
+    future.add_done_callback(...)
+"""
+
+import asyncio
+import threading
+import concurrent.futures
+
+
+class LoopThread:
+    def __init__(self, name: str = "nio-loop"):
+        self.loop = asyncio.new_event_loop()
+        self._started = threading.Event()
+        self.thread = threading.Thread(target=self._run, name=name, daemon=True)
+        self.thread.start()
+        self._started.wait()
+
+    def _run(self):
+        asyncio.set_event_loop(self.loop)
+        self.loop.call_soon(self._started.set)
+        self.loop.run_forever()
+
+    def submit(self, coro) -> concurrent.futures.Future:
+        """Schedule a coroutine from any thread; thread-safe."""
+        return asyncio.run_coroutine_threadsafe(coro, self.loop)
+
+    def run(self, coro, timeout: float = None):
+        """Block the calling (non-loop) thread until the coroutine finishes."""
+        if threading.current_thread() is self.thread:
+            raise RuntimeError("LoopThread.run() would deadlock when called from the loop thread")
+        return self.submit(coro).result(timeout)
+
+    def call_soon(self, fn, *args):
+        self.loop.call_soon_threadsafe(fn, *args)
+
+    def in_flight(self) -> int:
+        return len([t for t in asyncio.all_tasks(self.loop) if not t.done()])
+
+    def stop(self):
+        self.loop.call_soon_threadsafe(self.loop.stop)
+        self.thread.join(timeout=5)
+
+
+async def iterate_in_thread(fn, *args, **kwargs):
+    """
+    Async generator over a blocking iterator: fn(*args, **kwargs) is consumed
+    on the default executor and each item is handed to the loop as soon as it
+    is produced.
+    """
+    loop = asyncio.get_running_loop()
+    queue = asyncio.Queue()
+
+    def pump():
+        try:
+            for item in fn(*args, **kwargs):
+                loop.call_soon_threadsafe(queue.put_nowait, ("item", item))
+        except BaseException as e:
+            loop.call_soon_threadsafe(queue.put_nowait, ("error", e))
+        else:
+            loop.call_soon_threadsafe(queue.put_nowait, ("done", None))
+
+    worker = loop.run_in_executor(None, pump)
+    while True:
+        kind, item = await queue.get()
+        if kind == "done":
+            break
+        if kind == "error":
+            raise item
+        yield item
+    await worker
+
+
+_shared = None
+_shared_lock = threading.Lock()
+
+
+def shared_loop() -> LoopThread:
+    global _shared
+    with _shared_lock:
+        if _shared is None:
+            _shared = LoopThread()
+        return _shared
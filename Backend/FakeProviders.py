@@ -0,0 +1,299 @@
+"""
+FakeProviders.py — local stand-in for Groq, Cohere and Hugging Face endpoints.
+
+Lets the backends run offline for load and latency testing:
+
+    python FakeProviders.py --port 8765 --latency 0.2 --token-rate 80 --error-rate 0.02 --rate-limit-rate 0.05
+
+then start Nio with
+    NIO_GROQ_BASE_URL=http://127.0.0.1:8765
+    NIO_COHERE_BASE_URL=http://127.0.0.1:8765
+    NIO_HF_BASE_URL=http://127.0.0.1:8765
+
+Served routes:
+    POST /openai/v1/chat/completions   OpenAI/Groq chat completions (SSE when stream=true)
+    POST /v1/chat                      Cohere chat (newline-delimited stream events when stream=true)
+    POST /models/<model id>            HF inference image endpoint (returns a PNG; while a cold model
+                                       "loads" it answers 503 with estimated_time)
+
+All randomness (errors, 429s, generated text) comes from one seeded RNG so a
+run can be replayed.
+"""
+
+import json
+import time
+import zlib
+import uuid
+import random
+import struct
+import argparse
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+WORDS = ("the quick brown fox jumps over a lazy dog while nio answers every question "
+         "with short clear and accurate sentences about the world").split()
+
+
+class FakeConfig:
+    """Knobs shared by all routes. Times are in seconds."""
+
+    def __init__(self, latency: float = 0.1, token_rate: float = 100.0, response_tokens: int = 60,
+                 error_rate: float = 0.0, rate_limit_rate: float = 0.0, retry_after: float = 1.0,
+                 image_latency: float = 1.0, image_size: int = 64, seed: int = 0, responder=None,
+                 model_load_time: float = 0.0):
+        self.latency = latency
+        self.token_rate = token_rate
+        self.response_tokens = response_tokens
+        self.error_rate = error_rate
+        self.rate_limit_rate = rate_limit_rate
+        self.retry_after = retry_after
+        self.image_latency = image_latency
+        self.image_size = image_size
+        self.model_load_time = model_load_time  # seconds the HF model stays "loading" after the first request
+        self.model_loaded_at = None
+        self.responder = responder  # callable(provider, prompt) -> str, overrides generated text
+        self.rng = random.Random(seed)
+        self.lock = threading.Lock()
+        self.counters = {"requests": 0, "errors": 0, "rate_limited": 0, "loading": 0}
+
+    def roll(self) -> str:
+        """Decide the fate of one request: 'ok', 'error' or 'rate_limited'."""
+        with self.lock:
+            self.counters["requests"] += 1
+            r = self.rng.random()
+            if r < self.rate_limit_rate:
+                self.counters["rate_limited"] += 1
+                return "rate_limited"
+            if r < self.rate_limit_rate + self.error_rate:
+                self.counters["errors"] += 1
+                return "error"
+            return "ok"
+
+    def loading_for(self) -> float:
+        """Seconds until the fake HF model finishes loading (0 once it has)."""
+        with self.lock:
+            now = time.monotonic()
+            if self.model_loaded_at is None:
+                self.model_loaded_at = now + self.model_load_time
+            remaining = self.model_loaded_at - now
+            if remaining > 0:
+                self.counters["loading"] += 1
+            return max(0.0, remaining)
+
+    def text_for(self, provider: str, prompt: str) -> str:
+        if self.responder is not None:
+            return self.responder(provider, prompt)
+        with self.lock:
+            return " ".join(self.rng.choice(WORDS) for _ in range(self.response_tokens)) + "."
+
+
+def tokenize_for_stream(text: str) -> list:
+    """Split text into word-sized deltas that keep their leading spaces."""
+    parts = []
+    for i, word in enumerate(text.split(" ")):
+        parts.append(word if i == 0 else " " + word)
+    return [p for p in parts if p]
+
+
+def make_png(size: int, seed: int) -> bytes:
+    """Tiny solid-colour RGB PNG built without PIL."""
+    rng = random.Random(seed)
+    pixel = bytes(rng.randrange(256) for _ in range(3))
+    raw = b"".join(b"\x00" + pixel * size for _ in range(size))
+
+    def chunk(tag, data):
+        return struct.pack(">I", len(data)) + tag + data + struct.pack(">I", zlib.crc32(tag + data) & 0xFFFFFFFF)
+
+    header = struct.pack(">IIBBBBB", size, size, 8, 2, 0, 0, 0)
+    return b"\x89PNG\r\n\x1a\n" + chunk(b"IHDR", header) + chunk(b"IDAT", zlib.compress(raw)) + chunk(b"IEND", b"")
+
+
+class FakeProviderHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    config = FakeConfig()
+
+    def log_message(self, fmt, *args):
+        pass
+
+    # ---------- plumbing ----------
+    def _read_json(self) -> dict:
+        length = int(self.headers.get("Content-Length") or 0)
+        body = self.rfile.read(length) if length else b""
+        try:
+            return json.loads(body or b"{}")
+        except ValueError:
+            return {}
+
+    def _send_json(self, status: int, payload: dict, headers: dict = None):
+        data = json.dumps(payload).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(data)))
+        for k, v in (headers or {}).items():
+            self.send_header(k, v)
+        self.end_headers()
+        self.wfile.write(data)
+
+    def _start_stream(self, content_type: str):
+        self.send_response(200)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Transfer-Encoding", "chunked")
+        self.send_header("Cache-Control", "no-cache")
+        self.end_headers()
+
+    def _write_chunk(self, data: bytes):
+        self.wfile.write(f"{len(data):X}\r\n".encode() + data + b"\r\n")
+        self.wfile.flush()
+
+    def _end_stream(self):
+        self.wfile.write(b"0\r\n\r\n")
+        self.wfile.flush()
+
+    def _fail_if_unlucky(self) -> bool:
+        cfg = self.config
+        fate = cfg.roll()
+        if fate == "rate_limited":
+            self._send_json(429, {"error": {"message": "Rate limit reached", "type": "rate_limit_exceeded"}},
+                            {"Retry-After": f"{cfg.retry_after:g}"})
+            return True
+        if fate == "error":
+            self._send_json(500, {"error": {"message": "Injected server error", "type": "server_error"}})
+            return True
+        return False
+
+    def _pace(self):
+        if self.config.token_rate > 0:
+            time.sleep(1.0 / self.config.token_rate)
+
+    # ---------- routes ----------
+    def do_HEAD(self):
+        self.send_response(200)
+        self.send_header("Content-Length", "0")
+        self.end_headers()
+
+    def do_POST(self):
+        path = self.path.split("?", 1)[0].rstrip("/")
+        body = self._read_json()
+        if path.endswith("/chat/completions"):
+            return self._chat_completions(body)
+        if path == "/v1/chat":
+            return self._cohere_chat(body)
+        if path.startswith("/models/"):
+            return self._hf_image(body, path[len("/models/"):])
+        self._send_json(404, {"error": {"message": f"No route for {path}"}})
+
+    def _chat_completions(self, body: dict):
+        time.sleep(self.config.latency)
+        if self._fail_if_unlucky():
+            return
+        messages = body.get("messages") or []
+        prompt = next((m.get("content", "") for m in reversed(messages) if m.get("role") == "user"), "")
+        text = self.config.text_for("openai", prompt)
+        model = body.get("model", "fake-model")
+        cid = f"chatcmpl-{uuid.uuid4().hex[:12]}"
+        created = int(time.time())
+        if not body.get("stream"):
+            time.sleep(len(tokenize_for_stream(text)) / self.config.token_rate if self.config.token_rate > 0 else 0)
+            return self._send_json(200, {
+                "id": cid, "object": "chat.completion", "created": created, "model": model,
+                "choices": [{"index": 0, "message": {"role": "assistant", "content": text}, "finish_reason": "stop"}],
+                "usage": {"prompt_tokens": len(prompt.split()), "completion_tokens": len(text.split()),
+                          "total_tokens": len(prompt.split()) + len(text.split())},
+            })
+
+        def event(delta, finish=None):
+            payload = {"id": cid, "object": "chat.completion.chunk", "created": created, "model": model,
+                       "choices": [{"index": 0, "delta": delta, "finish_reason": finish}]}
+            return f"data: {json.dumps(payload)}\n\n".encode("utf-8")
+
+        self._start_stream("text/event-stream")
+        self._write_chunk(event({"role": "assistant", "content": ""}))
+        for piece in tokenize_for_stream(text):
+            self._pace()
+            self._write_chunk(event({"content": piece}))
+        self._write_chunk(event({}, "stop"))
+        self._write_chunk(b"data: [DONE]\n\n")
+        self._end_stream()
+
+    def _cohere_chat(self, body: dict):
+        time.sleep(self.config.latency)
+        if self._fail_if_unlucky():
+            return
+        prompt = body.get("message", "")
+        text = self.config.text_for("cohere", prompt)
+        generation_id = str(uuid.uuid4())
+        final = {"text": text, "generation_id": generation_id, "chat_history": [], "finish_reason": "COMPLETE"}
+        if not body.get("stream"):
+            return self._send_json(200, final)
+
+        def event(payload):
+            return (json.dumps(payload) + "\n").encode("utf-8")
+
+        self._start_stream("application/stream+json")
+        self._write_chunk(event({"is_finished": False, "event_type": "stream-start", "generation_id": generation_id}))
+        for piece in tokenize_for_stream(text):
+            self._pace()
+            self._write_chunk(event({"is_finished": False, "event_type": "text-generation", "text": piece}))
+        self._write_chunk(event({"is_finished": True, "event_type": "stream-end",
+                                 "finish_reason": "COMPLETE", "response": final}))
+        self._end_stream()
+
+    def _hf_image(self, body: dict, model: str = ""):
+        loading = self.config.loading_for()
+        if loading > 0:
+            return self._send_json(503, {"error": f"Model {model} is currently loading", "estimated_time": loading})
+        time.sleep(self.config.image_latency)
+        if self._fail_if_unlucky():
+            return
+        seed = zlib.crc32(str(body.get("inputs", "")).encode("utf-8"))
+        data = make_png(self.config.image_size, seed)
+        self.send_response(200)
+        self.send_header("Content-Type", "image/png")
+        self.send_header("Content-Length", str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+
+def start_server(host: str = "127.0.0.1", port: int = 0, config: FakeConfig = None):
+    """Start the stand-in server on a daemon thread; returns (server, base_url). Port 0 picks a free port."""
+    handler = type("BoundFakeProviderHandler", (FakeProviderHandler,), {"config": config or FakeConfig()})
+    server = ThreadingHTTPServer((host, port), handler)
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, daemon=True, name="fake-providers").start()
+    return server, f"http://{host}:{server.server_address[1]}"
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Local Groq/Cohere/HF stand-in for offline testing")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--latency", type=float, default=0.1, help="seconds before the first byte")
+    parser.add_argument("--token-rate", type=float, default=100.0, help="streamed tokens per second")
+    parser.add_argument("--response-tokens", type=int, default=60)
+    parser.add_argument("--error-rate", type=float, default=0.0, help="fraction of requests answered with 500")
+    parser.add_argument("--rate-limit-rate", type=float, default=0.0, help="fraction of requests answered with 429")
+    parser.add_argument("--retry-after", type=float, default=1.0)
+    parser.add_argument("--image-latency", type=float, default=1.0)
+    parser.add_argument("--model-load-time", type=float, default=0.0, help="seconds the image model cold-starts for")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    config = FakeConfig(latency=args.latency, token_rate=args.token_rate, response_tokens=args.response_tokens,
+                        error_rate=args.error_rate, rate_limit_rate=args.rate_limit_rate,
+                        retry_after=args.retry_after, image_latency=args.image_latency, seed=args.seed,
+                        model_load_time=args.model_load_time)
+    server, base_url = start_server(args.host, args.port, config)
+    print(f"Fake providers listening on {base_url}")
+    print(f"  NIO_GROQ_BASE_URL={base_url}")
+    print(f"  NIO_COHERE_BASE_URL={base_url}")
+    print(f"  NIO_HF_BASE_URL={base_url}")
+    try:
+        while True:
+            time.sleep(3600)
+    except KeyboardInterrupt:
+        server.shutdown()
+        print(f"Served: {config.counters}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,247 @@
+"""
+HistorySearch.py — full-text search over stored conversations.
+
+An in-memory inverted index over every message in ConversationStore, ranked
+with BM25. The index is built once in the background at startup and then kept
+current from the store's append listener, so new turns are searchable as soon
+as they are written and nothing is ever rescanned.
+
+Postings are compact parallel arrays (doc ids / term frequencies) that NumPy
+scores without copying when it is installed; very common terms are skipped
+unless they are all the query has. Together that keeps lookups in the low
+milliseconds even with hundreds of thousands of messages.
+"""
+
+import re
+import math
+import time
+import heapq
+import threading
+from array import array
+
+from ConversationStore import shared_store
+
+try:
+    import numpy as np
+    NUMPY_AVAILABLE = True
+except Exception:
+    NUMPY_AVAILABLE = False
+
+BM25_K1 = 1.2
+BM25_B = 0.75
+COMMON_TERM_RATIO = 0.25  # terms in more than this share of messages are treated as stopwords
+
+STOPWORDS = frozenset("""
+a an and are as at be but by for from has have i if in is it its me my of on or so that the this to
+was we were what when where which who will with you your
+""".split())
+
+_WORD_RE = re.compile(r"\w+", re.UNICODE)
+
+ROLES = {"user": 0, "assistant": 1, "system": 2}
+ROLE_NAMES = {v: k for k, v in ROLES.items()}
+
+
+def tokenize(text: str) -> list:
+    return [t for t in _WORD_RE.findall((text or "").lower()) if t not in STOPWORDS]
+
+
+class _Postings:
+    __slots__ = ("docs", "tfs")
+
+    def __init__(self):
+        self.docs = array("i")
+        self.tfs = array("H")
+
+
+class HistoryIndex:
+    def __init__(self):
+        self.lock = threading.RLock()
+        self.postings = {}
+        self.doc_session = []          # doc id -> session name
+        self.doc_seq = array("i")      # doc id -> seq within the session
+        self.doc_role = array("b")
+        self.doc_time = array("d")
+        self.doc_len = array("i")
+        self.total_len = 0
+        self.removed = 0               # docs of deleted sessions; their ids stay allocated
+        self.ready = threading.Event()
+        self._seen = set()             # (session, seq) already indexed, guards the startup race
+
+    def __len__(self):
+        return len(self.doc_seq)
+
+    def add(self, session: str, seq: int, message: dict):
+        key = (session, seq)
+        terms = tokenize(message.get("content", ""))
+        counts = {}
+        for t in terms:
+            counts[t] = counts.get(t, 0) + 1
+        with self.lock:
+            if key in self._seen:
+                return
+            self._seen.add(key)
+            doc_id = len(self.doc_seq)
+            self.doc_session.append(session)
+            self.doc_seq.append(seq)
+            self.doc_role.append(ROLES.get(message.get("role"), 2))
+            self.doc_time.append(float(message.get("timestamp") or 0.0))
+            self.doc_len.append(len(terms))
+            self.total_len += len(terms)
+            for term, tf in counts.items():
+                p = self.postings.get(term)
+                if p is None:
+                    p = self.postings[term] = _Postings()
+                p.docs.append(doc_id)
+                p.tfs.append(min(tf, 65535))
+
+    def remove_session(self, session: str):
+        """Drop every message of a deleted session from the postings."""
+        with self.lock:
+            dead = {d for d, name in enumerate(self.doc_session) if name == session}
+            if not dead:
+                return
+            for term, p in list(self.postings.items()):
+                keep = [i for i, d in enumerate(p.docs) if d not in dead]
+                if len(keep) == len(p.docs):
+                    continue
+                if not keep:
+                    del self.postings[term]
+                    continue
+                fresh = _Postings()
+                fresh.docs.extend(p.docs[i] for i in keep)
+                fresh.tfs.extend(p.tfs[i] for i in keep)
+                self.postings[term] = fresh
+            for d in dead:
+                self.doc_session[d] = None
+                self.total_len -= self.doc_len[d]
+                self.doc_len[d] = 0
+            self.removed += len(dead)
+            # a session recreated under the same name starts again at seq 0
+            self._seen = {key for key in self._seen if key[0] != session}
+
+    def search(self, query: str, limit: int = 20, session: str = None, sender: str = None,
+               since: float = None, until: float = None) -> list:
+        """
+        BM25-ranked hits as dicts {session, seq, role, timestamp, score}, best first.
+        `sender` is "user" or "assistant"; `since`/`until` are Unix timestamps.
+        """
+        terms = list(dict.fromkeys(tokenize(query)))
+        if limit <= 0:
+            return []
+        with self.lock:
+            n = len(self.doc_seq)
+            live = n - self.removed
+            if not terms or not live:
+                return []
+            avg_len = self.total_len / live or 1.0
+            found = [(t, self.postings[t]) for t in terms if t in self.postings]
+            selective = [(t, p) for t, p in found if len(p.docs) <= COMMON_TERM_RATIO * live]
+            if selective:
+                found = selective
+            role = ROLES.get(sender) if sender else None
+            if NUMPY_AVAILABLE:
+                best = self._score_numpy(found, n, live, avg_len, limit, session, role, since, until)
+            else:
+                best = self._score_python(found, live, avg_len, limit, session, role, since, until)
+            return [{
+                "session": self.doc_session[d],
+                "seq": self.doc_seq[d],
+                "role": ROLE_NAMES.get(self.doc_role[d], "system"),
+                "timestamp": self.doc_time[d],
+                "score": round(float(s), 4),
+            } for d, s in best]
+
+    def _score_numpy(self, found, n, live, avg_len, limit, session, role, since, until):
+        doc_len = np.frombuffer(self.doc_len, dtype=np.int32, count=n)
+        scores = np.zeros(n, dtype=np.float64)
+        for _, p in found:
+            docs = np.frombuffer(p.docs, dtype=np.int32, count=len(p.docs))
+            tfs = np.frombuffer(p.tfs, dtype=np.uint16, count=len(p.tfs)).astype(np.float64)
+            df = len(docs)
+            idf = math.log(1 + (live - df + 0.5) / (df + 0.5))
+            norm = tfs * (BM25_K1 + 1) / (tfs + BM25_K1 * (1 - BM25_B + BM25_B * doc_len[docs] / avg_len))
+            scores[docs] += idf * norm  # a term occurs at most once per doc, so no duplicate indices
+        mask = scores > 0
+        if role is not None:
+            mask &= np.frombuffer(self.doc_role, dtype=np.int8, count=n) == role
+        if since is not None:
+            mask &= np.frombuffer(self.doc_time, dtype=np.float64, count=n) >= since
+        if until is not None:
+            mask &= np.frombuffer(self.doc_time, dtype=np.float64, count=n) <= until
+        candidates = np.flatnonzero(mask)
+        if session is not None:
+            candidates = np.array([d for d in candidates if self.doc_session[d] == session], dtype=np.int64)
+        if len(candidates) > limit:
+            top = np.argpartition(-scores[candidates], limit - 1)[:limit]
+            candidates = candidates[top]
+        order = np.argsort(-scores[candidates], kind="stable")
+        return [(int(d), scores[d]) for d in candidates[order]]
+
+    def _score_python(self, found, n, avg_len, limit, session, role, since, until):
+        scores = {}
+        doc_len = self.doc_len
+        for _, p in found:
+            df = len(p.docs)
+            idf = math.log(1 + (n - df + 0.5) / (df + 0.5))
+            for doc, tf in zip(p.docs, p.tfs):
+                norm = tf * (BM25_K1 + 1) / (tf + BM25_K1 * (1 - BM25_B + BM25_B * doc_len[doc] / avg_len))
+                scores[doc] = scores.get(doc, 0.0) + idf * norm
+
+        def keep(doc):
+            if role is not None and self.doc_role[doc] != role:
+                return False
+            if session is not None and self.doc_session[doc] != session:
+                return False
+            if since is not None and self.doc_time[doc] < since:
+                return False
+            if until is not None and self.doc_time[doc] > until:
+                return False
+            return True
+
+        candidates = scores.items()
+        if role is not None or session is not None or since is not None or until is not None:
+            candidates = [(d, s) for d, s in candidates if keep(d)]
+        return heapq.nlargest(limit, candidates, key=lambda item: item[1])
+
+
+def _attach(index: HistoryIndex, store):
+    # subscribe first so nothing appended during the initial build is missed;
+    # the (session, seq) guard drops the overlap
+    store.add_listener(lambda session, records: [index.add(session, r["seq"], r) for r in records])
+    store.add_delete_listener(index.remove_session)
+
+    def build():
+        started = time.perf_counter()
+        for session, seq, message in store.iter_all():
+            index.add(session, seq, message)
+        index.ready.set()
+        print(f"[HistorySearch] indexed {len(index)} messages in {time.perf_counter() - started:.2f}s")
+
+    threading.Thread(target=build, daemon=True, name="history-index").start()
+
+
+_shared = None
+_shared_lock = threading.Lock()
+
+
+def shared_index() -> HistoryIndex:
+    """Index over shared_store(), built on first use."""
+    global _shared
+    with _shared_lock:
+        if _shared is None:
+            _shared = HistoryIndex()
+            _attach(_shared, shared_store())
+        return _shared
+
+
+def search_history(query: str, limit: int = 20, **filters) -> list:
+    """Search the shared index and attach each hit's message text."""
+    index = shared_index()
+    index.ready.wait(timeout=5)
+    store = shared_store()
+    hits = index.search(query, limit=limit, **filters)
+    for hit in hits:
+        rows = store.slice(hit["session"], hit["seq"], hit["seq"] + 1)
+        hit["content"] = rows[0]["content"] if rows else ""
+    return hits
@@ -1,30 +1,139 @@
-import requests
 from PIL import Image
-from io import BytesIO
 import os
-from time import sleep
+import time
+import json
+import asyncio
+import threading
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from Clients import PROVIDERS, async_http_client, session, request_timeout
+from RateLimit import acquire, acquire_async, penalize, retry_after
+from ImageStore import shared_store
 
 # 🔑 Replace with your valid Hugging Face API token
 HUGGINGFACE_API_KEY = "HUGGINGFACE_API_KEY"
-API_URL = "https://api-inference.huggingface.co/models/stabilityai/stable-diffusion-xl-base-1.0"
+HF_BASE_URL = PROVIDERS["huggingface"]["base_url"]
+IMAGE_MODEL = "stabilityai/stable-diffusion-xl-base-1.0"
+API_URL = f"{HF_BASE_URL}/models/{IMAGE_MODEL}"
 HEADERS = {"Authorization": f"Bearer {HUGGINGFACE_API_KEY}"}
+IMAGE_CONCURRENCY = 4  # images generated at once for one prompt
+RATE_LIMIT_RETRIES = 2  # extra attempts after a 429, each after the Retry-After hold
+STREAM_CHUNK = 64 * 1024
+MODEL_LOADING_DEADLINE = 300.0  # seconds we keep waiting for a cold model before giving up
+MODEL_LOADING_MAX_WAIT = 30.0   # longest single wait between checks, whatever estimated_time says
+WARMUP_ON_START = False         # app: ping the model in the background once the window is up
 
 os.makedirs("Data", exist_ok=True)
 
+# ---------------- cold-model handling ----------------
+# A cold model answers 503 {"error": "... is currently loading", "estimated_time": 42.0}.
+# The wait is shared, so concurrent image jobs sleep until the same moment
+# instead of each polling the endpoint.
+_loading_lock = threading.Lock()
+_loading_until = 0.0
+
+def _loading_wait(response, body: bytes, give_up_at: float):
+    """Seconds to wait before retrying a 'model is loading' 503, or None to stop retrying."""
+    global _loading_until
+    if response.status_code != 503:
+        return None
+    try:
+        estimated = float(json.loads(body or b"{}").get("estimated_time"))
+    except (ValueError, TypeError, AttributeError):
+        return None
+    now = time.monotonic()
+    if now >= give_up_at:
+        return None
+    wait = min(max(estimated, 1.0), MODEL_LOADING_MAX_WAIT, give_up_at - now)
+    with _loading_lock:
+        _loading_until = max(_loading_until, now + wait)
+        wait = _loading_until - now
+    print(f"⏳ {IMAGE_MODEL} is loading (about {estimated:.0f}s); retrying in {wait:.0f}s")
+    return wait
+
+def _until_loaded() -> float:
+    with _loading_lock:
+        return max(0.0, _loading_until - time.monotonic())
+
+def _post(payload: dict):
+    """POST to the model through the shared session; waits out 429 holds and cold starts. Returns a streaming response."""
+    give_up_at = time.monotonic() + MODEL_LOADING_DEADLINE
+    throttled = 0
+    while True:
+        time.sleep(_until_loaded())
+        acquire("huggingface", "image")
+        response = session("huggingface").post(API_URL, headers=HEADERS, json=payload,
+                                               timeout=request_timeout("huggingface"), stream=True)
+        if response.status_code == 429 and throttled < RATE_LIMIT_RETRIES:
+            throttled += 1
+            penalize("huggingface", retry_after(response), "image")
+            response.close()
+            continue
+        if response.status_code == 503 and _loading_wait(response, response.content, give_up_at) is not None:
+            response.close()
+            continue
+        return response
+
+async def _post_async(payload: dict):
+    """Async twin of _post() on the shared httpx pool."""
+    client = async_http_client("huggingface")
+    give_up_at = time.monotonic() + MODEL_LOADING_DEADLINE
+    throttled = 0
+    while True:
+        await asyncio.sleep(_until_loaded())
+        await acquire_async("huggingface", "image")
+        response = await client.send(client.build_request("POST", API_URL, headers=HEADERS, json=payload),
+                                     stream=True)
+        if response.status_code == 429 and throttled < RATE_LIMIT_RETRIES:
+            throttled += 1
+            penalize("huggingface", retry_after(response), "image")
+            await response.aclose()
+            continue
+        if response.status_code == 503 and _loading_wait(response, await response.aread(), give_up_at) is not None:
+            await response.aclose()
+            continue
+        return response
+
+def warm_up(background: bool = True):
+    """
+    Open the keep-alive connection and, if the model is cold, start it loading
+    with a one-step request so the first real image doesn't pay for it.
+    """
+    def run():
+        started = time.perf_counter()
+        try:
+            acquire("huggingface", "image")
+            with session("huggingface").post(API_URL, headers=HEADERS, timeout=request_timeout("huggingface"),
+                                             json={"inputs": "warm up", "parameters": {"num_inference_steps": 1}},
+                                             stream=True) as response:
+                if response.status_code == 503:
+                    _loading_wait(response, response.content, time.monotonic() + MODEL_LOADING_DEADLINE)
+            print(f"[ImageGenerate] warm-up: {response.status_code} in {time.perf_counter() - started:.2f}s")
+        except Exception as e:
+            print(f"[ImageGenerate] warm-up failed: {e}")
+
+    if background:
+        threading.Thread(target=run, daemon=True, name="image-warmup").start()
+    else:
+        run()
+
+def _params(index: int) -> dict:
+    # the request sent is the same for every index; each index is its own stored image
+    return {"variant": index}
+
 def generate_image(prompt: str, index: int = 1):
     payload = {"inputs": prompt}
+    cached = shared_store().get(IMAGE_MODEL, prompt, _params(index))
+    if cached:
+        return cached
 
     print(f"🎨 Generating image {index}...")
 
     try:
-        response = requests.post(API_URL, headers=HEADERS, json=payload, timeout=60)
-
-        if response.status_code == 200:
-            image = Image.open(BytesIO(response.content))
-            filename = f"Data/{prompt.replace(' ', '_')}_{index}.png"
-            image.save(filename)
-            return filename
-        else:
+        response = _post(payload)
+
+        with response:
+            if response.status_code == 200:
+                return _save_image(response.iter_content(STREAM_CHUNK), prompt, index)
             print(f"❌ Error {response.status_code}: {response.text}")
             return None
 
@@ -32,6 +141,136 @@ def generate_image(prompt: str, index: int = 1):
         print("❌ Exception while generating image:", e)
         return None
 
+def _save_image(chunks, prompt: str, index: int):
+    """Write the response body to the store as it arrives; the format is checked from its first bytes."""
+    writer = shared_store().writer(IMAGE_MODEL, prompt, _params(index))
+    try:
+        for chunk in chunks:
+            writer.write(chunk)
+        return writer.commit()
+    except BaseException:
+        writer.abort()
+        raise
+
+async def generate_image_async(prompt: str, index: int = 1):
+    """Async variant for the shared event loop; the body is streamed to disk chunk by chunk."""
+    payload = {"inputs": prompt}
+    cached = shared_store().get(IMAGE_MODEL, prompt, _params(index))
+    if cached:
+        return cached
+
+    print(f"🎨 Generating image {index}...")
+
+    try:
+        response = await _post_async(payload)
+
+        try:
+            if response.status_code == 200:
+                writer = shared_store().writer(IMAGE_MODEL, prompt, _params(index))
+                try:
+                    async for chunk in response.aiter_bytes(STREAM_CHUNK):
+                        writer.write(chunk)
+                    return writer.commit()
+                except BaseException:
+                    writer.abort()
+                    raise
+            await response.aread()
+            print(f"❌ Error {response.status_code}: {response.text}")
+            return None
+        finally:
+            await response.aclose()
+
+    except Exception as e:
+        print("❌ Exception while generating image:", e)
+        return None
+
+# ---------------- parallel generation ----------------
+_stats_lock = threading.Lock()
+_stats = {"batches": 0, "images": 0, "failed": 0, "cancelled": 0, "busy_s": 0.0, "image_s": 0.0}
+
+def _record(images=0, failed=0, cancelled=0, busy_s=0.0, image_s=0.0):
+    with _stats_lock:
+        _stats["batches"] += 1
+        _stats["images"] += images
+        _stats["failed"] += failed
+        _stats["cancelled"] += cancelled
+        _stats["busy_s"] += busy_s
+        _stats["image_s"] += image_s
+
+def stats():
+    """Totals plus images per minute of batch wall time and the speedup over one-at-a-time."""
+    with _stats_lock:
+        out = dict(_stats, busy_s=round(_stats["busy_s"], 3), image_s=round(_stats["image_s"], 3))
+    if out["busy_s"]:
+        out["images_per_min"] = round(out["images"] / out["busy_s"] * 60, 2)
+        out["parallel_speedup"] = round(out["image_s"] / out["busy_s"], 2)
+    return out
+
+def _timed(fn, prompt, index):
+    started = time.perf_counter()
+    path = fn(prompt, index)
+    return index, path, time.perf_counter() - started
+
+def generate_images(prompt: str, count: int = 1, concurrency: int = IMAGE_CONCURRENCY, on_result=None,
+                    cancel_event=None):
+    """
+    Generate `count` images with at most `concurrency` requests in flight.
+    on_result(index, path, seconds) is called as each image completes; returns
+    the paths in index order (None for failures and cancelled jobs).
+    """
+    started = time.perf_counter()
+    paths = [None] * count
+    done, image_s = 0, 0.0
+    with ThreadPoolExecutor(max_workers=max(1, min(concurrency, count)), thread_name_prefix="image") as pool:
+        futures = [pool.submit(_timed, generate_image, prompt, i + 1) for i in range(count)]
+        for future in as_completed(futures):
+            index, path, seconds = future.result()
+            paths[index - 1] = path
+            image_s += seconds
+            done += 1
+            if on_result is not None:
+                on_result(index, path, seconds)
+            if cancel_event is not None and cancel_event.is_set():
+                for f in futures:
+                    f.cancel()
+                break
+    ok = sum(1 for p in paths if p)
+    _record(images=ok, failed=done - ok, cancelled=count - done,
+            busy_s=time.perf_counter() - started, image_s=image_s)
+    return paths
+
+async def generate_images_async(prompt: str, count: int = 1, concurrency: int = IMAGE_CONCURRENCY):
+    """
+    Async generator over (index, path, seconds) in completion order, at most
+    `concurrency` requests in flight. Cancelling the consuming task (or closing
+    the generator) cancels the requests still outstanding.
+    """
+    started = time.perf_counter()
+    semaphore = asyncio.Semaphore(max(1, concurrency))
+
+    async def one(index):
+        async with semaphore:
+            t0 = time.perf_counter()
+            return index, await generate_image_async(prompt, index), time.perf_counter() - t0
+
+    tasks = [asyncio.ensure_future(one(i + 1)) for i in range(count)]
+    ok = failed = 0
+    image_s = 0.0
+    try:
+        for next_done in asyncio.as_completed(tasks):
+            index, path, seconds = await next_done
+            image_s += seconds
+            if path:
+                ok += 1
+            else:
+                failed += 1
+            yield index, path, seconds
+    finally:
+        for task in tasks:
+            task.cancel()
+        _record(images=ok, failed=failed, cancelled=count - ok - failed,
+                busy_s=time.perf_counter() - started, image_s=image_s)
+
 def main():
     prompt = input("Enter your prompt for generating the image:\n> ").strip()
 
@@ -40,13 +279,8 @@ def main():
         return
 
     print("\n🚀 Generating images...")
-    image_paths = []
-
-    for i in range(1):  # You can change this number if needed
-        img_path = generate_image(f"{prompt}, ultra realistic, 8k", i + 1)
-        if img_path:
-            image_paths.append(img_path)
-        sleep(3)  # Add delay to avoid rate-limiting
+    count = 1  # You can change this number if needed
+    image_paths = [p for p in generate_images(f"{prompt}, ultra realistic, 8k", count) if p]
 
     if image_paths:
         print(f"\n✅ Generated {len(image_paths)} image(s):")
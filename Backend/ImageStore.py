@@ -0,0 +1,209 @@
+"""
+ImageStore.py — content-addressed store for generated images.
+
+    store = shared_store()
+    path = store.get(model, prompt, {"variant": 1})          # None on a miss
+    path = store.put(model, prompt, {"variant": 1}, png_bytes)
+    writer = store.writer(model, prompt, params)            # or stream it in chunk by chunk
+    writer.write(chunk); ...; path = writer.commit()
+
+Images are keyed by a SHA-256 of (model, whitespace-normalized prompt,
+parameters) and live at Data/Images/<key[:2]>/<key>.<ext>, so names never
+collide and never depend on what the prompt contains. Bytes are written as
+they arrive, exactly as the provider sent them; the extension comes from the
+file signature in the first bytes and nothing is decoded. A SQLite index next
+to them records the request, size, hit count and last access; when the files
+exceed the disk quota the least recently used ones are deleted.
+"""
+
+import os
+import json
+import time
+import sqlite3
+import hashlib
+import threading
+
+IMAGE_STORE_DIR = "Data/Images"
+IMAGE_STORE_QUOTA = 512 * 1024 * 1024   # bytes of images kept on disk
+SNIFF_BYTES = 12
+
+
+def sniff_image(header: bytes):
+    """File extension for an image signature (PNG, JPEG, GIF, WebP), or None."""
+    if header.startswith(b"\x89PNG\r\n\x1a\n"):
+        return ".png"
+    if header.startswith(b"\xff\xd8\xff"):
+        return ".jpg"
+    if header[:6] in (b"GIF87a", b"GIF89a"):
+        return ".gif"
+    if header[:4] == b"RIFF" and header[8:12] == b"WEBP":
+        return ".webp"
+    return None
+
+
+def image_key(model: str, prompt: str, params: dict = None) -> str:
+    request = {"model": model, "prompt": " ".join((prompt or "").split()), "params": params or {}}
+    return hashlib.sha256(json.dumps(request, sort_keys=True).encode("utf-8")).hexdigest()
+
+
+class ImageStore:
+    def __init__(self, root: str = IMAGE_STORE_DIR, quota_bytes: int = IMAGE_STORE_QUOTA):
+        self.root = root
+        self.quota_bytes = quota_bytes
+        os.makedirs(root, exist_ok=True)
+        self.lock = threading.Lock()
+        self.counters = {"hits": 0, "misses": 0, "stored": 0, "evictions": 0, "missing_files": 0}
+        self.db = sqlite3.connect(os.path.join(root, "index.db"), check_same_thread=False)
+        self.db.execute(
+            "CREATE TABLE IF NOT EXISTS images ("
+            " key TEXT PRIMARY KEY, path TEXT, model TEXT, prompt TEXT, params TEXT,"
+            " bytes INTEGER, created REAL, used REAL, hits INTEGER DEFAULT 0)"
+        )
+        self.db.execute("CREATE INDEX IF NOT EXISTS images_used ON images(used)")
+        self.db.commit()
+        self.total_bytes = self.db.execute("SELECT COALESCE(SUM(bytes), 0) FROM images").fetchone()[0]
+
+    def path_for(self, key: str, ext: str = ".png") -> str:
+        return os.path.join(self.root, key[:2], key + ext)
+
+    def get(self, model: str, prompt: str, params: dict = None):
+        """Path of the stored image for this request, or None."""
+        key = image_key(model, prompt, params)
+        with self.lock:
+            row = self.db.execute("SELECT path, bytes FROM images WHERE key = ?", (key,)).fetchone()
+            if row is not None and not os.path.exists(row[0]):
+                self._forget(key, row[1])  # deleted behind our back
+                self.counters["missing_files"] += 1
+                row = None
+            if row is None:
+                self.counters["misses"] += 1
+                return None
+            self.db.execute("UPDATE images SET used = ?, hits = hits + 1 WHERE key = ?", (time.time(), key))
+            self.db.commit()
+            self.counters["hits"] += 1
+            return row[0]
+
+    def writer(self, model: str, prompt: str, params: dict = None) -> "ImageWriter":
+        return ImageWriter(self, model, prompt, params)
+
+    def put(self, model: str, prompt: str, params: dict, content: bytes) -> str:
+        """Store image bytes for this request and return their path."""
+        writer = self.writer(model, prompt, params)
+        try:
+            writer.write(content)
+            return writer.commit()
+        except BaseException:
+            writer.abort()
+            raise
+
+    def record(self, key: str, path: str, model: str, prompt: str, params: dict = None):
+        """Index a file already written at `path` and enforce the quota."""
+        size = os.path.getsize(path)
+        now = time.time()
+        with self.lock:
+            old = self.db.execute("SELECT bytes, path FROM images WHERE key = ?", (key,)).fetchone()
+            if old and old[1] != path:
+                try:
+                    os.remove(old[1])  # same request, new format
+                except OSError:
+                    pass
+            self.db.execute(
+                "INSERT OR REPLACE INTO images (key, path, model, prompt, params, bytes, created, used, hits)"
+                " VALUES (?, ?, ?, ?, ?, ?, ?, ?, 0)",
+                (key, path, model, prompt, json.dumps(params or {}, sort_keys=True), size, now, now),
+            )
+            self.total_bytes += size - (old[0] if old else 0)
+            self.counters["stored"] += 1
+            self._evict(keep=key)
+            self.db.commit()
+
+    def _forget(self, key: str, size: int):
+        self.db.execute("DELETE FROM images WHERE key = ?", (key,))
+        self.db.commit()
+        self.total_bytes -= size or 0
+
+    def _evict(self, keep: str):
+        """Called with the lock held: delete least recently used images until under quota."""
+        if self.total_bytes <= self.quota_bytes:
+            return
+        for key, path, size in self.db.execute("SELECT key, path, bytes FROM images ORDER BY used").fetchall():
+            if self.total_bytes <= self.quota_bytes:
+                break
+            if key == keep:
+                continue
+            try:
+                os.remove(path)
+            except OSError:
+                pass
+            self.db.execute("DELETE FROM images WHERE key = ?", (key,))
+            self.total_bytes -= size
+            self.counters["evictions"] += 1
+
+    def stats(self) -> dict:
+        with self.lock:
+            lookups = self.counters["hits"] + self.counters["misses"]
+            count = self.db.execute("SELECT COUNT(*) FROM images").fetchone()[0]
+            return dict(self.counters, images=count, bytes=self.total_bytes, quota_bytes=self.quota_bytes,
+                        hit_rate=round(self.counters["hits"] / lookups, 3) if lookups else 0.0)
+
+
+class ImageWriter:
+    """Streams one image into the store: write() chunks, then commit() for its path (or abort())."""
+
+    def __init__(self, store: ImageStore, model: str, prompt: str, params: dict = None):
+        self.store = store
+        self.request = (model, prompt, params)
+        self.key = image_key(model, prompt, params)
+        self.tmp = os.path.join(store.root, f"{self.key}.{os.getpid()}.{id(self)}.part")
+        self.file = open(self.tmp, "wb")
+        self.header = b""
+        self.ext = None
+        self.bytes = 0
+
+    def write(self, chunk: bytes):
+        if self.ext is None and len(self.header) < SNIFF_BYTES:
+            self.header += chunk[:SNIFF_BYTES - len(self.header)]
+            if len(self.header) >= SNIFF_BYTES:
+                self._check_header()
+        self.file.write(chunk)
+        self.bytes += len(chunk)
+
+    def _check_header(self):
+        self.ext = sniff_image(self.header)
+        if self.ext is None:
+            raise ValueError(f"response is not an image (starts with {self.header[:SNIFF_BYTES]!r})")
+
+    def commit(self) -> str:
+        self.file.close()
+        if self.ext is None:
+            self._check_header()
+        path = self.store.path_for(self.key, self.ext)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        os.replace(self.tmp, path)
+        self.store.record(self.key, path, *self.request)
+        return path
+
+    def abort(self):
+        self.file.close()
+        try:
+            os.remove(self.tmp)
+        except OSError:
+            pass
+
+
+_shared = None
+_shared_lock = threading.Lock()
+
+
+def shared_store() -> ImageStore:
+    """Process-wide store used by ImageGenerate."""
+    global _shared
+    with _shared_lock:
+        if _shared is None:
+            _shared = ImageStore()
+        return _shared
+
+
+def stats():
+    """Stats of the shared store, or None if nothing has used it yet."""
+    return _shared.stats() if _shared is not None else None
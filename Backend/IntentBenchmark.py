@@ -0,0 +1,281 @@
+"""
+IntentBenchmark.py — offline accuracy / latency benchmark for the intent classifiers.
+
+    python IntentBenchmark.py                       # all backends against a local FakeProviders server
+    python IntentBenchmark.py --backends rules,tiered --workers 8 --noise 0.1 --json report.json
+
+Every utterance in CORPUS is classified by each backend through the batch API
+with bounded concurrency. For each backend the report gives throughput,
+p50/p95/p99 latency, accuracy on the first command, exact match on the full
+command sequence and a confusion matrix over the first command's label.
+
+Cohere is replaced by FakeProviders with a responder that answers with the
+corpus label (optionally corrupted for a --noise share of prompts), so the
+numbers measure our own pipeline rather than the model.
+
+Backends:
+    rules          IntentClassifier.RuleTier only (unresolved prompts count as "unresolved")
+    dmm            Model.FirstLayerDMM, uncached
+    tiered         rules -> naive Bayes -> FirstLayerDMM, fresh and unlogged
+    keywords       app.simple_keyword_intent (app-level labels)
+    detect_intent  NioApp._detect_intent over FirstLayerDMM (app-level labels)
+"""
+
+import json
+import time
+import random
+import argparse
+import threading
+from collections import Counter, defaultdict
+
+from IntentClassifier import FuncTrie, RuleTier, TieredClassifier, classify_batch
+
+FUNCS = [
+    "exit", "general", "realtime", "open", "close",
+    "play", "generate image", "system", "content",
+    "google search", "youtube search", "reminder"
+]
+
+# (utterance, expected FirstLayerDMM commands)
+CORPUS = [
+    ("bye nio", ["exit"]),
+    ("goodbye, talk to you later", ["exit"]),
+    ("that's all for today, bye", ["exit"]),
+    ("exit", ["exit"]),
+    ("hi", ["general hi"]),
+    ("how are you?", ["general how are you?"]),
+    ("what is python programming language?", ["general what is python programming language?"]),
+    ("can you help me with this math problem?", ["general can you help me with this math problem?"]),
+    ("who was akbar?", ["general who was akbar?"]),
+    ("thanks, i really liked it", ["general thanks, i really liked it"]),
+    ("what's the time?", ["general what's the time?"]),
+    ("who is the indian prime minister", ["realtime who is the indian prime minister"]),
+    ("what is today's news?", ["realtime what is today's news?"]),
+    ("tell me about facebook's recent update", ["realtime tell me about facebook's recent update"]),
+    ("who is akshay kumar", ["realtime who is akshay kumar"]),
+    ("what is the bitcoin price right now", ["realtime what is the bitcoin price right now"]),
+    ("open chrome", ["open chrome"]),
+    ("open notepad", ["open notepad"]),
+    ("launch spotify", ["open spotify"]),
+    ("open telegram please", ["open telegram"]),
+    ("close notepad", ["close notepad"]),
+    ("close whatsapp", ["close whatsapp"]),
+    ("please close the calculator", ["close calculator"]),
+    ("play let her go", ["play let her go"]),
+    ("play afsanay by ys", ["play afsanay by ys"]),
+    ("play some lofi music", ["play some lofi music"]),
+    ("generate image of a lion", ["generate image of a lion"]),
+    ("create an image of a cat on the moon", ["generate image a cat on the moon"]),
+    ("draw a futuristic city at night", ["generate image a futuristic city at night"]),
+    ("mute", ["system mute"]),
+    ("volume up", ["system volume up"]),
+    ("turn the volume down", ["system volume down"]),
+    ("unmute the sound", ["system unmute"]),
+    ("write an application for sick leave", ["content application for sick leave"]),
+    ("write an email to my manager about the deadline", ["content email to my manager about the deadline"]),
+    ("write a python script that renames files", ["content python script that renames files"]),
+    ("google search python decorators", ["google search python decorators"]),
+    ("search google for best laptops 2024", ["google search best laptops 2024"]),
+    ("look up machine learning on google", ["google search machine learning"]),
+    ("youtube search lofi beats", ["youtube search lofi beats"]),
+    ("search youtube for cooking tutorials", ["youtube search cooking tutorials"]),
+    ("find guitar lessons on youtube", ["youtube search guitar lessons"]),
+    ("remind me at 9pm to call mom", ["reminder 9:00pm call mom"]),
+    ("set a reminder at 9:00pm on 25th june for my business meeting",
+     ["reminder 9:00pm 25th june business meeting"]),
+    ("remind me tomorrow at 7am to go running", ["reminder 7:00am tomorrow go running"]),
+    # trigger verbs used as plain English: must not be taken for commands
+    ("open source software advantages?", ["general open source software advantages?"]),
+    ("open source software advantages", ["general open source software advantages"]),
+    ("draw conclusions from this data", ["general draw conclusions from this data"]),
+    ("play a role in a school drama", ["general play a role in a school drama"]),
+    ("close to the end of the semester, what should i revise",
+     ["general close to the end of the semester, what should i revise"]),
+    ("write off a bad debt in accounting", ["general write off a bad debt in accounting"]),
+    # multi-command utterances
+    ("open chrome and firefox", ["open chrome", "open firefox"]),
+    ("open chrome and tell me about mahatma gandhi", ["open chrome", "general tell me about mahatma gandhi"]),
+    ("open facebook, telegram and close whatsapp", ["open facebook", "open telegram", "close whatsapp"]),
+    ("close notepad and open calculator", ["close notepad", "open calculator"]),
+    ("mute and open spotify", ["system mute", "open spotify"]),
+    ("play despacito and generate image of a sunset", ["play despacito", "generate image of a sunset"]),
+    ("google search rust tutorials and youtube search rust talks",
+     ["google search rust tutorials", "youtube search rust talks"]),
+    ("what is today's date and remind me about the dance performance on 5th aug at 11pm",
+     ["general what is today's date", "reminder 11:00pm 5th aug dance performance"]),
+    ("write a poem about rain and open notepad", ["content poem about rain", "open notepad"]),
+    ("volume down and close youtube", ["system volume down", "close youtube"]),
+]
+
+# how app._detect_intent maps the first command onto the GUI's intents
+APP_INTENT = {
+    "generate image": "image", "general": "chat", "realtime": "search",
+    "open": "automation", "close": "automation", "play": "automation", "content": "automation",
+}
+
+_trie = FuncTrie(FUNCS)
+
+
+def head(command: str) -> str:
+    return _trie.match((command or "").strip().lower()) or "unresolved"
+
+
+def app_label(commands: list) -> str:
+    return APP_INTENT.get(head(commands[0]), "chat") if commands else "chat"
+
+
+def percentile(values: list, q: float):
+    if not values:
+        return None
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(round(q * (len(ordered) - 1))))]
+
+
+def oracle_responder(noise: float = 0.0, seed: int = 0):
+    """FakeProviders responder that answers Cohere prompts with the corpus label."""
+    expected = {utterance: ", ".join(commands) for utterance, commands in CORPUS}
+    rng = random.Random(seed)
+    lock = threading.Lock()
+
+    def respond(provider, prompt):
+        answer = expected.get(prompt, f"general {prompt}")
+        with lock:
+            if noise and rng.random() < noise:
+                return f"general {prompt}"
+        return answer
+    return respond
+
+
+def run_backend(name: str, classify, label_of, workers: int) -> dict:
+    """Classify the whole corpus with bounded concurrency and score it."""
+    latencies = []
+    lock = threading.Lock()
+
+    def timed(prompt):
+        started = time.perf_counter()
+        try:
+            return classify(prompt)
+        finally:
+            with lock:
+                latencies.append(time.perf_counter() - started)
+
+    prompts = [u for u, _ in CORPUS]
+    started = time.perf_counter()
+    outputs = classify_batch(timed, prompts, max_workers=workers)
+    elapsed = time.perf_counter() - started
+
+    confusion = defaultdict(Counter)
+    correct = exact = 0
+    commands_out = all(isinstance(got, list) for got in outputs)
+    for (utterance, expected), got in zip(CORPUS, outputs):
+        want, have = label_of(expected), label_of(got)
+        confusion[want][have] += 1
+        correct += want == have
+        if commands_out:
+            exact += [head(c) for c in got] == [head(c) for c in expected]
+    n = len(CORPUS)
+    return {
+        "backend": name,
+        "utterances": n,
+        "seconds": round(elapsed, 3),
+        "throughput_per_s": round(n / elapsed, 1) if elapsed else None,
+        "p50_ms": round(percentile(latencies, 0.50) * 1000, 3),
+        "p95_ms": round(percentile(latencies, 0.95) * 1000, 3),
+        "p99_ms": round(percentile(latencies, 0.99) * 1000, 3),
+        "accuracy": round(correct / n, 3),
+        "exact_match": round(exact / n, 3) if commands_out else None,  # app-level backends have no commands
+        "confusion": {want: dict(row) for want, row in sorted(confusion.items())},
+    }
+
+
+def build_backends(names: list) -> dict:
+    """name -> (classify, label_of); backends whose modules can't be imported are skipped."""
+    backends = {}
+    model = app = None
+    if {"dmm", "tiered", "detect_intent"} & set(names):
+        try:
+            import Model as model
+        except Exception as e:
+            print(f"[IntentBenchmark] Model unavailable, skipping model backends: {e}")
+    if {"keywords", "detect_intent"} & set(names):
+        try:
+            import app
+        except Exception as e:
+            print(f"[IntentBenchmark] app unavailable, skipping app backends: {e}")
+
+    def first_head(commands):
+        return head(commands[0]) if commands else "unresolved"
+
+    for name in names:
+        if name == "rules":
+            rules = RuleTier()
+            backends[name] = (lambda p, r=rules: r.classify(p) or [], first_head)
+        elif name == "dmm" and model is not None:
+            backends[name] = (lambda p: model.FirstLayerDMM(p, use_cache=False), first_head)
+        elif name == "tiered" and model is not None:
+            tiered = TieredClassifier(lambda p: model.FirstLayerDMM(p, use_cache=False), log_path=None)
+            backends[name] = (tiered.classify, first_head)
+        elif name == "keywords" and app is not None:
+            backends[name] = (app.simple_keyword_intent, lambda r: r if isinstance(r, str) else app_label(r))
+        elif name == "detect_intent" and app is not None and model is not None:
+            holder = type("IntentHolder", (), {})()
+            holder.intent_model = lambda p: model.FirstLayerDMM(p, use_cache=False)
+            backends[name] = (lambda p: app.NioApp._detect_intent(holder, p),
+                              lambda r: r if isinstance(r, str) else app_label(r))
+    return backends
+
+
+def print_report(report: dict):
+    print(f"\n== {report['backend']} ==")
+    print(f"  {report['utterances']} utterances in {report['seconds']}s "
+          f"({report['throughput_per_s']}/s)  p50 {report['p50_ms']}ms  "
+          f"p95 {report['p95_ms']}ms  p99 {report['p99_ms']}ms")
+    exact = f"{report['exact_match']:.1%}" if report["exact_match"] is not None else "n/a"
+    print(f"  accuracy {report['accuracy']:.1%}  exact match {exact}")
+    labels = sorted(set(report["confusion"]) | {h for row in report["confusion"].values() for h in row})
+    width = max(len(label) for label in labels) + 2
+    print("  " + "expected \\ got".ljust(width) + "".join(label[:8].rjust(9) for label in labels))
+    for want in labels:
+        row = report["confusion"].get(want, {})
+        if row:
+            print("  " + want.ljust(width) + "".join(str(row.get(h, "")).rjust(9) for h in labels))
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark Nio's intent classifiers offline")
+    parser.add_argument("--backends", default="rules,tiered,dmm,keywords,detect_intent")
+    parser.add_argument("--workers", type=int, default=4, help="classifications in flight per backend")
+    parser.add_argument("--noise", type=float, default=0.0, help="share of fake Cohere answers forced to 'general'")
+    parser.add_argument("--latency", type=float, default=0.05, help="fake provider time to first byte")
+    parser.add_argument("--token-rate", type=float, default=200.0)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--json", help="also write the reports to this file")
+    args = parser.parse_args()
+
+    from FakeProviders import FakeConfig, start_server
+    import Clients
+    import RateLimit
+
+    config = FakeConfig(latency=args.latency, token_rate=args.token_rate, seed=args.seed,
+                        responder=oracle_responder(args.noise, args.seed))
+    server, base_url = start_server(config=config)
+    Clients.configure("cohere", base_url=base_url)
+    RateLimit.configure("cohere", rate=1000.0, burst=1000)  # the fake server has no quota to protect
+
+    reports = []
+    try:
+        for name, (classify, label_of) in build_backends(args.backends.split(",")).items():
+            classify("warm up")  # builds SDK clients / opens connections outside the measurement
+            report = run_backend(name, classify, label_of, args.workers)
+            print_report(report)
+            reports.append(report)
+    finally:
+        server.shutdown()
+    print(f"\nfake provider: {config.counters}")
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump(reports, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,575 @@
+"""
+IntentClassifier.py — tiered intent classification in front of Model.FirstLayerDMM.
+
+    classifier = TieredClassifier(fallback=FirstLayerDMM)
+    classifier.classify("open chrome and firefox")   # ['open chrome', 'open firefox'], no network
+
+Tier 1 ("rules") is a word trie of trigger phrases ("open", "generate image",
+"volume up", "bye", ...) that maps clear commands straight to FirstLayerDMM's
+output format. Tier 2 ("bayes") is a multinomial naive Bayes model over word
+unigrams/bigrams, trained from the decisions Cohere made earlier and logged to
+DECISION_LOG_PATH; it only answers whole-query labels (general, realtime, exit)
+and only when it is confident. Everything else checks the persistent decision
+cache (IntentCache) and then escalates to the fallback (Cohere), whose answer
+is cached, logged and fed back into the model.
+"""
+
+import os
+import re
+import json
+import math
+import time
+import hashlib
+import threading
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+
+from ResponseCache import ResponseCache
+
+DECISION_LOG_PATH = "Data/IntentDecisions.jsonl"
+INTENT_CACHE_PATH = "Data/IntentCache.db"
+INTENT_CACHE_TTL = 30 * 24 * 3600
+NB_THRESHOLD = 0.95          # minimum posterior for a bayes answer
+NB_MIN_SAMPLES = 40          # logged decisions needed before the bayes tier answers at all
+NB_MIN_CLASS_SAMPLES = 8
+NB_MIN_COVERAGE = 0.6        # share of the query's features the model has seen before
+NB_LABELS = ("general", "realtime", "exit")
+TIERS = ("rules", "bayes", "cache", "cohere")
+
+_WORD_RE = re.compile(r"[a-z0-9']+")
+_SPLIT_RE = re.compile(r"\s*(?:,|;|\band then\b|\bthen\b)\s*")
+_AND_RE = re.compile(r"\s+and\s+")
+
+# trigger phrase -> (func, keep_phrase). keep_phrase keeps the trigger in the
+# argument, e.g. "volume up" -> "system volume up".
+TRIGGERS = {
+    "open": ("open", False),
+    "launch": ("open", False),
+    "close": ("close", False),
+    "play": ("play", False),
+    "generate image": ("generate image", False),
+    "generate an image of": ("generate image", False),
+    "generate image of": ("generate image", False),
+    "create an image of": ("generate image", False),
+    "create image of": ("generate image", False),
+    "make an image of": ("generate image", False),
+    "draw": ("generate image", False),
+    "google search": ("google search", False),
+    "search google for": ("google search", False),
+    "youtube search": ("youtube search", False),
+    "search youtube for": ("youtube search", False),
+    "remind me": ("reminder", False),
+    "set a reminder": ("reminder", False),
+    "write": ("content", False),
+    "draft": ("content", False),
+    "mute": ("system", True),
+    "unmute": ("system", True),
+    "volume up": ("system", True),
+    "volume down": ("system", True),
+    "increase volume": ("system", True),
+    "decrease volume": ("system", True),
+}
+# whole utterances that need no argument
+EXACT = {
+    "bye": "exit", "goodbye": "exit", "bye nio": "exit", "goodbye nio": "exit", "exit": "exit", "quit": "exit",
+    "hi": "general", "hello": "general", "hey": "general", "thanks": "general", "thank you": "general",
+    "how are you": "general", "good morning": "general", "good night": "general",
+}
+# bare follow-ups inherit these verbs: "open chrome and firefox"
+INHERITABLE = ("open", "close")
+# funcs whose argument is a short name, so "and <free text>" cannot belong to it
+SHORT_ARGUMENT = ("open", "close", "system")
+_COPULAS = frozenset(("is", "are", "was", "were", "am", "be", "been"))
+_QUESTION_START = ("what", "who", "why", "how", "when", "where", "which", "is", "are", "can", "could",
+                   "should", "would", "do", "does", "did", "tell")
+_QUESTION_WORDS = frozenset(("what", "who", "whom", "whose", "why", "how", "when", "where", "which"))
+# one-word triggers that are also ordinary English verbs only count as a command
+# in command shape: verb + object, no question word anywhere. Verbs listed in
+# _OBJECT_START need their object to open with one of those words ("draw a
+# city", "write an email"), and no verb may be followed, directly or after a
+# determiner, by a word in _NOT_AN_OBJECT that turns it into a phrase ("open
+# source", "draw conclusions", "play a role").
+_DETERMINERS = frozenset(("a", "an", "the", "me", "my", "some", "this", "that", "another"))
+_OBJECT_START = {"draw": _DETERMINERS, "write": _DETERMINERS, "draft": _DETERMINERS}
+_NOT_AN_OBJECT = {
+    "open": frozenset(("source", "ended", "minded", "question", "questions", "secret", "mind", "up",
+                       "to", "for", "about", "with", "in", "on", "of", "into")),
+    "launch": frozenset(("date", "event", "party", "into", "of")),
+    "close": frozenset(("to", "by", "enough", "call", "deal", "friend", "friends", "relative", "relatives",
+                        "range", "up", "in", "on")),
+    "play": frozenset(("role", "part", "along", "around", "with", "by", "fair", "down", "out", "on", "dead",
+                       "safe", "it")),
+    "draw": frozenset(("conclusion", "conclusions", "attention", "comparison", "comparisons", "parallel",
+                       "parallels", "inspiration", "line", "breath", "blank", "lesson", "lessons")),
+    "write": frozenset(("off", "back")),
+}
+
+
+def words(text: str) -> list:
+    return _WORD_RE.findall((text or "").lower())
+
+
+class _TrieNode:
+    __slots__ = ("children", "value")
+
+    def __init__(self):
+        self.children = {}
+        self.value = None
+
+
+class FuncTrie:
+    """Character trie over FirstLayerDMM's funcs; finds which func a command fragment starts with."""
+
+    def __init__(self, funcs):
+        self.root = _TrieNode()
+        for func in funcs:
+            node = self.root
+            for ch in func:
+                node = node.children.setdefault(ch, _TrieNode())
+            node.value = func
+
+    def match(self, fragment: str):
+        """Longest func that fragment starts with, or None."""
+        node, best = self.root, None
+        for ch in fragment:
+            node = node.children.get(ch)
+            if node is None:
+                break
+            if node.value is not None:
+                best = node.value
+        return best
+
+
+class CommandSplitter:
+    """
+    Incremental version of FirstLayerDMM's post-processing: feed it streamed
+    text and it returns each comma-terminated command as soon as it is complete,
+    dropping fragments that don't start with one of the funcs.
+    """
+
+    def __init__(self, funcs):
+        self.trie = FuncTrie(funcs)
+        self.buffer = ""
+
+    def _accept(self, fragments) -> list:
+        out = []
+        for fragment in fragments:
+            fragment = fragment.strip()
+            if fragment and self.trie.match(fragment) is not None:
+                out.append(fragment)
+        return out
+
+    def feed(self, text: str) -> list:
+        self.buffer += text.replace("\n", "")
+        if "," not in self.buffer:
+            return []
+        *done, self.buffer = self.buffer.split(",")
+        return self._accept(done)
+
+    def close(self) -> list:
+        tail, self.buffer = self.buffer, ""
+        return self._accept([tail])
+
+
+class RuleTier:
+    """Trigger-phrase trie; returns a command list only when every clause matches."""
+
+    def __init__(self, triggers: dict = TRIGGERS, exact: dict = EXACT):
+        self.root = _TrieNode()
+        for phrase, value in triggers.items():
+            node = self.root
+            for w in phrase.split():
+                node = node.children.setdefault(w, _TrieNode())
+            node.value = value
+        self.exact = exact
+
+    def _match(self, tokens: list):
+        """Longest trigger at the start of tokens -> (func, keep_phrase, length) or None."""
+        node, best = self.root, None
+        for i, w in enumerate(tokens):
+            node = node.children.get(w)
+            if node is None:
+                break
+            if node.value is not None:
+                best = node.value + (i + 1,)
+        return best
+
+    def _clause(self, text: str, previous: str = None):
+        tokens = words(text)
+        if not tokens:
+            return None
+        joined = " ".join(tokens)
+        if joined in self.exact:
+            label = self.exact[joined]
+            return label if label == "exit" else f"{label} {text.strip()}"
+        if tokens[0] in _QUESTION_START:
+            return None
+        hit = self._match(tokens)
+        if hit is None:
+            if previous in INHERITABLE and len(tokens) <= 3:
+                return f"{previous} {joined}"
+            return None
+        func, keep, length = hit
+        rest = tokens if keep else tokens[length:]
+        if not rest or (func in SHORT_ARGUMENT and _COPULAS.intersection(rest)):
+            return None  # "open source is great" is not a command
+        if length == 1 and not keep and not self._command_shape(tokens[0], rest):
+            return None  # "draw conclusions from this data" is not a command either
+        return f"{func} {' '.join(rest)}"
+
+    @staticmethod
+    def _command_shape(verb: str, rest: list) -> bool:
+        """Whether a one-word trigger is used as an imperative on an object rather than as plain English."""
+        if _QUESTION_WORDS.intersection(rest):
+            return False
+        if verb in _OBJECT_START and (rest[0] not in _OBJECT_START[verb] or len(rest) < 2):
+            return False
+        head = rest[1:2] if rest[0] in _DETERMINERS else rest[:1]
+        return not _NOT_AN_OBJECT.get(verb, frozenset()).intersection(rest[:1] + head)
+
+    def classify(self, prompt: str):
+        text = (prompt or "").strip().rstrip(".!")
+        if not text or "?" in text:
+            return None
+        commands, previous = [], None
+        for part in _SPLIT_RE.split(text):
+            if not part:
+                continue
+            # split on "and" only where the next piece is a command of its own
+            # or a bare follow-up of open/close; "play rock and roll" stays whole
+            pieces = _AND_RE.split(part)
+            merged = [pieces[0]]
+            for piece in pieces[1:]:
+                prev_cmd = self._clause(merged[-1], previous)
+                standalone = self._match(words(piece)) is not None
+                follow_up = prev_cmd is not None and prev_cmd.split()[0] in INHERITABLE and len(words(piece)) <= 3
+                if standalone or follow_up:
+                    merged.append(piece)
+                elif prev_cmd is not None and prev_cmd.split()[0] in SHORT_ARGUMENT:
+                    return None  # "open chrome and tell me about ..." needs the model
+                else:
+                    merged[-1] = f"{merged[-1]} and {piece}"
+            for piece in merged:
+                cmd = self._clause(piece, previous)
+                if cmd is None:
+                    return None
+                commands.append(cmd)
+                previous = cmd.split()[0]
+        return commands or None
+
+
+class NaiveBayesTier:
+    """Multinomial naive Bayes over unigrams + bigrams, trainable one example at a time."""
+
+    def __init__(self, labels=NB_LABELS, alpha: float = 1.0):
+        self.labels = tuple(labels)
+        self.alpha = alpha
+        self.lock = threading.Lock()
+        self.class_docs = {label: 0 for label in self.labels}
+        self.class_terms = {label: 0 for label in self.labels}
+        self.counts = {label: {} for label in self.labels}
+        self.vocab = set()
+
+    @staticmethod
+    def features(text: str) -> list:
+        tokens = words(text)
+        return tokens + [f"{a}_{b}" for a, b in zip(tokens, tokens[1:])]
+
+    @property
+    def samples(self) -> int:
+        return sum(self.class_docs.values())
+
+    def learn(self, text: str, label: str):
+        if label not in self.class_docs:
+            return
+        feats = self.features(text)
+        with self.lock:
+            self.class_docs[label] += 1
+            self.class_terms[label] += len(feats)
+            counts = self.counts[label]
+            for f in feats:
+                counts[f] = counts.get(f, 0) + 1
+                self.vocab.add(f)
+
+    def predict(self, text: str):
+        """(label, posterior, coverage) or None when there is nothing to go on."""
+        feats = self.features(text)
+        with self.lock:
+            total = self.samples
+            if not feats or not total:
+                return None
+            coverage = sum(1 for f in feats if f in self.vocab) / len(feats)
+            v = len(self.vocab) or 1
+            logp = {}
+            for label in self.labels:
+                docs = self.class_docs[label]
+                if not docs:
+                    continue
+                denom = math.log(self.class_terms[label] + self.alpha * v)
+                counts = self.counts[label]
+                score = math.log(docs / total)
+                for f in feats:
+                    score += math.log(counts.get(f, 0) + self.alpha) - denom
+                logp[label] = score
+        if not logp:
+            return None
+        top = max(logp.values())
+        norm = sum(math.exp(s - top) for s in logp.values())
+        label = max(logp, key=logp.get)
+        return label, 1.0 / norm, coverage
+
+    def classify(self, prompt: str):
+        if self.samples < NB_MIN_SAMPLES:
+            return None
+        guess = self.predict(prompt)
+        if guess is None:
+            return None
+        label, posterior, coverage = guess
+        if posterior < NB_THRESHOLD or coverage < NB_MIN_COVERAGE or self.class_docs[label] < NB_MIN_CLASS_SAMPLES:
+            return None
+        return ["exit"] if label == "exit" else [f"{label} {prompt.strip()}"]
+
+
+def classify_batch(classify, prompts: list, max_workers: int = 4) -> list:
+    """Run classify over prompts with at most max_workers in flight; results keep input order, failures are []."""
+    def safe(prompt):
+        try:
+            return classify(prompt) or []
+        except Exception as e:
+            print(f"[IntentClassifier] batch item failed: {e}")
+            return []
+
+    if max_workers <= 1 or len(prompts) <= 1:
+        return [safe(p) for p in prompts]
+    with ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="intent-batch") as pool:
+        return list(pool.map(safe, prompts))
+
+
+def training_label(prompt: str, commands: list):
+    """NB label for a logged decision, or None if it is not a whole-query answer."""
+    if not commands or len(commands) != 1:
+        return None
+    head = commands[0].split(" ", 1)[0].lower()
+    return head if head in NB_LABELS else None
+
+
+class TieredClassifier:
+    def __init__(self, fallback=None, log_path: str = DECISION_LOG_PATH, cache=None, stream_fallback=None):
+        self.fallback = fallback
+        self.stream_fallback = stream_fallback  # generator version of fallback, see classify_stream()
+        self.cache = cache
+        self.log_path = log_path
+        self.rules = RuleTier()
+        self.bayes = NaiveBayesTier()
+        self.lock = threading.Lock()
+        self.hits = {tier: 0 for tier in TIERS}
+        self.latency = {tier: deque(maxlen=512) for tier in TIERS}
+        self.unresolved = 0
+        if log_path:
+            self._load_log()
+
+    def _load_log(self):
+        if not os.path.exists(self.log_path):
+            return
+        with open(self.log_path, "r", encoding="utf-8") as f:
+            for line in f:
+                try:
+                    rec = json.loads(line)
+                except ValueError:
+                    continue  # torn last line
+                label = training_label(rec.get("prompt", ""), rec.get("commands"))
+                if label:
+                    self.bayes.learn(rec["prompt"], label)
+
+    def _log(self, prompt: str, commands: list):
+        if not self.log_path:
+            return
+        os.makedirs(os.path.dirname(self.log_path) or ".", exist_ok=True)
+        line = json.dumps({"prompt": prompt, "commands": commands, "ts": time.time()}, ensure_ascii=False)
+        with self.lock:
+            with open(self.log_path, "a", encoding="utf-8") as f:
+                f.write(line + "\n")
+
+    def _record(self, tier: str, started: float):
+        with self.lock:
+            self.hits[tier] += 1
+            self.latency[tier].append(time.perf_counter() - started)
+
+    def record_decision(self, prompt: str, commands: list):
+        """Log a fallback decision and learn from it."""
+        self._log(prompt, commands)
+        label = training_label(prompt, commands)
+        if label:
+            self.bayes.learn(prompt, label)
+
+    def classify_local(self, prompt: str):
+        """(tier, commands) from the local tiers, or None if the prompt needs the fallback."""
+        started = time.perf_counter()
+        for tier, model in (("rules", self.rules), ("bayes", self.bayes)):
+            commands = model.classify(prompt)
+            if commands:
+                self._record(tier, started)
+                return tier, commands
+        return None
+
+    def classify(self, prompt: str) -> list:
+        local = self.classify_local(prompt)
+        if local is not None:
+            return local[1]
+        if self.fallback is None:
+            with self.lock:
+                self.unresolved += 1
+            return []
+        started = time.perf_counter()
+        if self.cache is not None:
+            commands = self.cache.get_commands(prompt)
+            if commands is not None:
+                self._record("cache", started)
+                return commands
+        commands = self.fallback(prompt)
+        self._record("cohere", started)
+        if commands:
+            self.record_decision(prompt, commands)
+            if self.cache is not None:
+                self.cache.put_commands(prompt, commands)
+        return commands
+
+    __call__ = classify
+
+    def classify_batch(self, prompts: list, max_workers: int = 4) -> list:
+        """Classify many prompts; local hits are answered inline and only the rest use the worker pool."""
+        results = [None] * len(prompts)
+        pending = []
+        for i, prompt in enumerate(prompts):
+            local = self.classify_local(prompt)
+            if local is not None:
+                results[i] = local[1]
+            else:
+                pending.append(i)
+        remote = classify_batch(self.classify, [prompts[i] for i in pending], max_workers)
+        for i, commands in zip(pending, remote):
+            results[i] = commands
+        return results
+
+    def classify_stream(self, prompt: str):
+        """Like classify() but yields commands one by one, as the streaming fallback completes them."""
+        if self.stream_fallback is None:
+            yield from self.classify(prompt)
+            return
+        local = self.classify_local(prompt)
+        if local is not None:
+            yield from local[1]
+            return
+        started = time.perf_counter()
+        if self.cache is not None:
+            commands = self.cache.get_commands(prompt)
+            if commands is not None:
+                self._record("cache", started)
+                yield from commands
+                return
+        commands = []
+        for command in self.stream_fallback(prompt):
+            commands.append(command)
+            yield command
+        self._record("cohere", started)
+        if commands:
+            self.record_decision(prompt, commands)
+            if self.cache is not None:
+                self.cache.put_commands(prompt, commands)
+
+    def stats(self) -> dict:
+        with self.lock:
+            total = sum(self.hits.values()) + self.unresolved
+            out = {"total": total, "unresolved": self.unresolved, "bayes_samples": self.bayes.samples}
+            for tier in TIERS:
+                lat = sorted(self.latency[tier])
+                out[tier] = {
+                    "hits": self.hits[tier],
+                    "hit_rate": round(self.hits[tier] / total, 3) if total else 0.0,
+                    "p50_ms": round(lat[len(lat) // 2] * 1000, 3) if lat else None,
+                    "p95_ms": round(lat[min(len(lat) - 1, int(len(lat) * 0.95))] * 1000, 3) if lat else None,
+                }
+            return out
+
+
+def decision_version(*parts) -> str:
+    """Hash of everything that decides FirstLayerDMM's answer (preamble, funcs, few-shot history, model)."""
+    return hashlib.sha1(json.dumps(parts, sort_keys=True, default=str).encode("utf-8")).hexdigest()[:16]
+
+
+class IntentCache(ResponseCache):
+    """
+    Memo of FirstLayerDMM decisions keyed by normalized prompt. The SQLite tier
+    is tagged with the decision version; opening it under a different version
+    drops every stored decision, and the most recently used ones are loaded
+    into memory up front.
+    """
+
+    def __init__(self, version: str, path: str = INTENT_CACHE_PATH, **kwargs):
+        super().__init__(path, ttls={"intent": INTENT_CACHE_TTL}, **kwargs)
+        self.version = version
+        self.counters["invalidations"] = 0
+        if self.db is not None:
+            self._check_version()
+            self._preload()
+
+    def _check_version(self):
+        self.db.execute("CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value TEXT)")
+        row = self.db.execute("SELECT value FROM meta WHERE key = 'version'").fetchone()
+        if row is None or row[0] != self.version:
+            if row is not None:
+                self.db.execute("DELETE FROM responses")
+                self.counters["invalidations"] += 1
+            self.db.execute("INSERT OR REPLACE INTO meta (key, value) VALUES ('version', ?)", (self.version,))
+            self.db.commit()
+
+    def _preload(self):
+        rows = self.db.execute(
+            "SELECT key, value, expires FROM responses WHERE expires > ? ORDER BY used DESC LIMIT ?",
+            (time.time(), self.max_entries)).fetchall()
+        with self.lock:
+            for key, value, expires in reversed(rows):
+                self._remember(key, value, expires)
+
+    def get_commands(self, prompt: str):
+        value = self.get("intent", prompt, self.version)
+        return json.loads(value) if value is not None else None
+
+    def put_commands(self, prompt: str, commands: list):
+        if commands:
+            self.put("intent", prompt, json.dumps(commands), self.version)
+
+
+_cache = None
+_shared = None
+_shared_lock = threading.Lock()
+
+
+def shared_intent_cache(version: str) -> IntentCache:
+    """Process-wide decision cache; reopened if the decision version changes."""
+    global _cache
+    with _shared_lock:
+        if _cache is None or _cache.version != version:
+            _cache = IntentCache(version)
+        return _cache
+
+
+def shared_classifier(fallback=None, cache: IntentCache = None, stream_fallback=None) -> TieredClassifier:
+    """Process-wide classifier; the first caller with a fallback wires it in."""
+    global _shared
+    with _shared_lock:
+        if _shared is None:
+            _shared = TieredClassifier(fallback, cache=cache, stream_fallback=stream_fallback)
+        elif fallback is not None and _shared.fallback is None:
+            _shared.fallback = fallback
+            _shared.cache = cache
+            _shared.stream_fallback = stream_fallback
+        return _shared
+
+
+def stats() -> dict:
+    with _shared_lock:
+        out = _shared.stats() if _shared is not None else {}
+        if _cache is not None:
+            out["decision_cache"] = dict(_cache.stats(), version=_cache.version)
+        return out
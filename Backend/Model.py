@@ -1,11 +1,12 @@
-import cohere
 from rich import print
+from Clients import lazy_client
+from Resilience import call, record_failure
+from IntentClassifier import shared_classifier, shared_intent_cache, decision_version, CommandSplitter, classify_batch
 
 # Directly set your API key here
 CohereAPIKey = "CohereAPIKey"
-print(f"[DEBUG] Using CohereAPIKey: {CohereAPIKey[:6]}... (length: {len(CohereAPIKey)})")
 
-co = cohere.Client(api_key=CohereAPIKey)
+co = lazy_client("cohere", api_key=CohereAPIKey)
 
 funcs = [
     "exit", "general", "realtime", "open", "close",
@@ -50,11 +51,20 @@ ChatHistory = [
 	{"role": "Chatbot", "message": "general chat with me."}
 ]
 
-def FirstLayerDMM(prompt: str = "test"):
-	messages.append({"role": "user", "content": f"{prompt}"})
-	
-	stream = co.chat_stream(
-		model = "command-r-plus",
+INTENT_MODEL = "command-r-plus"
+
+# repeated prompts reuse the earlier decision; editing the preamble, funcs or
+# few-shot history changes the version and empties the cache
+decision_cache = shared_intent_cache(decision_version(INTENT_MODEL, preamble, funcs, ChatHistory))
+
+# the model sometimes echoes the "(query)" placeholder from the preamble instead of a command
+PLACEHOLDER = "(query)"
+PLACEHOLDER_RETRIES = 3
+
+def _stream_commands(prompt: str):
+	stream = call(
+		"cohere", co.chat_stream,
+		model = INTENT_MODEL,
 		message = prompt,
 		temperature= 0.2,
 		chat_history=ChatHistory,
@@ -63,33 +73,72 @@ def FirstLayerDMM(prompt: str = "test"):
 		preamble=preamble
 	)
 	
-	response = ""
-	for event in stream:
-		if event.event_type == "text-generation":
-			response += event.text
+	splitter = CommandSplitter(funcs)
+	try:
+		for event in stream:
+			if event.event_type == "text-generation":
+				yield from splitter.feed(event.text)
+	except Exception:
+		record_failure("cohere")
+		raise
 
-	response = response.replace("\n", "")
-	response = response.split(",")
+	yield from splitter.close()
 
-	response = [r.strip() for r in response]
-    
-	temp = []
+def FirstLayerDMMStream(prompt: str = "test"):
+	"""Yield each command as soon as the model has finished writing it, instead of after the whole answer.
+
+	An answer containing the "(query)" placeholder is asked for again; commands
+	already yielded by an earlier attempt are not yielded twice.
+	"""
+	messages.append({"role": "user", "content": f"{prompt}"})
+
+	done = []
+	for _ in range(PLACEHOLDER_RETRIES + 1):
+		position = 0
+		for command in _stream_commands(prompt):
+			if PLACEHOLDER in command:
+				break
+			if position < len(done) and done[position] == command:
+				position += 1
+				continue
+			done.append(command)
+			position = len(done)
+			yield command
+		else:
+			return
+	print(f"[Model] Gave up on a placeholder answer after {PLACEHOLDER_RETRIES} retries: {prompt!r}")
+
+def FirstLayerDMM(prompt: str = "test", use_cache: bool = True):
+	if use_cache:
+		cached = decision_cache.get_commands(prompt)
+		if cached is not None:
+			return cached
+
+	response = list(FirstLayerDMMStream(prompt))
+
+	if use_cache and response:
+		decision_cache.put_commands(prompt, response)
+	return response
+
+# local rule / naive Bayes tiers answer the easy prompts; the rest go to FirstLayerDMM
+# (the classifier consults decision_cache itself so cache hits are counted as their own tier)
+classifier = shared_classifier(lambda prompt: FirstLayerDMM(prompt, use_cache=False), cache=decision_cache,
+                               stream_fallback=FirstLayerDMMStream)
+
+def ClassifyIntent(prompt: str = "test"):
+	return classifier.classify(prompt)
 
-	for r in response:
-		for func in funcs:
-			if r.startswith(func):
-				temp.append(r)
+def ClassifyIntentStream(prompt: str = "test"):
+	return classifier.classify_stream(prompt)
 
-	response = temp
+def FirstLayerDMMBatch(prompts: list, max_workers: int = 4, use_cache: bool = True):
+	return classify_batch(lambda prompt: FirstLayerDMM(prompt, use_cache=use_cache), prompts, max_workers)
 
-	if "(query)" in response:
-		nweresponse = FirstLayerDMM(prompt=prompt)
-		return nweresponse
-	else:
-		return response
+def ClassifyIntentBatch(prompts: list, max_workers: int = 4):
+	return classifier.classify_batch(prompts, max_workers)
     
 if __name__ == "__main__":
     
     while True:
-		    print(FirstLayerDMM(input(">>>")))
+		    print(ClassifyIntent(input(">>>")))
 
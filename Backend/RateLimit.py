@@ -0,0 +1,169 @@
+"""
+RateLimit.py — token-bucket limits shared by every outbound provider call.
+
+    from RateLimit import acquire, acquire_async, penalize, retry_after
+    acquire("duckduckgo", "news")                     # blocks until a token is free
+    await acquire_async("huggingface", "image")       # same bucket, asyncio.sleep instead
+    penalize("groq", retry_after(error))              # provider said 429: hold the bucket
+
+Each (provider, endpoint) has a bucket refilled at `rate` tokens per second up
+to `burst`. Endpoints without their own entry in RATE_LIMITS share the
+provider's bucket. A caller reserves a token under the lock and then waits
+outside it, so threads and coroutines queue fairly in arrival order and nobody
+holds the lock while sleeping. A 429 with Retry-After (or a provider-specific
+rate-limit error) drains the bucket and holds it for the time given.
+"""
+
+import time
+import asyncio
+import threading
+from collections import deque
+from email.utils import parsedate_to_datetime
+
+# provider or "provider:endpoint" -> (tokens per second, burst capacity)
+RATE_LIMITS = {
+    "groq": (0.5, 5),           # free tier: 30 requests/minute
+    "cohere": (0.33, 5),        # trial keys: 20 chat calls/minute
+    "duckduckgo": (1.0, 3),     # unofficial API; bursts trigger its ratelimit page
+    "huggingface": (1.0, 4),    # one burst covers an IMAGE_CONCURRENCY batch
+}
+DEFAULT_LIMIT = (2.0, 5)
+DEFAULT_PENALTY = 5.0           # seconds to back off after a 429 without Retry-After
+MAX_PENALTY = 120.0
+
+
+class RateLimitTimeout(RuntimeError):
+    """Raised when the wait for a token would exceed the caller's timeout."""
+
+    def __init__(self, name: str, wait: float):
+        super().__init__(f"{name} rate limit: next slot in {wait:.1f}s")
+        self.name = name
+        self.wait = wait
+
+
+class TokenBucket:
+    def __init__(self, name: str, rate: float, burst: int):
+        self.name = name
+        self.rate = rate
+        self.burst = burst
+        self.lock = threading.Lock()
+        self.tokens = float(burst)
+        self.updated = time.monotonic()  # refill clock; set into the future while a penalty holds the bucket
+        self.waits = deque(maxlen=256)
+        self.counters = {"acquired": 0, "waited": 0, "wait_s": 0.0, "max_wait_s": 0.0,
+                         "throttled": 0, "timeouts": 0}
+
+    def _refill(self, now: float):
+        if now > self.updated:
+            self.tokens = min(self.burst, self.tokens + (now - self.updated) * self.rate)
+            self.updated = now
+
+    def reserve(self, timeout: float = None) -> float:
+        """Take a token now (the balance may go negative) and return how long to wait before using it."""
+        with self.lock:
+            now = time.monotonic()
+            self._refill(now)
+            wait = max(0.0, self.updated - now) + max(0.0, 1 - self.tokens) / self.rate
+            if timeout is not None and wait > timeout:
+                self.counters["timeouts"] += 1
+                raise RateLimitTimeout(self.name, wait)
+            self.tokens -= 1
+            self.counters["acquired"] += 1
+            if wait > 0:
+                self.counters["waited"] += 1
+                self.counters["wait_s"] += wait
+                self.counters["max_wait_s"] = max(self.counters["max_wait_s"], wait)
+            self.waits.append(wait)
+            return wait
+
+    def acquire(self, timeout: float = None) -> float:
+        wait = self.reserve(timeout)
+        if wait > 0:
+            time.sleep(wait)
+        return wait
+
+    async def acquire_async(self, timeout: float = None) -> float:
+        wait = self.reserve(timeout)
+        if wait > 0:
+            await asyncio.sleep(wait)
+        return wait
+
+    def penalize(self, seconds: float = None):
+        """The provider rejected us: drain the bucket and hold it for `seconds`."""
+        seconds = min(MAX_PENALTY, DEFAULT_PENALTY if seconds is None else max(0.0, seconds))
+        with self.lock:
+            now = time.monotonic()
+            self._refill(now)
+            self.tokens = min(self.tokens, 1.0)  # one request right after the hold, the rest at `rate`
+            self.updated = max(self.updated, now + seconds)
+            self.counters["throttled"] += 1
+        print(f"[RateLimit] {self.name} throttled; holding requests for {seconds:.1f}s")
+
+    def stats(self) -> dict:
+        with self.lock:
+            self._refill(time.monotonic())
+            waits = sorted(self.waits)
+            return dict(self.counters,
+                        wait_s=round(self.counters["wait_s"], 3),
+                        max_wait_s=round(self.counters["max_wait_s"], 3),
+                        p95_wait_s=round(waits[min(len(waits) - 1, int(len(waits) * 0.95))], 3) if waits else None,
+                        tokens=round(self.tokens, 2), rate=self.rate, burst=self.burst,
+                        blocked_for_s=round(max(0.0, self.updated - time.monotonic()), 1))
+
+
+_buckets = {}
+_buckets_lock = threading.Lock()
+
+
+def configure(provider: str, rate: float, burst: int, endpoint: str = None):
+    """Set (or change) the limit for a provider or one of its endpoints; replaces an existing bucket."""
+    key = f"{provider}:{endpoint}" if endpoint else provider
+    with _buckets_lock:
+        RATE_LIMITS[key] = (rate, burst)
+        _buckets.pop(key, None)
+
+
+def bucket(provider: str, endpoint: str = None) -> TokenBucket:
+    key = f"{provider}:{endpoint}" if endpoint and f"{provider}:{endpoint}" in RATE_LIMITS else provider
+    with _buckets_lock:
+        if key not in _buckets:
+            rate, burst = RATE_LIMITS.get(key, DEFAULT_LIMIT)
+            _buckets[key] = TokenBucket(key, rate, burst)
+        return _buckets[key]
+
+
+def acquire(provider: str, endpoint: str = None, timeout: float = None) -> float:
+    """Block until the provider's bucket grants a request; returns the seconds waited."""
+    return bucket(provider, endpoint).acquire(timeout)
+
+
+async def acquire_async(provider: str, endpoint: str = None, timeout: float = None) -> float:
+    return await bucket(provider, endpoint).acquire_async(timeout)
+
+
+def penalize(provider: str, seconds: float = None, endpoint: str = None):
+    bucket(provider, endpoint).penalize(seconds)
+
+
+def retry_after(source) -> float:
+    """Seconds from a Retry-After / retry-after-ms header on a response or an exception's response, else None."""
+    response = getattr(source, "response", source)
+    headers = getattr(response, "headers", None) or {}
+    try:
+        if headers.get("retry-after-ms"):
+            return float(headers["retry-after-ms"]) / 1000
+        value = headers.get("retry-after")
+        if not value:
+            return None
+        try:
+            return float(value)
+        except ValueError:
+            return max(0.0, parsedate_to_datetime(value).timestamp() - time.time())
+    except (TypeError, ValueError, AttributeError):
+        return None
+
+
+def stats() -> dict:
+    with _buckets_lock:
+        buckets = list(_buckets.values())
+    return {b.name: b.stats() for b in buckets}
@@ -1,16 +1,31 @@
 from duckduckgo_search import DDGS
-from groq import Groq
-from json import load, dump
+from Clients import lazy_client, lazy_async_client
+from Resilience import call, call_async, record_failure
+from RateLimit import acquire, penalize
+from ResponseCache import shared_cache, is_cacheable
+from ConversationStore import shared_store
+from SearchFanout import register_source, fan_out, SEARCH_DEADLINE
+from SearchContext import build_context
+from DocIndex import shared_doc_index
+from concurrent.futures import ThreadPoolExecutor
+from collections import deque
 from datetime import datetime
-import os
+import threading
+import asyncio
+import inspect
+import time
 
 # Configuration
 USERNAME = "SHI"
 ASSISTANT_NAME = "Nio"
 GROQ_API_KEY = "GROQ_API_KEY"
-CHAT_LOG_FILE = r"Data\ChatLog.json"
+SESSION = "realtime"  # conversation in Data/Conversations.db that realtime answers are logged to
+SEARCH_MODEL = "llama3-70b-8192"
+USE_RESPONSE_CACHE = False  # serve repeated questions from ResponseCache for a few minutes
+SEARCH_CONTEXT_BUDGET = 700  # tokens of ranked, deduplicated search snippets per prompt
 
-client = Groq(api_key=GROQ_API_KEY)
+client = lazy_client("groq", api_key=GROQ_API_KEY)
+async_client = lazy_async_client("groq", api_key=GROQ_API_KEY)
 
 # System prompt
 SYSTEM_PROMPT = f"""
@@ -20,35 +35,54 @@ Hello, I am {USERNAME}. You are a very accurate and advanced AI chatbot named {A
 """
 
 def load_chat_log():
+    return shared_store().session(SESSION).messages()
+
+def save_chat_log(*messages):
+    shared_store().append(SESSION, *messages)
+
+def _ddgs(endpoint, query, num_results):
+    acquire("duckduckgo", endpoint)
     try:
-        with open(CHAT_LOG_FILE, "r", encoding="utf-8") as file:
-            return load(file)
-    except FileNotFoundError:
-        os.makedirs(os.path.dirname(CHAT_LOG_FILE), exist_ok=True)
-        with open(CHAT_LOG_FILE, "w", encoding="utf-8") as file:
-            dump([], file)
-        return []
-
-def save_chat_log(messages):
-    with open(CHAT_LOG_FILE, "w", encoding="utf-8") as file:
-        dump(messages, file, indent=4, ensure_ascii=False)
-
-def google_search(query, num_results=5):
+        return list(getattr(DDGS(), endpoint)(query, max_results=num_results))
+    except Exception as e:
+        if "ratelimit" in type(e).__name__.lower():
+            penalize("duckduckgo", None, endpoint)
+        raise
+
+def fetch_news(query, num_results=5):
+    return [{"title": r.get("title"), "body": r.get("body"), "url": r.get("url"),
+             "publisher": r.get("source"), "date": r.get("date")}
+            for r in _ddgs("news", query, num_results)]
+
+def fetch_web(query, num_results=5):
+    return [{"title": r.get("title"), "body": r.get("body"), "url": r.get("href")}
+            for r in _ddgs("text", query, num_results)]
+
+# each source sits behind its own SearchCache: repeated questions within a few
+# minutes skip the lookup, identical concurrent lookups share one request
+register_source("news", fetch_news, ttl=120, stale_ttl=900)
+register_source("web", fetch_web, ttl=600, stale_ttl=3600)
+
+def fetch_local(query, num_results=5):
+    """Chunks of the user's own documents (DocIndex.DOC_DIRS); answers in milliseconds."""
+    return shared_doc_index().search(query, limit=num_results)
+
+# short TTL: the index picks up edited documents on its next rescan
+register_source("local", fetch_local, ttl=30, stale_ttl=300)
+
+def google_search(query, num_results=5, deadline=SEARCH_DEADLINE, min_results=None, require_any=None):
     """
-    Fetch real-time news headlines from DuckDuckGo.
+    Fetch real-time results from every search source (DuckDuckGo news and web, local documents),
+    waiting at most `deadline` seconds for slow ones (or only until `min_results` are in).
     """
-    results = list(DDGS().news(query, max_results=num_results))
-    formatted = f"Latest news for: '{query}'\n[start]\n"
-    for result in results:
-        formatted += (
-            f"Title: {result.get('title', 'N/A')}\n"
-            f"Publisher: {result.get('source', 'N/A')}\n"
-            f"Published: {result.get('date', 'N/A')}\n"
-            f"Description: {result.get('body', 'N/A')}\n"
-            f"URL: {result.get('url', 'N/A')}\n\n"
-        )
-    formatted += "[end]"
-    return formatted
+    fan = fan_out(query, num_results=num_results, deadline=deadline,
+                  min_results=min_results, require_any=require_any)
+    block, report = build_context(query, fan.results, budget=SEARCH_CONTEXT_BUDGET)
+    print(f"[RealtimeSearch] {len(fan.results)} results in {fan.elapsed * 1000:.0f} ms ("
+          + ", ".join(f"{name} {r['status']} {r['contributed']}/{r['results']}" for name, r in fan.sources.items())
+          + f"); context {report['packed_tokens']} tokens, {report['tokens_saved']} saved, "
+          f"{report['duplicates_dropped']} duplicates, built in {report['build_ms']} ms")
+    return block
 
 def get_realtime_info():
     now = datetime.now()
@@ -64,36 +98,187 @@ def get_realtime_info():
 def clean_output(text):
     return '\n'.join(line for line in text.split("\n") if line.strip())
 
-def RealTimeSearchEngine(prompt):
-    messages = [
+# ---------------- pipelined engine ----------------
+# The LLM request starts once the search has MIN_CONTEXT_RESULTS hits from
+# finished sources (at least one from the internet); slower sources keep
+# filling their caches. The Groq client is built while the search runs, and
+# logging happens on a background thread after the last delta is yielded.
+MIN_CONTEXT_RESULTS = 3
+INTERNET_SOURCES = ("news", "web")
+
+_search_executor = ThreadPoolExecutor(max_workers=4, thread_name_prefix="realtime-search")
+_log_executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="realtime-log")
+_timings_lock = threading.Lock()
+_timings = deque(maxlen=200)
+
+def _search_context(prompt):
+    return google_search(prompt, min_results=MIN_CONTEXT_RESULTS, require_any=INTERNET_SOURCES)
+
+def _messages(prompt, context, realtime_info):
+    return [
         {"role": "system", "content": SYSTEM_PROMPT},
         {"role": "user", "content": prompt},
-        {"role": "system", "content": google_search(prompt)},
-        {"role": "system", "content": get_realtime_info()}
+        {"role": "system", "content": context},
+        {"role": "system", "content": realtime_info}
     ]
 
+def _finish(prompt, answer, cache, timings, started):
+    """Record timings and hand logging / caching to the background writer."""
+    timings["total_s"] = round(time.perf_counter() - started, 3)
+    with _timings_lock:
+        _timings.append(dict(timings))
+    if not answer:
+        return
+    def write():
+        save_chat_log({"role": "user", "content": prompt}, {"role": "assistant", "content": answer})
+        if cache is not None and not timings.get("cancelled") and not timings.get("failed"):
+            cache.put("realtime", prompt, clean_output(answer), SEARCH_MODEL)
+    _log_executor.submit(write)
+
+def RealTimeSearchEngineStream(prompt, cancel_event=None, timings=None):
+    """
+    Yield answer deltas as they arrive. `timings` (a dict, optional) is filled
+    with search_s, ttft_s and total_s for this request.
+    """
+    timings = {} if timings is None else timings
+    started = time.perf_counter()
+    cache = shared_cache() if USE_RESPONSE_CACHE and is_cacheable(prompt) else None
+    if cache is not None:
+        cached = cache.get("realtime", prompt, SEARCH_MODEL)
+        if cached is not None:
+            timings.update(cached=True, search_s=0.0, ttft_s=round(time.perf_counter() - started, 3))
+            try:
+                yield cached
+            finally:
+                _finish(prompt, cached, None, timings, started)  # log the turn so later context has it
+            return
+
+    parts = []
+    completion = None
     try:
-        completion = client.chat.completions.create(
-            model="llama3-70b-8192",
-            messages=messages,
+        search = _search_executor.submit(_search_context, prompt)
+        realtime_info = get_realtime_info()
+        client.chat  # build the SDK client while the search is in flight
+        context = search.result()
+        timings["search_s"] = round(time.perf_counter() - started, 3)
+
+        completion = call(
+            "groq", client.chat.completions.create,
+            model=SEARCH_MODEL,
+            messages=_messages(prompt, context, realtime_info),
             max_tokens=2048,
             temperature=0.7,
             top_p=1,
             stream=True
         )
 
-        answer = ""
         for chunk in completion:
-            if chunk.choices[0].delta.content:
-                answer += chunk.choices[0].delta.content
+            if cancel_event is not None and cancel_event.is_set():
+                timings["cancelled"] = True
+                break
+            delta = chunk.choices[0].delta.content
+            if delta:
+                if not parts:
+                    timings["ttft_s"] = round(time.perf_counter() - started, 3)
+                parts.append(delta)
+                yield delta
+    except GeneratorExit:
+        timings["cancelled"] = True  # the consumer stopped reading
+        raise
+    except Exception:
+        timings["failed"] = True
+        if completion is not None:
+            record_failure("groq")  # the stream died; failures opening it were counted by call()
+        raise
+    finally:
+        _finish(prompt, "".join(parts), cache, timings, started)
+        close = getattr(completion, "close", None)
+        if close is not None:
+            close()
+
+async def RealTimeSearchEngineStreamAsync(prompt, cancel_event=None, timings=None):
+    """Async twin of RealTimeSearchEngineStream for the shared event loop."""
+    timings = {} if timings is None else timings
+    started = time.perf_counter()
+    cache = shared_cache() if USE_RESPONSE_CACHE and is_cacheable(prompt) else None
+    if cache is not None:
+        cached = cache.get("realtime", prompt, SEARCH_MODEL)
+        if cached is not None:
+            timings.update(cached=True, search_s=0.0, ttft_s=round(time.perf_counter() - started, 3))
+            try:
+                yield cached
+            finally:
+                _finish(prompt, cached, None, timings, started)  # log the turn so later context has it
+            return
 
-        messages.append({"role": "assistant", "content": answer})
-        save_chat_log(messages)
-        return clean_output(answer)
+    parts = []
+    completion = None
+    try:
+        search = asyncio.get_running_loop().run_in_executor(_search_executor, _search_context, prompt)
+        realtime_info = get_realtime_info()
+        async_client.chat  # build the SDK client while the search is in flight
+        context = await search
+        timings["search_s"] = round(time.perf_counter() - started, 3)
+
+        completion = await call_async(
+            "groq", async_client.chat.completions.create,
+            model=SEARCH_MODEL,
+            messages=_messages(prompt, context, realtime_info),
+            max_tokens=2048,
+            temperature=0.7,
+            top_p=1,
+            stream=True
+        )
 
+        async for chunk in completion:
+            if cancel_event is not None and cancel_event.is_set():
+                timings["cancelled"] = True
+                break
+            delta = chunk.choices[0].delta.content
+            if delta:
+                if not parts:
+                    timings["ttft_s"] = round(time.perf_counter() - started, 3)
+                parts.append(delta)
+                yield delta
+    except (GeneratorExit, asyncio.CancelledError):
+        timings["cancelled"] = True  # the consumer stopped reading
+        raise
+    except Exception:
+        timings["failed"] = True
+        if completion is not None:
+            record_failure("groq")  # the stream died; failures opening it were counted by call()
+        raise
+    finally:
+        _finish(prompt, "".join(parts), cache, timings, started)
+        close = getattr(completion, "close", None)
+        if close is not None:
+            closing = close()
+            if inspect.isawaitable(closing):
+                await closing
+
+def RealTimeSearchEngine(prompt):
+    try:
+        return clean_output("".join(RealTimeSearchEngineStream(prompt)))
+    except Exception as e:
+        return f"Error occurred: {str(e)}"
+
+async def RealTimeSearchEngineAsync(prompt):
+    """Async variant for the shared event loop; the search fan-out runs on a worker thread."""
+    try:
+        return clean_output("".join([d async for d in RealTimeSearchEngineStreamAsync(prompt)]))
     except Exception as e:
         return f"Error occurred: {str(e)}"
 
+def stats():
+    """Recent per-request stage timings (seconds) and their medians."""
+    with _timings_lock:
+        recent = list(_timings)
+    out = {"requests": len(recent), "last": recent[-1] if recent else None}
+    for stage in ("search_s", "ttft_s", "total_s"):
+        values = sorted(t[stage] for t in recent if t.get(stage) is not None)
+        out[f"p50_{stage}"] = values[len(values) // 2] if values else None
+    return out
+
 if __name__ == "__main__":
     while True:
         query = input("Enter your query: ")
@@ -0,0 +1,255 @@
+"""
+Resilience.py — shared retry / circuit-breaker layer for outbound LLM calls.
+
+    from Resilience import call
+    completion = call("groq", client.chat.completions.create, model=..., messages=...)
+
+Failures are retried with jittered exponential backoff, bounded per call by
+RetryPolicy.max_attempts and process-wide by a RetryBudget so an outage can't
+multiply traffic. Each provider has a CircuitBreaker: after enough consecutive
+failures it opens and calls fail fast with CircuitOpenError until the reset
+timeout passes, then a single half-open probe decides whether it closes again.
+Every attempt first takes a token from the provider's RateLimit bucket; a 429
+holds that bucket for the Retry-After time instead of a blind backoff.
+"""
+
+import time
+import random
+import asyncio
+import threading
+from collections import deque
+
+from RateLimit import acquire, acquire_async, penalize, retry_after
+
+CLOSED = "closed"
+OPEN = "open"
+HALF_OPEN = "half_open"
+
+
+class CircuitOpenError(RuntimeError):
+    """Raised without contacting the provider while its circuit is open."""
+
+    def __init__(self, provider: str, retry_in: float):
+        super().__init__(f"{provider} is temporarily unavailable; retrying in {retry_in:.0f}s")
+        self.provider = provider
+        self.retry_in = retry_in
+
+
+def status_code(error: Exception):
+    """Best-effort HTTP status of an SDK/requests exception, or None for transport errors."""
+    for obj in (error, getattr(error, "response", None)):
+        code = getattr(obj, "status_code", None) or getattr(obj, "status", None)
+        if isinstance(code, int):
+            return code
+    return None
+
+
+def is_retryable(error: Exception) -> bool:
+    """Transport errors, timeouts, 408, 429 and 5xx are worth retrying; other 4xx (bad key, bad request) are not."""
+    if isinstance(error, CircuitOpenError):
+        return False
+    code = status_code(error)
+    return code is None or code in (408, 409, 429) or code >= 500
+
+
+class RetryPolicy:
+    def __init__(self, max_attempts: int = 3, base_delay: float = 0.5, max_delay: float = 8.0):
+        self.max_attempts = max_attempts
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+
+    def delay(self, attempt: int) -> float:
+        """Full-jitter backoff for the given 1-based retry number."""
+        return random.uniform(0, min(self.max_delay, self.base_delay * (2 ** (attempt - 1))))
+
+
+class RetryBudget:
+    """Allow retries only up to `ratio` of recent requests (plus a small floor) in a sliding window."""
+
+    def __init__(self, ratio: float = 0.2, min_retries: int = 3, window: float = 10.0):
+        self.ratio = ratio
+        self.min_retries = min_retries
+        self.window = window
+        self.lock = threading.Lock()
+        self.requests = deque()
+        self.retries = deque()
+
+    def _trim(self, now: float):
+        for q in (self.requests, self.retries):
+            while q and now - q[0] > self.window:
+                q.popleft()
+
+    def record_request(self):
+        with self.lock:
+            now = time.monotonic()
+            self._trim(now)
+            self.requests.append(now)
+
+    def try_spend(self) -> bool:
+        with self.lock:
+            now = time.monotonic()
+            self._trim(now)
+            if len(self.retries) >= self.min_retries + self.ratio * len(self.requests):
+                return False
+            self.retries.append(now)
+            return True
+
+
+class CircuitBreaker:
+    def __init__(self, name: str, failure_threshold: int = 5, reset_timeout: float = 30.0):
+        self.name = name
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.lock = threading.Lock()
+        self.state = CLOSED
+        self.failures = 0
+        self.opened_at = 0.0
+        self.probe_in_flight = False
+        self.total_failures = 0
+        self.total_rejected = 0
+
+    def before_call(self):
+        """Raise CircuitOpenError unless a call may go through now."""
+        with self.lock:
+            if self.state == OPEN:
+                elapsed = time.monotonic() - self.opened_at
+                if elapsed < self.reset_timeout:
+                    self.total_rejected += 1
+                    raise CircuitOpenError(self.name, self.reset_timeout - elapsed)
+                self.state = HALF_OPEN
+            if self.state == HALF_OPEN:
+                if self.probe_in_flight:
+                    self.total_rejected += 1
+                    raise CircuitOpenError(self.name, 1)
+                self.probe_in_flight = True
+
+    def on_success(self):
+        with self.lock:
+            self.state = CLOSED
+            self.failures = 0
+            self.probe_in_flight = False
+
+    def release_probe(self):
+        """The call was abandoned (cancelled, interrupted) before the provider answered: free the probe slot."""
+        with self.lock:
+            self.probe_in_flight = False
+
+    def on_failure(self):
+        with self.lock:
+            self.failures += 1
+            self.total_failures += 1
+            self.probe_in_flight = False
+            if self.state == HALF_OPEN or self.failures >= self.failure_threshold:
+                self.state = OPEN
+                self.opened_at = time.monotonic()
+
+    def snapshot(self) -> dict:
+        with self.lock:
+            snap = {
+                "state": self.state,
+                "consecutive_failures": self.failures,
+                "total_failures": self.total_failures,
+                "rejected": self.total_rejected,
+            }
+            if self.state == OPEN:
+                snap["retry_in"] = round(max(0.0, self.reset_timeout - (time.monotonic() - self.opened_at)), 1)
+            return snap
+
+
+# ----------------------- Registry -----------------------
+DEFAULT_POLICY = RetryPolicy()
+_budget = RetryBudget()
+_breakers = {}
+_registry_lock = threading.Lock()
+
+
+def breaker(provider: str) -> CircuitBreaker:
+    with _registry_lock:
+        if provider not in _breakers:
+            _breakers[provider] = CircuitBreaker(provider)
+        return _breakers[provider]
+
+
+def _handle_failure(provider: str, cb: CircuitBreaker, policy: RetryPolicy, attempt: int, error: Exception,
+                    endpoint: str = None):
+    """Update the breaker for a failed attempt; return the backoff delay, or None if the error should be raised."""
+    retryable = is_retryable(error)
+    throttled = status_code(error) == 429
+    if throttled:
+        penalize(provider, retry_after(error), endpoint)
+    if retryable or status_code(error) in (401, 403):
+        cb.on_failure()
+    else:
+        # the provider answered; the request itself was bad
+        cb.on_success()
+    if not retryable or attempt >= policy.max_attempts or not _budget.try_spend():
+        return None
+    if throttled:
+        print(f"[Resilience] {provider} rate limited; retry {attempt} when the limiter allows")
+        return 0.0  # the next acquire waits out the Retry-After hold
+    wait = policy.delay(attempt)
+    print(f"[Resilience] {provider} call failed ({error}); retry {attempt} in {wait:.2f}s")
+    return wait
+
+
+def call(provider: str, fn, *args, policy: RetryPolicy = None, endpoint: str = None, **kwargs):
+    """Call fn(*args, **kwargs) through the provider's rate limit and circuit breaker with bounded retries."""
+    policy = policy or DEFAULT_POLICY
+    cb = breaker(provider)
+    _budget.record_request()
+    attempt = 1
+    while True:
+        cb.before_call()
+        try:
+            acquire(provider, endpoint)
+            result = fn(*args, **kwargs)
+        except Exception as e:
+            wait = _handle_failure(provider, cb, policy, attempt, e, endpoint)
+            if wait is None:
+                raise
+            if wait:
+                time.sleep(wait)
+            attempt += 1
+            continue
+        except BaseException:
+            cb.release_probe()
+            raise
+        cb.on_success()
+        return result
+
+
+async def call_async(provider: str, fn, *args, policy: RetryPolicy = None, endpoint: str = None, **kwargs):
+    """Async twin of call(): awaits fn(*args, **kwargs) and backs off with asyncio.sleep."""
+    policy = policy or DEFAULT_POLICY
+    cb = breaker(provider)
+    _budget.record_request()
+    attempt = 1
+    while True:
+        cb.before_call()
+        try:
+            await acquire_async(provider, endpoint)
+            result = await fn(*args, **kwargs)
+        except Exception as e:
+            wait = _handle_failure(provider, cb, policy, attempt, e, endpoint)
+            if wait is None:
+                raise
+            if wait:
+                await asyncio.sleep(wait)
+            attempt += 1
+            continue
+        except BaseException:
+            cb.release_probe()
+            raise
+        cb.on_success()
+        return result
+
+
+def record_failure(provider: str):
+    """Report a failure that happened after `call` returned, e.g. a stream dying mid-way."""
+    breaker(provider).on_failure()
+
+
+def snapshot() -> dict:
+    with _registry_lock:
+        names = list(_breakers)
+    return {name: breaker(name).snapshot() for name in names}
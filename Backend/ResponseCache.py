@@ -0,0 +1,163 @@
+"""
+ResponseCache.py — opt-in answer cache for repeated chat / realtime questions.
+
+Keys are a hash of (intent, normalized query, context) where context carries
+whatever else decides the answer (model name, prompt version, ...). A bounded
+in-memory LRU sits in front of a SQLite file so hits survive restarts. Each
+intent has its own TTL: realtime answers go stale in minutes, general ones
+are kept for days.
+"""
+
+import os
+import re
+import time
+import sqlite3
+import hashlib
+import threading
+from collections import OrderedDict
+
+CACHE_DB_PATH = "Data/ResponseCache.db"
+MAX_MEMORY_ENTRIES = 512
+MAX_DISK_ENTRIES = 20000
+DEFAULT_TTLS = {
+    "general": 7 * 24 * 3600,
+    "realtime": 5 * 60,
+}
+
+# questions whose answer depends on earlier turns or on the clock are never cached
+_UNCACHEABLE_RE = re.compile(
+    r"\b(he|she|him|her|his|hers|it|its|they|them|their|this|that|these|those|more|again|"
+    r"previous|above|earlier|time|date|day|today|tomorrow|yesterday|now)\b"
+)
+
+
+def normalize(text: str) -> str:
+    text = re.sub(r"\s+", " ", (text or "").lower()).strip()
+    return text.rstrip(" .!?")
+
+
+def is_cacheable(query: str) -> bool:
+    q = normalize(query)
+    return bool(q) and not _UNCACHEABLE_RE.search(q)
+
+
+def make_key(intent: str, query: str, context: str = "") -> str:
+    return hashlib.sha1(f"{intent}\0{normalize(query)}\0{context}".encode("utf-8")).hexdigest()
+
+
+class ResponseCache:
+    """LRU + TTL cache with a persistent SQLite tier."""
+
+    def __init__(self, path: str = CACHE_DB_PATH, max_entries: int = MAX_MEMORY_ENTRIES,
+                 max_disk_entries: int = MAX_DISK_ENTRIES, ttls: dict = None):
+        self.max_entries = max_entries
+        self.max_disk_entries = max_disk_entries
+        self.ttls = dict(DEFAULT_TTLS, **(ttls or {}))
+        self.lock = threading.Lock()
+        self.memory = OrderedDict()
+        self.counters = {"hits": 0, "memory_hits": 0, "disk_hits": 0, "misses": 0, "evictions": 0, "expired": 0}
+        self.db = None
+        if path:
+            os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+            self.db = sqlite3.connect(path, check_same_thread=False)
+            self.db.execute(
+                "CREATE TABLE IF NOT EXISTS responses ("
+                " key TEXT PRIMARY KEY, intent TEXT, value TEXT, expires REAL, used REAL)"
+            )
+            self.db.execute("CREATE INDEX IF NOT EXISTS responses_used ON responses(used)")
+            self.db.execute("DELETE FROM responses WHERE expires < ?", (time.time(),))
+            self.db.commit()
+
+    def ttl(self, intent: str) -> float:
+        return self.ttls.get(intent, self.ttls["general"])
+
+    def get(self, intent: str, query: str, context: str = ""):
+        key = make_key(intent, query, context)
+        now = time.time()
+        with self.lock:
+            entry = self.memory.get(key)
+            if entry is not None:
+                value, expires = entry
+                if expires > now:
+                    self.memory.move_to_end(key)
+                    self.counters["hits"] += 1
+                    self.counters["memory_hits"] += 1
+                    return value
+                del self.memory[key]
+                self.counters["expired"] += 1
+            if self.db is not None:
+                row = self.db.execute("SELECT value, expires FROM responses WHERE key = ?", (key,)).fetchone()
+                if row is not None and row[1] > now:
+                    self.db.execute("UPDATE responses SET used = ? WHERE key = ?", (now, key))
+                    self.db.commit()
+                    self._remember(key, row[0], row[1])
+                    self.counters["hits"] += 1
+                    self.counters["disk_hits"] += 1
+                    return row[0]
+            self.counters["misses"] += 1
+            return None
+
+    def put(self, intent: str, query: str, value: str, context: str = ""):
+        if not value:
+            return
+        key = make_key(intent, query, context)
+        now = time.time()
+        expires = now + self.ttl(intent)
+        with self.lock:
+            self._remember(key, value, expires)
+            if self.db is not None:
+                self.db.execute(
+                    "INSERT OR REPLACE INTO responses (key, intent, value, expires, used) VALUES (?, ?, ?, ?, ?)",
+                    (key, intent, value, expires, now),
+                )
+                self._prune_disk(now)
+                self.db.commit()
+
+    def _remember(self, key: str, value: str, expires: float):
+        self.memory[key] = (value, expires)
+        self.memory.move_to_end(key)
+        while len(self.memory) > self.max_entries:
+            self.memory.popitem(last=False)
+            self.counters["evictions"] += 1
+
+    def _prune_disk(self, now: float):
+        self.db.execute("DELETE FROM responses WHERE expires < ?", (now,))
+        excess = self.db.execute("SELECT COUNT(*) FROM responses").fetchone()[0] - self.max_disk_entries
+        if excess > 0:
+            self.db.execute(
+                "DELETE FROM responses WHERE key IN (SELECT key FROM responses ORDER BY used LIMIT ?)", (excess,)
+            )
+
+    def clear(self):
+        with self.lock:
+            self.memory.clear()
+            if self.db is not None:
+                self.db.execute("DELETE FROM responses")
+                self.db.commit()
+
+    def stats(self) -> dict:
+        with self.lock:
+            lookups = self.counters["hits"] + self.counters["misses"]
+            return dict(
+                self.counters,
+                size=len(self.memory),
+                hit_rate=round(self.counters["hits"] / lookups, 3) if lookups else 0.0,
+            )
+
+
+_shared = None
+_shared_lock = threading.Lock()
+
+
+def shared_cache() -> ResponseCache:
+    """Process-wide cache used by Chatbot and RealtimeSearch."""
+    global _shared
+    with _shared_lock:
+        if _shared is None:
+            _shared = ResponseCache()
+        return _shared
+
+
+def stats():
+    """Stats of the shared cache, or None if nothing has used it yet."""
+    return _shared.stats() if _shared is not None else None
@@ -0,0 +1,131 @@
+"""
+SearchCache.py — TTL cache with stale-while-revalidate and single-flight fetches.
+
+    news = SearchCache("ddgs_news", fetch=lambda query, n: list(DDGS().news(query, max_results=n)))
+    results = news.get("who won the match", 5)
+
+Entries are keyed on (normalized query, result count). A fresh entry is
+returned as is. An entry past `ttl` but within `stale_ttl` is still returned
+immediately while one background refresh brings it up to date. Concurrent
+misses for the same key share a single upstream fetch instead of each hitting
+the search provider, which is what got us rate-limited.
+"""
+
+import time
+import threading
+from collections import OrderedDict
+from concurrent.futures import Future
+
+from ResponseCache import normalize
+
+DEFAULT_TTL = 120.0         # seconds a result set is served without revalidation
+DEFAULT_STALE_TTL = 900.0   # seconds a stale result set may still be served while refreshing
+MAX_ENTRIES = 256
+
+
+class SearchCache:
+    def __init__(self, name: str, fetch, ttl: float = DEFAULT_TTL, stale_ttl: float = DEFAULT_STALE_TTL,
+                 max_entries: int = MAX_ENTRIES):
+        self.name = name
+        self.fetch = fetch  # fetch(query, num_results) -> list
+        self.ttl = ttl
+        self.stale_ttl = stale_ttl
+        self.max_entries = max_entries
+        self.lock = threading.Lock()
+        self.entries = OrderedDict()  # key -> (value, fetched_at)
+        self.in_flight = {}           # key -> Future
+        self.counters = {"hits": 0, "stale_hits": 0, "misses": 0, "coalesced": 0,
+                         "refreshes": 0, "errors": 0, "evictions": 0}
+        _register(self)
+
+    @staticmethod
+    def key(query: str, num_results: int) -> tuple:
+        return normalize(query), num_results
+
+    def get(self, query: str, num_results: int = 5, timeout: float = None):
+        key = self.key(query, num_results)
+        now = time.monotonic()
+        with self.lock:
+            entry = self.entries.get(key)
+            if entry is not None:
+                value, fetched_at = entry
+                age = now - fetched_at
+                if age < self.ttl:
+                    self.entries.move_to_end(key)
+                    self.counters["hits"] += 1
+                    return value
+                if age < self.ttl + self.stale_ttl:
+                    self.entries.move_to_end(key)
+                    self.counters["stale_hits"] += 1
+                    self._start_refresh(key, query, num_results)
+                    return value
+                del self.entries[key]
+            future = self.in_flight.get(key)
+            leader = future is None
+            if leader:
+                self.counters["misses"] += 1
+                future = self.in_flight[key] = Future()
+            else:
+                self.counters["coalesced"] += 1
+        if leader:
+            self._run_fetch(key, query, num_results, future)
+        return future.result(timeout)
+
+    def _start_refresh(self, key, query, num_results):
+        """Called with the lock held: refresh key in the background unless a fetch is already running."""
+        if key in self.in_flight:
+            return
+        future = self.in_flight[key] = Future()
+        self.counters["refreshes"] += 1
+        threading.Thread(target=self._run_fetch, args=(key, query, num_results, future),
+                         daemon=True, name=f"search-refresh-{self.name}").start()
+
+    def _run_fetch(self, key, query, num_results, future: Future):
+        try:
+            value = self.fetch(query, num_results)
+        except Exception as e:
+            with self.lock:
+                self.counters["errors"] += 1
+                self.in_flight.pop(key, None)
+                stale = self.entries.get(key)
+            print(f"[SearchCache] {self.name} fetch failed for {query!r}: {e}")
+            if stale is not None:
+                future.set_result(stale[0])  # keep serving what we had
+            else:
+                future.set_exception(e)
+            return
+        with self.lock:
+            self.entries[key] = (value, time.monotonic())
+            self.entries.move_to_end(key)
+            while len(self.entries) > self.max_entries:
+                self.entries.popitem(last=False)
+                self.counters["evictions"] += 1
+            self.in_flight.pop(key, None)
+        future.set_result(value)
+
+    def clear(self):
+        with self.lock:
+            self.entries.clear()
+
+    def stats(self) -> dict:
+        with self.lock:
+            served = self.counters["hits"] + self.counters["stale_hits"]
+            lookups = served + self.counters["misses"] + self.counters["coalesced"]
+            return dict(self.counters, size=len(self.entries), in_flight=len(self.in_flight),
+                        hit_rate=round(served / lookups, 3) if lookups else 0.0)
+
+
+_caches = {}
+_caches_lock = threading.Lock()
+
+
+def _register(cache: SearchCache):
+    with _caches_lock:
+        _caches[cache.name] = cache
+
+
+def stats() -> dict:
+    """Stats of every SearchCache created in this process, by name."""
+    with _caches_lock:
+        caches = list(_caches.values())
+    return {cache.name: cache.stats() for cache in caches}
@@ -0,0 +1,203 @@
+"""
+SearchContext.py — turn raw search hits into a compact, relevant prompt block.
+
+    block, report = build_context(query, results, budget=SEARCH_CONTEXT_BUDGET)
+
+Snippets (title + description) are ranked against the query with BM25,
+vectorized with NumPy when it is installed. Near-duplicates are dropped using
+MinHash signatures over word shingles, and the best snippets are packed in
+rank order until the token budget (ContextWindow.count_tokens) is spent. The
+report compares the packed block with the verbatim Title/Publisher/Published/
+Description/URL dump it replaces.
+"""
+
+import re
+import math
+import time
+import zlib
+import random
+import threading
+from urllib.parse import urlsplit
+
+from ContextWindow import count_tokens
+from HistorySearch import tokenize
+
+try:
+    import numpy as np
+    NUMPY_AVAILABLE = True
+except Exception:
+    NUMPY_AVAILABLE = False
+
+SEARCH_CONTEXT_BUDGET = 700   # tokens of search context sent to the realtime model
+BM25_K1 = 1.2
+BM25_B = 0.75
+SHINGLE_WORDS = 3
+MINHASH_PERMUTATIONS = 64
+DUPLICATE_SIMILARITY = 0.7     # estimated Jaccard above which a snippet repeats a better one
+
+_MERSENNE = (1 << 31) - 1
+_WORD_RE = re.compile(r"\w+")
+
+
+def snippet_text(hit: dict) -> str:
+    return f"{hit.get('title') or ''}. {hit.get('body') or ''}".strip(" .")
+
+
+def format_verbatim(query: str, results: list) -> str:
+    """The block google_search used to send: every field of every hit."""
+    formatted = f"Latest news for: '{query}'\n[start]\n"
+    for result in results:
+        formatted += (
+            f"Title: {result.get('title') or 'N/A'}\n"
+            f"Publisher: {result.get('publisher') or 'N/A'}\n"
+            f"Published: {result.get('date') or 'N/A'}\n"
+            f"Description: {result.get('body') or 'N/A'}\n"
+            f"URL: {result.get('url') or 'N/A'}\n\n"
+        )
+    return formatted + "[end]"
+
+
+def format_snippet(n: int, hit: dict) -> str:
+    meta = [m for m in (hit.get("publisher"), (hit.get("date") or "")[:10],
+                        urlsplit(hit.get("url") or "").netloc.removeprefix("www.")) if m]
+    suffix = f" ({', '.join(meta)})" if meta else ""
+    return f"[{n}] {hit.get('title') or 'Untitled'}{suffix}: {hit.get('body') or ''}".rstrip(": ")
+
+
+# ---------------- ranking ----------------
+def bm25_scores(query: str, docs: list) -> list:
+    """BM25 of every doc (token list) against the query, scored within this result set."""
+    terms = list(dict.fromkeys(tokenize(query)))
+    n = len(docs)
+    if not terms or not n:
+        return [0.0] * n
+    lengths = [len(d) for d in docs]
+    avg_len = (sum(lengths) / n) or 1.0
+    if NUMPY_AVAILABLE:
+        index = {t: i for i, t in enumerate(terms)}
+        tf = np.zeros((len(terms), n), dtype=np.float64)
+        for j, doc in enumerate(docs):
+            for token in doc:
+                i = index.get(token)
+                if i is not None:
+                    tf[i, j] += 1
+        df = (tf > 0).sum(axis=1)
+        idf = np.log(1 + (n - df + 0.5) / (df + 0.5))
+        norm = BM25_K1 * (1 - BM25_B + BM25_B * np.asarray(lengths, dtype=np.float64) / avg_len)
+        return (idf[:, None] * tf * (BM25_K1 + 1) / (tf + norm)).sum(axis=0).tolist()
+    scores = [0.0] * n
+    counts = [{} for _ in docs]
+    for j, doc in enumerate(docs):
+        for token in doc:
+            counts[j][token] = counts[j].get(token, 0) + 1
+    for t in terms:
+        df = sum(1 for c in counts if t in c)
+        idf = math.log(1 + (n - df + 0.5) / (df + 0.5))
+        for j, c in enumerate(counts):
+            tf = c.get(t, 0)
+            if tf:
+                scores[j] += idf * tf * (BM25_K1 + 1) / (tf + BM25_K1 * (1 - BM25_B + BM25_B * lengths[j] / avg_len))
+    return scores
+
+
+# ---------------- near-duplicates ----------------
+def _shingles(text: str) -> set:
+    words = _WORD_RE.findall(text.lower())
+    if len(words) < SHINGLE_WORDS:
+        return {" ".join(words)} if words else set()
+    return {" ".join(words[i:i + SHINGLE_WORDS]) for i in range(len(words) - SHINGLE_WORDS + 1)}
+
+
+class MinHasher:
+    def __init__(self, permutations: int = MINHASH_PERMUTATIONS, seed: int = 1):
+        rng = random.Random(seed)
+        self.a = [rng.randrange(1, _MERSENNE) for _ in range(permutations)]
+        self.b = [rng.randrange(0, _MERSENNE) for _ in range(permutations)]
+        if NUMPY_AVAILABLE:
+            self._a = np.asarray(self.a, dtype=np.uint64)[:, None]
+            self._b = np.asarray(self.b, dtype=np.uint64)[:, None]
+
+    def signature(self, text: str):
+        hashes = [zlib.crc32(s.encode("utf-8")) % _MERSENNE for s in _shingles(text)]
+        if not hashes:
+            return None
+        if NUMPY_AVAILABLE:
+            x = np.asarray(hashes, dtype=np.uint64)[None, :]
+            return ((self._a * x + self._b) % _MERSENNE).min(axis=1)
+        return [min((a * x + b) % _MERSENNE for x in hashes) for a, b in zip(self.a, self.b)]
+
+    @staticmethod
+    def similarity(sig1, sig2) -> float:
+        if sig1 is None or sig2 is None:
+            return 0.0
+        if NUMPY_AVAILABLE:
+            return float(np.mean(sig1 == sig2))
+        return sum(1 for x, y in zip(sig1, sig2) if x == y) / len(sig1)
+
+
+_hasher = MinHasher()
+
+
+# ---------------- packing ----------------
+_stats_lock = threading.Lock()
+_stats = {"queries": 0, "verbatim_tokens": 0, "packed_tokens": 0, "duplicates_dropped": 0,
+          "over_budget": 0, "build_ms": 0.0}
+
+
+def build_context(query: str, results: list, budget: int = SEARCH_CONTEXT_BUDGET) -> tuple:
+    """(prompt block, report) with the most relevant non-duplicate snippets that fit in `budget` tokens."""
+    started = time.perf_counter()
+    texts = [snippet_text(hit) for hit in results]
+    scores = bm25_scores(query, [tokenize(t) for t in texts])
+    order = sorted(range(len(results)), key=lambda i: scores[i], reverse=True)
+    if order and scores[order[0]] > 0:
+        order = [i for i in order if scores[i] > 0]  # off-topic hits only help when nothing matches
+    irrelevant = len(results) - len(order)
+
+    header = f"Search results for: '{query}' (most relevant first)\n"
+    used = count_tokens(header)
+    kept, signatures, duplicates, over_budget = [], [], 0, 0
+    for i in order:
+        sig = _hasher.signature(texts[i])
+        if any(MinHasher.similarity(sig, other) >= DUPLICATE_SIMILARITY for other in signatures):
+            duplicates += 1
+            continue
+        line = format_snippet(len(kept) + 1, results[i])
+        cost = count_tokens(line) + 1
+        if used + cost > budget:
+            over_budget += 1
+            continue
+        kept.append(line)
+        signatures.append(sig)
+        used += cost
+    block = header + "\n".join(kept)
+
+    verbatim = count_tokens(format_verbatim(query, results))
+    report = {
+        "results": len(results),
+        "kept": len(kept),
+        "irrelevant_dropped": irrelevant,
+        "duplicates_dropped": duplicates,
+        "over_budget": over_budget,
+        "verbatim_tokens": verbatim,
+        "packed_tokens": used,
+        "tokens_saved": verbatim - used,
+        "build_ms": round((time.perf_counter() - started) * 1000, 2),
+    }
+    with _stats_lock:
+        _stats["queries"] += 1
+        _stats["verbatim_tokens"] += verbatim
+        _stats["packed_tokens"] += used
+        _stats["duplicates_dropped"] += duplicates
+        _stats["over_budget"] += over_budget
+        _stats["build_ms"] += report["build_ms"]
+    return block, report
+
+
+def stats() -> dict:
+    with _stats_lock:
+        out = dict(_stats)
+    if out["queries"]:
+        out["avg_build_ms"] = round(out["build_ms"] / out["queries"], 2)
+        out["avg_tokens_saved"] = round((out["verbatim_tokens"] - out["packed_tokens"]) / out["queries"], 1)
+    return out
@@ -0,0 +1,192 @@
+"""
+SearchFanout.py — query several search sources at once under one deadline.
+
+    register_source("news", lambda q, n: [...])      # each source returns result dicts
+    fan = fan_out("latest rust release", num_results=5, deadline=2.5)
+    fan.results, fan.sources                         # merged hits, per-source report
+
+Every registered source runs concurrently on a shared pool behind its own
+SearchCache. Whatever has arrived when the deadline passes is merged; slow
+sources keep running in the background and fill their cache for next time.
+Merging interleaves sources in registration order and drops hits whose URL or
+(near-identical) title was already taken.
+
+A result is a dict with title, body, url and optionally publisher and date;
+`source` is filled in by the fan-out.
+"""
+
+import re
+import time
+import threading
+from collections import deque
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from urllib.parse import urlsplit
+
+from SearchCache import SearchCache
+
+SEARCH_DEADLINE = 2.5       # seconds the answer waits for sources
+TITLE_DUP_JACCARD = 0.8     # word-set overlap above which two titles count as the same story
+MAX_WORKERS = 8
+
+_executor = ThreadPoolExecutor(max_workers=MAX_WORKERS, thread_name_prefix="search")
+_WORD_RE = re.compile(r"\w+")
+
+
+class _Source:
+    def __init__(self, name: str, fetch, ttl: float, stale_ttl: float):
+        self.name = name
+        self.cache = SearchCache(f"source_{name}", fetch, ttl=ttl, stale_ttl=stale_ttl)
+        self.lock = threading.Lock()
+        self.latency = deque(maxlen=256)
+        self.counters = {"calls": 0, "results": 0, "contributed": 0, "timeouts": 0, "errors": 0}
+
+    def run(self, query: str, num_results: int) -> tuple:
+        started = time.perf_counter()
+        results = self.cache.get(query, num_results)
+        return results or [], time.perf_counter() - started
+
+    def record(self, **deltas):
+        with self.lock:
+            for k, v in deltas.items():
+                self.counters[k] += v
+
+    def stats(self) -> dict:
+        with self.lock:
+            lat = sorted(self.latency)
+            return dict(self.counters,
+                        p50_ms=round(lat[len(lat) // 2] * 1000, 1) if lat else None,
+                        p95_ms=round(lat[min(len(lat) - 1, int(len(lat) * 0.95))] * 1000, 1) if lat else None)
+
+
+class FanoutResult:
+    def __init__(self, results: list, sources: dict, elapsed: float):
+        self.results = results
+        self.sources = sources  # name -> {status, latency_ms, results, contributed}
+        self.elapsed = elapsed
+
+
+_sources = {}
+_sources_lock = threading.Lock()
+
+
+def register_source(name: str, fetch, ttl: float = 120.0, stale_ttl: float = 900.0):
+    """Add (or replace) a source; fetch(query, num_results) -> list of result dicts."""
+    with _sources_lock:
+        _sources[name] = _Source(name, fetch, ttl, stale_ttl)
+
+
+def source_names() -> list:
+    with _sources_lock:
+        return list(_sources)
+
+
+def canonical_url(url: str) -> str:
+    if not url:
+        return ""
+    parts = urlsplit(url.strip().lower())
+    host = parts.netloc.removeprefix("www.")
+    query = "&".join(p for p in parts.query.split("&") if p and not p.startswith("utm_"))
+    return f"{host}{parts.path.rstrip('/')}" + (f"?{query}" if query else "")
+
+
+def title_words(title: str) -> frozenset:
+    return frozenset(_WORD_RE.findall((title or "").lower()))
+
+
+def _near_duplicate(words: frozenset, seen: list) -> bool:
+    if not words:
+        return False
+    for other in seen:
+        union = len(words | other)
+        if union and len(words & other) / union >= TITLE_DUP_JACCARD:
+            return True
+    return False
+
+
+def merge(batches: list, limit: int) -> list:
+    """Round-robin over [(source, results)], skipping duplicate URLs and near-duplicate titles."""
+    merged, urls, titles = [], set(), []
+    queues = [(name, deque(results)) for name, results in batches]
+    while queues and len(merged) < limit:
+        for name, queue in list(queues):
+            if not queue:
+                queues.remove((name, queue))
+                continue
+            hit = queue.popleft()
+            url = canonical_url(hit.get("url"))
+            words = title_words(hit.get("title"))
+            if (url and url in urls) or _near_duplicate(words, titles):
+                continue
+            if url:
+                urls.add(url)
+            titles.append(words)
+            merged.append(dict(hit, source=name))
+            if len(merged) >= limit:
+                break
+    return merged
+
+
+def fan_out(query: str, num_results: int = 5, deadline: float = SEARCH_DEADLINE, sources=None,
+            min_results: int = None, require_any=None) -> FanoutResult:
+    """
+    Query the sources concurrently; return whatever merged results are ready by the deadline.
+
+    With min_results, return as soon as finished sources hold that many results
+    (and, with require_any, at least one of those sources has answered).
+    """
+    started = time.perf_counter()
+    with _sources_lock:
+        chosen = [s for name, s in _sources.items() if sources is None or name in sources]
+    futures = {_executor.submit(s.run, query, num_results): s for s in chosen}
+    if min_results is None:
+        done, _ = wait(futures, timeout=deadline)
+    else:
+        done, pending, ready, answered = set(), set(futures), 0, set()
+        while pending:
+            remaining = deadline - (time.perf_counter() - started)
+            if remaining <= 0:
+                break
+            finished, pending = wait(pending, timeout=remaining, return_when=FIRST_COMPLETED)
+            done |= finished
+            for future in finished:
+                if future.exception() is None and future.result()[0]:
+                    ready += len(future.result()[0])
+                    answered.add(futures[future].name)
+            if ready >= min_results and (not require_any or answered & set(require_any)):
+                break
+    early = len(done) < len(futures) and time.perf_counter() - started < deadline
+
+    report, batches = {}, []
+    for future, source in futures.items():
+        source.record(calls=1)
+        if future not in done:
+            if early:  # left running to fill its cache, not counted as a timeout
+                report[source.name] = {"status": "skipped", "latency_ms": None, "results": 0}
+            else:
+                source.record(timeouts=1)
+                report[source.name] = {"status": "timeout", "latency_ms": None, "results": 0}
+            continue
+        try:
+            results, latency = future.result()
+        except Exception as e:
+            source.record(errors=1)
+            report[source.name] = {"status": "error", "error": str(e), "latency_ms": None, "results": 0}
+            continue
+        with source.lock:
+            source.latency.append(latency)
+        source.record(results=len(results))
+        report[source.name] = {"status": "ok", "latency_ms": round(latency * 1000, 1), "results": len(results)}
+        batches.append((source.name, results))
+
+    merged = merge(batches, limit=num_results * max(1, len(batches)))
+    for source in chosen:
+        contributed = sum(1 for hit in merged if hit["source"] == source.name)
+        report[source.name]["contributed"] = contributed
+        source.record(contributed=contributed)
+    return FanoutResult(merged, report, time.perf_counter() - started)
+
+
+def stats() -> dict:
+    with _sources_lock:
+        sources = list(_sources.values())
+    return {s.name: s.stats() for s in sources}
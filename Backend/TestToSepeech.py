@@ -8,80 +8,108 @@ from dotenv import dotenv_values
 env_vars = dotenv_values(".env")
 AssistantVoice = "en-US-JennyNeural"
 
+AudioFile = os.path.join("Data", "speech.mp3")
+
 async def TextToAudioFile(text) -> None:
-    file_path = r"Data\speech.mp3"
+    file_path = AudioFile
         
     if os.path.exists(file_path):
         os.remove(file_path)
     
     communicate = edge_tts.Communicate(text, AssistantVoice, pitch='+5Hz', rate='+13%')
-    await communicate.save(r"Data\speech.mp")
+    await communicate.save(file_path)
 
-def TTS(Text, func=lambda r=None: True):
-    while True:
+def PlayAudio(func=lambda r=None: True):
+    """Play the synthesized file, blocking until it ends or func() returns False."""
+    try:
+        pygame.mixer.init()
+        pygame.mixer.music.load(AudioFile)
+        pygame.mixer.music.play()
+        
+        # Wait for playback to finish or func to return False
+        while pygame.mixer.music.get_busy():
+            if func() is False:
+                break
+            pygame.time.Clock().tick(10)
+        
+        return True
+    
+    except Exception as e:
+        print(f"Error in TTS: {e}")
+        return False
+    
+    finally:
         try:
-            # Run the async text-to-speech conversion and save to mp3
-            asyncio.run(TextToAudioFile(Text))
-            
-            pygame.mixer.init()
-            pygame.mixer.music.load(r"Data\speech.mp3")
-            pygame.mixer.music.play()
+            func(False)
+            pygame.mixer.music.stop()
+            pygame.mixer.quit()
             
-            # Wait for playback to finish or func to return False
-            while pygame.mixer.music.get_busy():
-                if func() is False:
-                    break
-                pygame.time.Clock().tick(10)
-            
-            return True
-        
         except Exception as e:
-            print(f"Error in TTS: {e}")
-            return False
-        
-        finally:
-            try:
-                func(False)
-                pygame.mixer.music.stop()
-                pygame.mixer.quit()
-                
-            except Exception as e:
-                print(f"Error in finally block {e}")
+            print(f"Error in finally block {e}")
+
+def TTS(Text, func=lambda r=None: True):
+    try:
+        # Run the async text-to-speech conversion and save to mp3
+        asyncio.run(TextToAudioFile(Text))
+    except Exception as e:
+        print(f"Error in TTS: {e}")
+        return False
+    return PlayAudio(func)
+
+async def TTSAsync(Text, func=lambda r=None: True):
+    """TTS for a running event loop: synthesis is awaited there, only the blocking playback goes to a thread."""
+    try:
+        await TextToAudioFile(Text)
+    except Exception as e:
+        print(f"Error in TTS: {e}")
+        return False
+    return await asyncio.to_thread(PlayAudio, func)
+
+def SpeechText(text: str) -> str:
+    """Long answers are cut to their first sentences plus a pointer to the chat screen."""
+    Data = text.strip(" . ")
+    
+    responses = [
+        "The rest of the result has been printed to the chat screen, kindly check it out sir.",
+        "The rest of the text is now on the chat screen, sir, please check it.",
+        "You can see the rest of the text on the chat screen, sir.",
+        "The remaining part of the text is now on the chat screen, sir.",
+        "Sir, you'll find more text on the chat screen for you to see.",
+        "The rest of the answer is now on the chat screen, sir.",
+        "Sir, please look at the chat screen, the rest of the answer is there.",
+        "You'll find the complete answer on the chat screen, sir.",
+        "The next part of the text is on the chat screen, sir.",
+        "Sir, please check the chat screen for more information.",
+        "There's more text on the chat screen for you, sir.",
+        "Sir, take a look at the chat screen for additional text.",
+        "You'll find more to read on the chat screen, sir.",
+        "Sir, check the chat screen for the rest of the text.",
+        "The chat screen has the rest of the text, sir.",
+        "There's more to see on the chat screen, sir, please look.",
+        "Sir, the chat screen holds the continuation of the text.",
+        "You'll find the complete answer on the chat screen, kindly check it out sir.",
+        "Please review the chat screen for the rest of the text, sir.",
+        "Sir, look at the chat screen for the complete answer."
+    ]
+    
+    if len(Data) > 4 and len(text) >= 250:
+        return " ".join(text.split(".")[0:2]) + " . " + random.choice(responses)
+    return text
 
 def text_to_speech(text: str) -> bool:
     """Simple text-to-speech function for API integration"""
     try:
-        Data = text.strip(" . ")
-        
-        responses = [
-            "The rest of the result has been printed to the chat screen, kindly check it out sir.",
-            "The rest of the text is now on the chat screen, sir, please check it.",
-            "You can see the rest of the text on the chat screen, sir.",
-            "The remaining part of the text is now on the chat screen, sir.",
-            "Sir, you'll find more text on the chat screen for you to see.",
-            "The rest of the answer is now on the chat screen, sir.",
-            "Sir, please look at the chat screen, the rest of the answer is there.",
-            "You'll find the complete answer on the chat screen, sir.",
-            "The next part of the text is on the chat screen, sir.",
-            "Sir, please check the chat screen for more information.",
-            "There's more text on the chat screen for you, sir.",
-            "Sir, take a look at the chat screen for additional text.",
-            "You'll find more to read on the chat screen, sir.",
-            "Sir, check the chat screen for the rest of the text.",
-            "The chat screen has the rest of the text, sir.",
-            "There's more to see on the chat screen, sir, please look.",
-            "Sir, the chat screen holds the continuation of the text.",
-            "You'll find the complete answer on the chat screen, kindly check it out sir.",
-            "Please review the chat screen for the rest of the text, sir.",
-            "Sir, look at the chat screen for the complete answer."
-        ]
+        TTS(SpeechText(text))
+        return True
         
-        if len(Data) > 4 and len(text) >= 250:
-            final_text = " ".join(text.split(".")[0:2]) + " . " + random.choice(responses)
-        else:
-            final_text = text
-            
-        TTS(final_text)
+    except Exception as e:
+        print(f"Error in text_to_speech: {e}")
+        return False
+
+async def text_to_speech_async(text: str) -> bool:
+    """text_to_speech for the shared event loop"""
+    try:
+        await TTSAsync(SpeechText(text))
         return True
         
     except Exception as e:
@@ -0,0 +1,128 @@
+"""
+Thumbnails.py — off-thread thumbnail generation with an on-disk cache.
+
+    thumb = await thumbnail_async("Data/Images/ab/abcd....png")   # path of a small PNG
+    future = thumbnail(path)                                       # concurrent.futures.Future
+
+Decoding and resizing a full-resolution image is CPU-bound, so it runs in a
+small process pool (a thread pool if processes can't be started). Results are
+written to THUMB_DIR under a hash of (source path, size, mtime, box), so a
+thumbnail is made once per image and the GUI only loads ready-made small PNGs.
+"""
+
+import os
+import time
+import asyncio
+import hashlib
+import tempfile
+import threading
+from concurrent.futures import Future, ProcessPoolExecutor, ThreadPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+
+THUMB_DIR = "Data/Thumbnails"
+THUMB_SIZE = (260, 260)
+THUMB_WORKERS = 2
+
+
+def _make_thumbnail(src: str, dst: str, size: tuple) -> str:
+    """Runs in a worker process: decode at reduced scale where the format allows, shrink, save as PNG."""
+    from PIL import Image
+    # a unique temp file per call: pid alone collides when the fallback thread pool runs two at once
+    fd, tmp = tempfile.mkstemp(dir=os.path.dirname(dst) or ".", suffix=".tmp")
+    os.close(fd)
+    try:
+        with Image.open(src) as image:
+            image.draft("RGB", size)  # JPEG decodes straight at 1/2..1/8 scale
+            image.thumbnail(size)
+            image.save(tmp, format="PNG")
+        os.replace(tmp, dst)
+    except BaseException:
+        if os.path.exists(tmp):
+            os.remove(tmp)
+        raise
+    return dst
+
+
+def thumb_path(src: str, size: tuple = THUMB_SIZE) -> str:
+    st = os.stat(src)
+    digest = hashlib.sha1(f"{os.path.abspath(src)}\0{st.st_size}\0{st.st_mtime_ns}\0{size}".encode("utf-8"))
+    return os.path.join(THUMB_DIR, digest.hexdigest() + ".png")
+
+
+_pool = None
+_pool_lock = threading.Lock()
+_stats_lock = threading.Lock()
+_stats = {"made": 0, "cache_hits": 0, "errors": 0, "make_s": 0.0, "pool": None, "pool_restarts": 0}
+
+
+def _executor():
+    global _pool
+    with _pool_lock:
+        if _pool is None:
+            try:
+                _pool = ProcessPoolExecutor(max_workers=THUMB_WORKERS)
+                _pool.submit(os.getpid).result(timeout=30)  # fail here, not on the first thumbnail
+                _stats["pool"] = "process"
+            except Exception as e:
+                print(f"[Thumbnails] process pool unavailable ({e}); using threads")
+                _pool = ThreadPoolExecutor(max_workers=THUMB_WORKERS, thread_name_prefix="thumbnail")
+                _stats["pool"] = "thread"
+        return _pool
+
+
+def _discard(pool):
+    """A worker died and the pool refuses work: drop it so the next thumbnail starts a fresh one."""
+    global _pool
+    with _pool_lock:
+        if _pool is not pool:
+            return
+        _pool = None
+        _stats["pool_restarts"] += 1
+    print("[Thumbnails] process pool broke; restarting it")
+    pool.shutdown(wait=False)
+
+
+def thumbnail(src: str, size: tuple = THUMB_SIZE) -> Future:
+    """Future for the thumbnail path of `src`; already resolved when it is cached."""
+    dst = thumb_path(src, size)
+    if os.path.exists(dst):
+        with _stats_lock:
+            _stats["cache_hits"] += 1
+        done = Future()
+        done.set_result(dst)
+        return done
+    os.makedirs(THUMB_DIR, exist_ok=True)
+    started = time.perf_counter()
+    pool = _executor()
+    try:
+        future = pool.submit(_make_thumbnail, src, dst, tuple(size))
+    except BrokenProcessPool:
+        _discard(pool)
+        pool = _executor()
+        future = pool.submit(_make_thumbnail, src, dst, tuple(size))
+
+    def record(f):
+        if isinstance(f.exception(), BrokenProcessPool):
+            _discard(pool)
+        with _stats_lock:
+            if f.exception() is None:
+                _stats["made"] += 1
+                _stats["make_s"] += time.perf_counter() - started
+            else:
+                _stats["errors"] += 1
+    future.add_done_callback(record)
+    return future
+
+
+async def thumbnail_async(src: str, size: tuple = THUMB_SIZE) -> str:
+    # thumbnail() stats files and may start the pool, so it runs off the event loop
+    future = await asyncio.to_thread(thumbnail, src, size)
+    return await asyncio.wrap_future(future)
+
+
+def stats() -> dict:
+    with _stats_lock:
+        out = dict(_stats, make_s=round(_stats["make_s"], 3))
+    if out["made"]:
+        out["avg_make_ms"] = round(out["make_s"] / out["made"] * 1000, 1)
+    return out
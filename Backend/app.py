@@ -10,10 +10,12 @@ import sys
 import os
 import json
 import time
+STARTUP_T0 = time.perf_counter()  # start of the startup timing report
 import threading
 import asyncio
 import importlib.util
 import subprocess
+import concurrent.futures
 from pathlib import Path
 from datetime import datetime
 import logging
@@ -22,7 +24,6 @@ from typing import Optional, Callable, List
 # GUI
 import tkinter as tk
 from tkinter import ttk, scrolledtext, messagebox, filedialog
-from PIL import Image, ImageTk
 
 # optional playback
 try:
@@ -56,6 +57,9 @@ try:
 except Exception:
     APPOPENER_AVAILABLE = False
 
+# long-lived asyncio loop shared by NioCore's async API
+from EventLoop import shared_loop, iterate_in_thread
+
 # ----------------------- Logging -----------------------
 PROJECT_ROOT = os.path.dirname(os.path.abspath(__file__))
 LOG_FILE = os.path.join(PROJECT_ROOT, "Nio.log")
@@ -66,6 +70,41 @@ logging.basicConfig(
 )
 logger = logging.getLogger("Nio")
 
+# ----------------------- Shared helpers -----------------------
+# Client pools, circuit breakers, caches, search and image helpers are plain
+# modules next to app.py. They are imported on first use (several pull in
+# numpy or httpx), never while the window is being built.
+_helpers = {}
+
+def helper(name: str):
+    """Import a shared helper module on first use; None if it can't be imported."""
+    if name not in _helpers:
+        try:
+            _helpers[name] = importlib.import_module(name)
+        except Exception:
+            logger.exception(f"Helper module {name} unavailable")
+            _helpers[name] = None
+    return _helpers[name]
+
+# status() key -> (helper module, stats function)
+STATUS_HELPERS = (
+    ("circuit_breakers", "Resilience", "snapshot"),
+    ("rate_limits", "RateLimit", "stats"),
+    ("response_cache", "ResponseCache", "stats"),
+    ("clients", "Clients", "stats"),
+    ("intent_classifier", "IntentClassifier", "stats"),
+    ("search_cache", "SearchCache", "stats"),
+    ("search_sources", "SearchFanout", "stats"),
+    ("search_context", "SearchContext", "stats"),
+    ("doc_index", "DocIndex", "stats"),
+    ("image_store", "ImageStore", "stats"),
+    ("thumbnails", "Thumbnails", "stats"),
+)
+
+def loaded_helper(name: str):
+    """The helper module if something has imported it already, else None; never imports."""
+    return sys.modules.get(name)
+
 # ----------------------- Backend filenames (your list) -----------------------
 BACKEND_FILES = {
     "chatbot": "Chatbot.py",
@@ -77,7 +116,17 @@ BACKEND_FILES = {
     "model": "Model.py",
 }
 
+# image requests in flight at once when the backend has no generate_images of its own
+IMAGE_CONCURRENCY = 4
+
+def _image_throughput(images: list, started: float) -> dict:
+    seconds = time.perf_counter() - started
+    made = sum(1 for p in images if p)
+    return {"seconds": round(seconds, 2), "images_per_min": round(made / seconds * 60, 2) if seconds else None}
+
 # ----------------------- Module loader -----------------------
+STARTUP = {"window_ready_s": None}
+
 def load_module(name: str, filename: str):
     path = os.path.join(PROJECT_ROOT, filename)
     if not os.path.exists(path):
@@ -87,6 +136,8 @@ def load_module(name: str, filename: str):
         spec = importlib.util.spec_from_file_location(name, path)
         mod = importlib.util.module_from_spec(spec)
         spec.loader.exec_module(mod)
+        if callable(getattr(mod, "init", None)):
+            mod.init()  # one-time setup (stores, migrations) that modules keep out of import
         logger.info(f"Loaded backend module: {filename}")
         return mod
     except Exception as e:
@@ -94,14 +145,82 @@ def load_module(name: str, filename: str):
         return None
 
 class BackendLoader:
+    """
+    Imports backends lazily: a module is loaded on first get() or by prefetch()
+    threads started once the window is up, whichever comes first. Import times
+    are kept for the startup report.
+    """
+
     def __init__(self, mapping: dict):
         self.mapping = mapping
         self.modules = {}
-        for key, fname in mapping.items():
-            self.modules[key] = load_module(key, fname)
+        self.timings = {}
+        self._locks = {key: threading.Lock() for key in mapping}
+        self._prefetching = set()
 
     def get(self, key: str):
-        return self.modules.get(key)
+        if key in self.modules:
+            return self.modules[key]
+        lock = self._locks.get(key)
+        if lock is None:
+            return None
+        with lock:
+            if key not in self.modules:
+                started = time.perf_counter()
+                self.modules[key] = load_module(key, self.mapping[key])
+                self.timings[key] = {
+                    "import_ms": round((time.perf_counter() - started) * 1000, 1),
+                    "loaded": self.modules[key] is not None,
+                    "by": "prefetch" if threading.current_thread().name.startswith("prefetch-") else "first use",
+                }
+            return self.modules[key]
+
+    async def aget(self, key: str):
+        """get() for coroutines: a first import or a wait on a running prefetch happens off the event loop."""
+        if key in self.modules:
+            return self.modules[key]
+        return await asyncio.to_thread(self.get, key)
+
+    def loaded(self, key: str) -> bool:
+        return self.modules.get(key) is not None
+
+    def proxy(self, key: str) -> "LazyBackend":
+        return LazyBackend(self, key)
+
+    def prefetch(self, keys=None, on_done: Optional[Callable] = None):
+        """Import modules on background threads; on_done() runs once they have all finished."""
+        keys = [k for k in (keys or self.mapping) if k not in self.modules and k not in self._prefetching]
+        self._prefetching.update(keys)
+        remaining = [len(keys)]
+        lock = threading.Lock()
+
+        def run(key):
+            self.get(key)
+            with lock:
+                remaining[0] -= 1
+                finished = remaining[0] == 0
+            if finished and on_done:
+                on_done()
+
+        for key in keys:
+            threading.Thread(target=run, args=(key,), daemon=True, name=f"prefetch-{key}").start()
+
+    def report(self) -> dict:
+        return {key: self.timings.get(key, {"loaded": False, "by": "pending"}) for key in self.mapping}
+
+
+class LazyBackend:
+    """Attribute access imports the backend through its loader; calls fail like a missing module would."""
+
+    def __init__(self, loader: BackendLoader, key: str):
+        self._loader = loader
+        self._key = key
+
+    def __getattr__(self, name):
+        mod = self._loader.get(self._key)
+        if mod is None:
+            raise AttributeError(f"backend {self._key!r} is not available")
+        return getattr(mod, name)
 
 # ----------------------- NioCore wrapper -----------------------
 class NioCore:
@@ -111,6 +230,7 @@ class NioCore:
         self.loader = loader
         Path(os.path.join(PROJECT_ROOT, "Data")).mkdir(exist_ok=True)
         self.last_tts = None
+        self.loop = shared_loop()
 
     # Chat
     def chat_bot(self, message: str):
@@ -132,29 +252,68 @@ class NioCore:
             logger.exception("chat_bot error")
             return {"success": False, "error": str(e)}
 
+    def chat_stream(self, message: str, cancel_event: Optional[threading.Event] = None,
+                    session: Optional[str] = None):
+        """
+        Generator over answer deltas. Backends without a streaming API yield the
+        whole answer as a single delta. Errors propagate to the caller.
+        `session` selects a named conversation when the backend supports it.
+        """
+        mod = self.loader.get("chatbot")
+        if mod is None:
+            raise RuntimeError("Chatbot backend not found.")
+        if hasattr(mod, "chat_bot_stream"):
+            kwargs = {"session": session} if session else {}
+            yield from mod.chat_bot_stream(message, cancel_event=cancel_event, **kwargs)
+            return
+        res = self.chat_bot(message)
+        if not res.get("success"):
+            raise RuntimeError(res.get("error"))
+        out = res.get("response")
+        yield out if isinstance(out, str) else json.dumps(out, indent=2)
+
+    # History search
+    def search_history(self, query: str, limit: int = 20, sender: Optional[str] = None,
+                       since: Optional[float] = None, until: Optional[float] = None) -> dict:
+        try:
+            HistorySearch = helper("HistorySearch")
+            if HistorySearch is None:
+                raise RuntimeError("HistorySearch backend missing.")
+            started = time.perf_counter()
+            hits = HistorySearch.search_history(query, limit=limit, sender=sender, since=since, until=until)
+            took_ms = round((time.perf_counter() - started) * 1000, 2)
+            return {"success": True, "results": hits, "took_ms": took_ms}
+        except Exception as e:
+            logger.exception("search_history error")
+            return {"success": False, "error": str(e), "results": []}
+
     # Image generation
-    def generate_image(self, prompt: str, count: int = 1):
+    def generate_image(self, prompt: str, count: int = 1, on_result: Optional[Callable] = None):
+        """Generate `count` images IMAGE_CONCURRENCY at a time; on_result(index, path, seconds) per image."""
         mod = self.loader.get("imagegenerate")
-        images = []
+        started = time.perf_counter()
         try:
             if mod is None:
                 raise RuntimeError("ImageGenerate backend missing.")
-            if hasattr(mod, "generate_image"):
-                for i in range(count):
-                    p = mod.generate_image(prompt, i + 1)
-                    images.append(p)
-                    time.sleep(0.6)
-            elif hasattr(mod, "generate"):
-                for i in range(count):
-                    p = mod.generate(prompt, i + 1)
-                    images.append(p)
-                    time.sleep(0.6)
+            if hasattr(mod, "generate_images"):
+                images = mod.generate_images(prompt, count, on_result=on_result)
             else:
-                raise RuntimeError("Image generator missing generate_image/generate")
-            return {"success": True, "images": images}
+                gen = getattr(mod, "generate_image", None) or getattr(mod, "generate", None)
+                if gen is None:
+                    raise RuntimeError("Image generator missing generate_image/generate")
+                limit = getattr(mod, "IMAGE_CONCURRENCY", IMAGE_CONCURRENCY)
+                images = [None] * count
+                with concurrent.futures.ThreadPoolExecutor(max_workers=max(1, min(limit, count))) as pool:
+                    futures = {pool.submit(gen, prompt, i + 1): i for i in range(count)}
+                    for fut in concurrent.futures.as_completed(futures):
+                        i = futures[fut]
+                        images[i] = fut.result()
+                        if on_result:
+                            on_result(i + 1, images[i], time.perf_counter() - started)
+            return {"success": True, "images": images, **_image_throughput(images, started)}
         except Exception as e:
             logger.exception("generate_image error")
-            return {"success": False, "error": str(e), "images": images}
+            return {"success": False, "error": str(e), "images": []}
 
     # Text -> speech
     def text_to_speech(self, text: str) -> dict:
@@ -163,28 +322,28 @@ class NioCore:
         try:
             if mod is None:
                 raise RuntimeError("TextToSpeech backend not found.")
-            # try typical names
+            # try typical names; these play the audio themselves ("played")
             if hasattr(mod, "text_to_speech"):
                 res = mod.text_to_speech(text)
                 # heuristics
                 if isinstance(res, str) and os.path.exists(res):
                     self.last_tts = res
-                    return {"success": True, "audio_file": res}
+                    return {"success": True, "audio_file": res, "played": True}
                 if isinstance(res, bool):
                     if os.path.exists(out_path):
                         self.last_tts = out_path
-                        return {"success": True, "audio_file": out_path}
-                    return {"success": True, "audio_file": None}
+                        return {"success": True, "audio_file": out_path, "played": True}
+                    return {"success": True, "audio_file": None, "played": True}
                 # if returns None, but file saved
                 if os.path.exists(out_path):
                     self.last_tts = out_path
-                    return {"success": True, "audio_file": out_path}
+                    return {"success": True, "audio_file": out_path, "played": True}
             # try common alternative names
             if hasattr(mod, "TTS"):
                 res = mod.TTS(text)
                 if isinstance(res, str) and os.path.exists(res):
                     self.last_tts = res
-                    return {"success": True, "audio_file": res}
+                    return {"success": True, "audio_file": res, "played": True}
             # try edge_tts inside module
             edge = getattr(mod, "edge_tts", None)
             if edge and hasattr(edge, "Communicate"):
@@ -194,7 +353,7 @@ class NioCore:
                     comm = edge.Communicate(text, "en-US-JennyNeural", pitch="+5Hz", rate="+13%")
                     await comm.save(out_path)
                     return out_path
-                audio = asyncio.run(run_edge())
+                audio = self.loop.run(run_edge())
                 self.last_tts = audio
                 return {"success": True, "audio_file": audio}
             # try synthesize function
@@ -348,7 +507,7 @@ class NioCore:
                             collected.append(r)
                         return collected
                     try:
-                        out = asyncio.run(run_translate(commands))
+                        out = self.loop.run(run_translate(commands))
                         return {"success": True, "results": out}
                     except Exception:
                         logger.debug("TranslateAndExecute failed to run, continuing")
@@ -360,7 +519,7 @@ class NioCore:
                         return {"success": True, "results": out}
                     except TypeError:
                         try:
-                            out = asyncio.run(mod.Automation(commands))
+                            out = self.loop.run(mod.Automation(commands))
                             return {"success": True, "results": out}
                         except Exception:
                             logger.debug("Automation() async run failed")
@@ -489,18 +648,212 @@ class NioCore:
             logger.exception("_close_with_fallback error")
             return False
 
+    # ---------- async API (runs on the shared event loop) ----------
+    def submit(self, coro) -> concurrent.futures.Future:
+        """Thread-safe: schedule one of the a* coroutines on the shared loop."""
+        return self.loop.submit(coro)
+
+    async def achat_stream(self, message: str, cancel_event: Optional[threading.Event] = None,
+                           session: Optional[str] = None):
+        """Async generator over answer deltas; falls back to the blocking API in the default executor."""
+        mod = await self.loader.aget("chatbot")
+        if mod is None:
+            raise RuntimeError("Chatbot backend not found.")
+        if hasattr(mod, "chat_bot_stream_async"):
+            kwargs = {"session": session} if session else {}
+            async for delta in mod.chat_bot_stream_async(message, cancel_event=cancel_event, **kwargs):
+                yield delta
+            return
+        res = await asyncio.to_thread(self.chat_bot, message)
+        if not res.get("success"):
+            raise RuntimeError(res.get("error"))
+        out = res.get("response")
+        yield out if isinstance(out, str) else json.dumps(out, indent=2)
+
+    async def achat(self, message: str) -> dict:
+        try:
+            parts = [delta async for delta in self.achat_stream(message)]
+            out = "".join(parts)
+            mod = await self.loader.aget("chatbot")
+            if mod is not None and hasattr(mod, "format_answer"):
+                out = mod.format_answer(out)
+            return {"success": True, "response": out}
+        except Exception as e:
+            logger.exception("achat error")
+            return {"success": False, "error": str(e)}
+
+    async def arealtime_search(self, query: str) -> dict:
+        mod = await self.loader.aget("realtimesearch")
+        if mod is not None and hasattr(mod, "RealTimeSearchEngineAsync"):
+            try:
+                return {"success": True, "response": await mod.RealTimeSearchEngineAsync(query)}
+            except Exception as e:
+                logger.exception("arealtime_search error")
+                return {"success": False, "error": str(e)}
+        return await asyncio.to_thread(self.realtime_search, query)
+
+    async def arealtime_search_stream(self, query: str, cancel_event: Optional[threading.Event] = None,
+                                      timings: Optional[dict] = None):
+        """Async generator over realtime answer deltas; `timings` gets search_s / ttft_s / total_s."""
+        mod = await self.loader.aget("realtimesearch")
+        if mod is not None and hasattr(mod, "RealTimeSearchEngineStreamAsync"):
+            async for delta in mod.RealTimeSearchEngineStreamAsync(query, cancel_event=cancel_event, timings=timings):
+                yield delta
+            return
+        res = await self.arealtime_search(query)
+        if not res.get("success"):
+            raise RuntimeError(res.get("error"))
+        out = res.get("response")
+        yield out if isinstance(out, str) else json.dumps(out, indent=2)
+
+    async def agenerate_image_stream(self, prompt: str, count: int = 1):
+        """Async generator over (index, path, seconds) as each image completes."""
+        mod = await self.loader.aget("imagegenerate")
+        if mod is not None and hasattr(mod, "generate_images_async"):
+            async for item in mod.generate_images_async(prompt, count):
+                yield item
+            return
+        res = await asyncio.to_thread(self.generate_image, prompt, count)
+        if not res.get("success"):
+            raise RuntimeError(res.get("error"))
+        for i, path in enumerate(res["images"]):
+            yield i + 1, path, None
+
+    async def athumbnail(self, path: str) -> Optional[str]:
+        """Path of a cached thumbnail for `path`, made in the Thumbnails worker pool; None if unavailable."""
+        Thumbnails = await asyncio.to_thread(helper, "Thumbnails")
+        if Thumbnails is None or not path or not os.path.exists(path):
+            return None
+        try:
+            return await Thumbnails.thumbnail_async(path)
+        except Exception:
+            logger.exception("thumbnail error")
+            return None
+
+    async def agenerate_image(self, prompt: str, count: int = 1) -> dict:
+        started = time.perf_counter()
+        images = [None] * count
+        try:
+            async for index, path, _ in self.agenerate_image_stream(prompt, count):
+                images[index - 1] = path
+            return {"success": True, "images": images, **_image_throughput(images, started)}
+        except Exception as e:
+            logger.exception("agenerate_image error")
+            return {"success": False, "error": str(e), "images": images}
+
+    async def atext_to_speech(self, text: str) -> dict:
+        mod = await self.loader.aget("texttospeech")
+        if mod is not None and hasattr(mod, "text_to_speech_async"):
+            # synthesis runs on this loop; the module hands only the blocking playback to a thread
+            try:
+                ok = await mod.text_to_speech_async(text)
+            except Exception as e:
+                logger.exception("atext_to_speech error")
+                return {"success": False, "error": str(e)}
+            audio = getattr(mod, "AudioFile", None)
+            audio = os.path.abspath(audio) if audio and os.path.exists(audio) else None
+            if audio:
+                self.last_tts = audio
+            return {"success": bool(ok), "audio_file": audio, "played": bool(ok)}
+        edge = getattr(mod, "edge_tts", None) if mod is not None else None
+        # older modules' text_to_speech/TTS also play the audio, so they stay blocking
+        if edge is None or not hasattr(edge, "Communicate") or hasattr(mod, "text_to_speech") or hasattr(mod, "TTS"):
+            return await asyncio.to_thread(self.text_to_speech, text)
+        out_path = os.path.join(PROJECT_ROOT, "Data", "speech.mp3")
+        try:
+            if os.path.exists(out_path):
+                os.remove(out_path)
+            voice = getattr(mod, "AssistantVoice", "en-US-JennyNeural")
+            comm = edge.Communicate(text, voice, pitch="+5Hz", rate="+13%")
+            await comm.save(out_path)
+            self.last_tts = out_path
+            return {"success": True, "audio_file": out_path}
+        except Exception as e:
+            logger.exception("atext_to_speech error")
+            return {"success": False, "error": str(e)}
+
+    async def arun_automation(self, commands: List[str]) -> dict:
+        mod = await self.loader.aget("automation")
+        if mod is not None and hasattr(mod, "TranslateAndExecute"):
+            try:
+                results = [r async for r in mod.TranslateAndExecute(commands)]
+                return {"success": True, "results": results}
+            except Exception:
+                logger.debug("TranslateAndExecute failed on the loop, falling back")
+        return await asyncio.to_thread(self.run_automation, commands)
+
+    async def astream_commands(self, text: str):
+        """Classified commands for text, yielded as the (streaming) intent model produces them."""
+        mod = await self.loader.aget("model")
+        if mod is not None and hasattr(mod, "ClassifyIntentStream"):
+            async for command in iterate_in_thread(mod.ClassifyIntentStream, text):
+                yield command
+            return
+        classify = getattr(mod, "ClassifyIntent", None) or getattr(mod, "FirstLayerDMM", None)
+        if classify is None:
+            raise RuntimeError("Model backend not found.")
+        for command in await asyncio.to_thread(classify, text):
+            yield command
+
+    async def arun_intent_automation(self, text: str) -> dict:
+        """Classify text and run its automations, starting each one while classification is still streaming."""
+        mod = await self.loader.aget("automation")
+        commands = []
+
+        async def tee():
+            async for command in self.astream_commands(text):
+                commands.append(command)
+                yield command
+
+        try:
+            if mod is not None and hasattr(mod, "TranslateAndExecute"):
+                results = [r async for r in mod.TranslateAndExecute(tee())]
+                return {"success": True, "commands": commands, "results": results}
+            async for _ in tee():
+                pass
+        except Exception as e:
+            logger.exception("arun_intent_automation error")
+            return {"success": False, "error": str(e), "commands": commands}
+        res = await self.arun_automation(commands)
+        res["commands"] = commands
+        return res
+
     # status
     def status(self):
-        services = {k: (self.loader.get(k) is not None) for k in BACKEND_FILES.keys()}
-        return {"services": services, "timestamp": datetime.now().isoformat()}
+        # only report what is loaded; asking for status should not import anything
+        services = {k: self.loader.loaded(k) for k in BACKEND_FILES.keys()}
+        st = {"services": services, "timestamp": datetime.now().isoformat(),
+              "startup": {"modules": self.loader.report()}}
+        if STARTUP["window_ready_s"] is not None:
+            st["startup"]["window_ready_s"] = STARTUP["window_ready_s"]
+        # stats of the helpers in use; status never imports one just to report on it
+        for key, name, fn in STATUS_HELPERS:
+            mod = loaded_helper(name)
+            if mod is not None:
+                st[key] = getattr(mod, fn)()
+        if self.loader.loaded("imagegenerate"):
+            mod = self.loader.get("imagegenerate")
+            if hasattr(mod, "stats"):
+                st["image_generation"] = mod.stats()
+        if self.loader.loaded("realtimesearch"):
+            mod = self.loader.get("realtimesearch")
+            if hasattr(mod, "stats"):
+                st["realtime_search"] = mod.stats()
+        st["event_loop"] = {"in_flight": self.loop.in_flight()}
+        return st
 
 
 # ----------------------- Intent detection (Model.py optional) -----------------------
-def load_model_intent():
-    mod = load_module("model", BACKEND_FILES.get("model"))
-    if mod and hasattr(mod, "FirstLayerDMM"):
-        return mod.FirstLayerDMM
-    return None
+def load_model_intent(loader: BackendLoader):
+    """Intent function from Model.py, resolved through the loader on first call (no second import)."""
+    if not os.path.exists(os.path.join(PROJECT_ROOT, BACKEND_FILES.get("model", ""))):
+        return None
+    model = loader.proxy("model")
+
+    def intent(text: str):
+        fn = getattr(model, "ClassifyIntent", None) or getattr(model, "FirstLayerDMM")
+        return fn(text)
+    return intent
 
 def simple_keyword_intent(text: str) -> str:
     t = (text or "").lower()
@@ -541,12 +894,21 @@ class NioApp:
         # backend
         self.loader = BackendLoader(BACKEND_FILES)
         self.core = NioCore(self.loader)
-        self.intent_model = load_model_intent()
+        self.intent_model = load_model_intent(self.loader)
         self.auto_route = True
         self.auto_run_on_stt = True
 
         # UI state
         self._thumb_refs = []
+        self._chat_cancel = None
+        self._chat_buffer = []
+        self._chat_buffer_lock = threading.Lock()
+        self._chat_flush_pending = False
+        self._search_cancel = None
+        self._search_buffer = []
+        self._search_buffer_lock = threading.Lock()
+        self._search_flush_pending = False
+        self._image_job = None  # (prompt, future, token) of the generation in progress
 
         # build UI
         self._build_header()
@@ -554,6 +916,32 @@ class NioApp:
         self._build_footer()
         self._update_status("Ready")
 
+        # backends import in the background once the window has been drawn
+        self.root.after_idle(self._on_window_ready)
+
+    def _on_window_ready(self):
+        STARTUP["window_ready_s"] = round(time.perf_counter() - STARTUP_T0, 3)
+        logger.info(f"Window ready in {STARTUP['window_ready_s']}s; prefetching backends")
+        self.loader.prefetch(on_done=self._on_prefetch_done)
+
+    def _on_prefetch_done(self):
+        """Runs on the last prefetch thread, after the window is up."""
+        self._log_startup_report()
+        HistorySearch = helper("HistorySearch")
+        if HistorySearch is not None:
+            HistorySearch.shared_index()  # starts the background build
+        Clients = helper("Clients")
+        if Clients is not None and Clients.WARMUP_ON_START:
+            Clients.warm_up(background=True)
+        mod = self.loader.get("imagegenerate")
+        if mod is not None and getattr(mod, "WARMUP_ON_START", False) and hasattr(mod, "warm_up"):
+            mod.warm_up(background=True)
+
+    def _log_startup_report(self):
+        lines = [f"  {key:<18} {t.get('import_ms', '-'):>8} ms  {'ok' if t['loaded'] else 'unavailable'}  ({t['by']})"
+                 for key, t in self.loader.report().items()]
+        logger.info("Startup report (window ready in %ss):\n%s", STARTUP["window_ready_s"], "\n".join(lines))
+
     def _build_header(self):
         header = tk.Frame(self.root, bg=self.panel, padx=12, pady=10)
         header.pack(fill="x", padx=12, pady=(12, 6))
@@ -588,15 +976,22 @@ class NioApp:
 
     # ---------- helpers ----------
     def _run_bg(self, func: Callable, args: tuple = (), on_done: Optional[Callable] = None):
-        def worker():
+        """Run a blocking call in the shared loop's executor (no thread per action); on_done gets its result."""
+        async def worker():
+            return await asyncio.to_thread(func, *args)
+        self._run_async(worker(), on_done=on_done)
+
+    def _run_async(self, coro, on_done: Optional[Callable] = None):
+        """Run a NioCore coroutine on the shared loop and hand its result to on_done on the Tk thread."""
+        def done(fut):
             try:
-                res = func(*args)
+                res = fut.result()
             except Exception as e:
-                logger.exception("Background worker error")
+                logger.exception("Async task error")
                 res = {"success": False, "error": str(e)}
             if on_done:
                 self.root.after(0, on_done, res)
-        threading.Thread(target=worker, daemon=True).start()
+        self.core.submit(coro).add_done_callback(done)
 
     def _open_path(self, path: str):
         p = os.path.abspath(path)
@@ -633,7 +1028,16 @@ class NioApp:
         self.nb.add(tab, text="Chat")
         frame = tk.Frame(tab, bg=self.card, padx=12, pady=12)
         frame.pack(fill="both", expand=True)
-        tk.Label(frame, text="Conversation", bg=self.card, fg=self.fg, font=("Segoe UI", 12, "bold")).pack(anchor="w")
+        top = tk.Frame(frame, bg=self.card)
+        top.pack(fill="x")
+        tk.Label(top, text="Conversation", bg=self.card, fg=self.fg, font=("Segoe UI", 12, "bold")).pack(side="left")
+        ttk.Button(top, text="Search history", command=self._history_search).pack(side="right")
+        self.history_sender = tk.StringVar(value="all")
+        ttk.Combobox(top, textvariable=self.history_sender, values=("all", "user", "assistant"),
+                     width=10, state="readonly").pack(side="right", padx=(6,6))
+        self.history_query = tk.Entry(top, bg=self.bg, fg=self.fg, insertbackground=self.fg, width=32)
+        self.history_query.pack(side="right")
+        self.history_query.bind("<Return>", lambda e: self._history_search())
         self.chat_history = scrolledtext.ScrolledText(frame, height=18, bg=self.card, fg=self.fg, state="disabled")
         self.chat_history.pack(fill="both", expand=True, pady=(6,8))
         input_fr = tk.Frame(frame, bg=self.card)
@@ -643,6 +1047,7 @@ class NioApp:
         btns = tk.Frame(input_fr, bg=self.card)
         btns.pack(side="right")
         ttk.Button(btns, text="Send", command=self._chat_send).pack(fill="x", pady=(0,6))
+        ttk.Button(btns, text="Stop", command=self._chat_stop).pack(fill="x", pady=(0,6))
         ttk.Button(btns, text="Clear", command=lambda: self.chat_input.delete("1.0", tk.END)).pack(fill="x")
 
     def _chat_send(self):
@@ -650,25 +1055,123 @@ class NioApp:
         if not txt:
             messagebox.showinfo("Input required", "Write a message.")
             return
+        self._chat_supersede()
         self._append_chat("You", txt)
         self.chat_input.delete("1.0", tk.END)
         self._update_status("Chat: waiting...")
-        intent = self._detect_intent(txt)
-        if intent == "automation":
-            # run automation directly
-            cmds = [line.strip() for line in txt.replace(" and ", ",").split(",") if line.strip()]
-            self._run_bg(self.core.run_automation, args=(cmds,), on_done=self._on_automation_done)
+
+        def start(intent):
+            if intent == "automation":
+                # run automation directly; commands start as the classifier emits them
+                self._run_async(self.core.arun_intent_automation(txt), on_done=self._on_automation_done)
+                return
+            self._chat_start_stream(txt)
+        self._with_intent(txt, start)
+
+    # streamed answers: the worker buffers deltas and the Tk thread drains the
+    # buffer at most once per CHAT_FLUSH_MS, so long answers cost a few dozen redraws
+    CHAT_FLUSH_MS = 50
+
+    def _chat_supersede(self):
+        """Stop the answer still streaming, if any, and close its line before a new turn is written."""
+        old = self._chat_cancel
+        if old is None:
+            return
+        old.set()
+        self._chat_flush()
+        with self._chat_buffer_lock:
+            self._chat_cancel = None  # from here on its late deltas and done callback are dropped
+            self._chat_buffer.clear()
+        self._chat_write(" [stopped]\n\n")
+
+    def _chat_start_stream(self, txt: str):
+        self._chat_supersede()
+        cancel = threading.Event()
+        with self._chat_buffer_lock:
+            self._chat_cancel = cancel
+        self._chat_write("Nio: ")
+
+        async def consume():
+            parts = []
+            try:
+                async for delta in self.core.achat_stream(txt, cancel_event=cancel):
+                    if cancel.is_set():
+                        break
+                    parts.append(delta)
+                    self._chat_queue_delta(cancel, delta)
+                res = {"success": True, "response": "".join(parts), "cancelled": cancel.is_set()}
+            except Exception as e:
+                logger.exception("chat stream error")
+                res = {"success": False, "error": str(e), "response": "".join(parts)}
+            self.root.after(0, self._on_chat_stream_done, cancel, res)
+        self.core.submit(consume())
+
+    def _chat_queue_delta(self, cancel: threading.Event, delta: str):
+        with self._chat_buffer_lock:
+            if cancel is not self._chat_cancel:
+                return  # superseded stream
+            self._chat_buffer.append(delta)
+            if self._chat_flush_pending:
+                return
+            self._chat_flush_pending = True
+        self.root.after(self.CHAT_FLUSH_MS, self._chat_flush)
+
+    def _chat_flush(self):
+        with self._chat_buffer_lock:
+            text = "".join(self._chat_buffer)
+            self._chat_buffer.clear()
+            self._chat_flush_pending = False
+        if text:
+            self._chat_write(text)
+
+    def _chat_write(self, text: str):
+        self.chat_history.configure(state="normal")
+        self.chat_history.insert(tk.END, text)
+        self.chat_history.see(tk.END)
+        self.chat_history.configure(state="disabled")
+
+    def _chat_stop(self):
+        if self._chat_cancel is not None:
+            self._chat_cancel.set()
+
+    def _history_search(self):
+        q = self.history_query.get().strip()
+        if not q:
             return
-        self._run_bg(self.core.chat_bot, args=(txt,), on_done=self._on_chat_result)
+        sender = self.history_sender.get()
+        self._run_bg(self.core.search_history, args=(q, 50, None if sender == "all" else sender),
+                     on_done=lambda res: self._on_history_results(q, res))
 
-    def _on_chat_result(self, res):
+    def _on_history_results(self, query: str, res):
+        if not res.get("success"):
+            messagebox.showerror("History search", str(res.get("error")))
+            return
+        win = tk.Toplevel(self.root)
+        win.title(f"History: {query}")
+        win.geometry("720x480")
+        win.configure(bg=self.card)
+        hits = res.get("results", [])
+        tk.Label(win, text=f"{len(hits)} result(s) in {res.get('took_ms')} ms", bg=self.card, fg=self.fg).pack(anchor="w", padx=8, pady=(8,0))
+        out = scrolledtext.ScrolledText(win, bg=self.card, fg=self.fg)
+        out.pack(fill="both", expand=True, padx=8, pady=8)
+        for hit in hits:
+            when = datetime.fromtimestamp(hit["timestamp"]).strftime("%Y-%m-%d %H:%M") if hit.get("timestamp") else "?"
+            out.insert(tk.END, f"[{when}] {hit['session']} / {hit['role']}  (score {hit['score']})\n{hit.get('content', '')}\n\n")
+        out.configure(state="disabled")
+
+    def _on_chat_stream_done(self, cancel: threading.Event, res):
+        if cancel is not self._chat_cancel:
+            return  # superseded: _chat_supersede already closed its line
+        self._chat_flush()
+        with self._chat_buffer_lock:
+            self._chat_cancel = None
         self._update_status("Ready")
         if res.get("success"):
-            out = res.get("response")
-            self._append_chat("Nio", out if isinstance(out, str) else json.dumps(out, indent=2))
-            if self.auto_route:
-                self._maybe_route_from_text(str(out))
+            self._chat_write(" [stopped]\n\n" if res.get("cancelled") else "\n\n")
+            if self.auto_route and not res.get("cancelled"):
+                self._maybe_route_from_text(res.get("response", ""))
         else:
+            self._chat_write("\n\n")
             self._append_chat("Error", res.get("error"))
 
     def _append_chat(self, who: str, txt: str):
@@ -707,36 +1210,90 @@ class NioApp:
             messagebox.showinfo("Input required", "Write an image prompt.")
             return
         count = max(1, int(self.img_count.get() or 1))
-        self._update_status("Generating images...")
-        self._run_bg(self.core.generate_image, args=(prompt, count), on_done=self._on_image_done)
-
-    def _on_image_done(self, res):
-        self._update_status("Ready")
+        if self._image_job is not None:
+            if self._image_job[0] == prompt:
+                self._update_status("Already generating these images...")
+                return
+            self._image_job[1].cancel()  # prompt changed: drop the outstanding requests
         for w in self.thumb_inner.winfo_children():
             w.destroy()
         self._thumb_refs.clear()
+        for i in range(count):
+            tk.Label(self.thumb_inner, text=f"Generating {i + 1}/{count}...", bg=self.panel, fg=self.fg,
+                     width=30, height=12).grid(row=0, column=i, padx=8, pady=8)
+        self._update_status("Generating images...")
+        token = object()
+
+        async def show(index, path):
+            thumb = await self.core.athumbnail(path)
+            self.root.after(0, self._on_image_result, token, index, path, thumb)
+
+        async def consume():
+            started = time.perf_counter()
+            images = [None] * count
+            shown = []
+            try:
+                async for index, path, seconds in self.core.agenerate_image_stream(prompt, count):
+                    images[index - 1] = path
+                    shown.append(asyncio.ensure_future(show(index, path)))
+                res = {"success": True, "images": images, **_image_throughput(images, started)}
+                await asyncio.gather(*shown)
+                return res
+            except Exception as e:
+                logger.exception("image generation error")
+                return {"success": False, "error": str(e), "images": images}
+
+        future = self.core.submit(consume())
+        self._image_job = (prompt, future, token)
+
+        def done(fut):
+            if fut.cancelled():
+                return
+            try:
+                res = fut.result()
+            except Exception as e:
+                res = {"success": False, "error": str(e)}
+            self.root.after(0, self._on_image_done, res, token)
+        future.add_done_callback(done)
+
+    def _on_image_result(self, token, index: int, path, thumb):
+        """One image finished: swap its placeholder for the ready-made thumbnail."""
+        if self._image_job is None or self._image_job[2] is not token:
+            return
+        column = index - 1
+        for w in self.thumb_inner.grid_slaves(row=0, column=column):
+            w.destroy()
+        if thumb:
+            try:
+                tkimg = tk.PhotoImage(file=thumb)
+                self._thumb_refs.append(tkimg)
+                lbl = tk.Label(self.thumb_inner, image=tkimg, bg=self.panel, cursor="hand2")
+                lbl.grid(row=0, column=column, padx=8, pady=8)
+                lbl.bind("<Button-1>", lambda e, p=path: self._open_file(p))
+                return
+            except Exception:
+                logger.exception("thumbnail load error")
+        if path and os.path.exists(path):
+            lbl = tk.Label(self.thumb_inner, text=os.path.basename(path), bg=self.panel, fg=self.fg, cursor="hand2")
+            lbl.grid(row=0, column=column, padx=8, pady=8)
+            lbl.bind("<Button-1>", lambda e, p=path: self._open_file(p))
+        else:
+            tk.Label(self.thumb_inner, text=f"Missing: {path}", bg=self.panel, fg="red").grid(row=0, column=column)
+
+    def _on_image_done(self, res, token):
+        if self._image_job is None or self._image_job[2] is not token:
+            return
+        self._image_job = None
+        self._update_status("Ready")
         if not res.get("success"):
             messagebox.showerror("Image error", res.get("error"))
             return
         imgs = res.get("images", [])
-        if not imgs:
+        if not any(imgs):
             messagebox.showinfo("No images", "No images returned.")
             return
-        for i, p in enumerate(imgs):
-            if p and os.path.exists(p):
-                try:
-                    pil = Image.open(p)
-                    pil.thumbnail((260, 260))
-                    tkimg = ImageTk.PhotoImage(pil)
-                    self._thumb_refs.append(tkimg)
-                    lbl = tk.Label(self.thumb_inner, image=tkimg, bg=self.panel, cursor="hand2")
-                    lbl.grid(row=0, column=i, padx=8, pady=8)
-                    lbl.bind("<Button-1>", lambda e, path=p: self._open_file(path))
-                except Exception:
-                    logger.exception("thumbnail error")
-                    tk.Label(self.thumb_inner, text=os.path.basename(p), bg=self.panel, fg=self.fg).grid(row=0, column=i)
-            else:
-                tk.Label(self.thumb_inner, text=f"Missing: {p}", bg=self.panel, fg="red").grid(row=0, column=i)
+        self._update_status(f"Ready ({sum(1 for p in imgs if p)}/{len(imgs)} images in {res.get('seconds')}s, "
+                            f"{res.get('images_per_min')}/min)")
 
     # ---------------- TTS tab ----------------
     def _tab_tts(self):
@@ -763,10 +1320,10 @@ class NioApp:
         if text.lower().startswith(("tell me about", "who is", "what is", "describe", "explain")):
             # query chat then speak the response
             self._update_status("Chat -> TTS")
-            self._run_bg(self.core.chat_bot, args=(text,), on_done=self._on_chat_for_tts)
+            self._run_async(self.core.achat(text), on_done=self._on_chat_for_tts)
         else:
             self._update_status("TTS: synthesizing")
-            self._run_bg(self.core.text_to_speech, args=(text,), on_done=self._on_tts_done)
+            self._run_async(self.core.atext_to_speech(text), on_done=self._on_tts_done)
 
     def _on_chat_for_tts(self, res):
         self._update_status("TTS: synthesizing answer")
@@ -774,7 +1331,7 @@ class NioApp:
             answer = res.get("response")
             text = answer if isinstance(answer, str) else json.dumps(answer, indent=2)
             self._append_tts("Generated answer, now synthesizing...")
-            self._run_bg(self.core.text_to_speech, args=(text,), on_done=self._on_tts_done)
+            self._run_async(self.core.atext_to_speech(text), on_done=self._on_tts_done)
         else:
             self._append_tts("Chat error for TTS: " + str(res.get("error")))
 
@@ -784,14 +1341,14 @@ class NioApp:
             messagebox.showinfo("Input required", "Enter text.")
             return
         self._update_status("TTS: saving")
-        self._run_bg(self.core.text_to_speech, args=(text,), on_done=self._on_tts_done)
+        self._run_async(self.core.atext_to_speech(text), on_done=self._on_tts_done)
 
     def _on_tts_done(self, res):
         self._update_status("Ready")
         if res.get("success"):
             audio = res.get("audio_file")
             self._append_tts(f"Saved: {audio}")
-            if audio and os.path.exists(audio):
+            if audio and os.path.exists(audio) and not res.get("played"):
                 if PYGAME_AVAILABLE:
                     self._run_bg(self._play_audio, args=(audio,))
                 else:
@@ -856,32 +1413,32 @@ class NioApp:
         txt = self.rec_text.get("1.0", tk.END).strip()
         if not txt:
             return
-        intent = self._detect_intent(txt)
-        if intent == "automation":
-            # parse commands lines (commas or newlines)
-            cmds = [c.strip() for c in txt.replace(" and ", ",").split(",") if c.strip()]
-            self._run_bg(self.core.run_automation, args=(cmds,), on_done=self._on_automation_done)
-        elif intent == "image":
-            self.nb.select(1)
-            self.img_prompt.delete("1.0", tk.END)
-            self.img_prompt.insert(tk.END, txt)
-            self._image_generate()
-        elif intent == "tts":
-            self.nb.select(2)
-            self.tts_input.delete("1.0", tk.END)
-            self.tts_input.insert(tk.END, txt)
-            self._tts_speak()
-        elif intent == "search":
-            self.nb.select(4)
-            self.search_query.delete("1.0", tk.END)
-            self.search_query.insert(tk.END, txt)
-            self._search_run()
-        else:
-            # default: send to chat
-            self.nb.select(0)
-            self.chat_input.delete("1.0", tk.END)
-            self.chat_input.insert(tk.END, txt)
-            self._chat_send()
+
+        def run(intent):
+            if intent == "automation":
+                self._run_async(self.core.arun_intent_automation(txt), on_done=self._on_automation_done)
+            elif intent == "image":
+                self.nb.select(1)
+                self.img_prompt.delete("1.0", tk.END)
+                self.img_prompt.insert(tk.END, txt)
+                self._image_generate()
+            elif intent == "tts":
+                self.nb.select(2)
+                self.tts_input.delete("1.0", tk.END)
+                self.tts_input.insert(tk.END, txt)
+                self._tts_speak()
+            elif intent == "search":
+                self.nb.select(4)
+                self.search_query.delete("1.0", tk.END)
+                self.search_query.insert(tk.END, txt)
+                self._search_run()
+            else:
+                # default: send to chat
+                self.nb.select(0)
+                self.chat_input.delete("1.0", tk.END)
+                self.chat_input.insert(tk.END, txt)
+                self._chat_send()
+        self._with_intent(txt, run)
 
     # ---------------- Search tab ----------------
     def _tab_search(self):
@@ -905,20 +1462,75 @@ class NioApp:
             messagebox.showinfo("Input required", "Enter a query.")
             return
         self._update_status("Searching...")
-        self._run_bg(self.core.realtime_search, args=(q,), on_done=self._on_search_done)
-
-    def _on_search_done(self, res):
-        self._update_status("Ready")
+        if self._search_cancel is not None:
+            self._search_cancel.set()
+        cancel = threading.Event()
+        with self._search_buffer_lock:
+            self._search_cancel = cancel  # deltas and callbacks of the previous search are dropped from here on
+            self._search_buffer.clear()
+        self.search_result.configure(state="normal")
+        self.search_result.delete("1.0", tk.END)
+        self.search_result.configure(state="disabled")
+        timings = {}
+
+        async def consume():
+            parts = []
+            try:
+                async for delta in self.core.arealtime_search_stream(q, cancel_event=cancel, timings=timings):
+                    if cancel.is_set():
+                        break
+                    parts.append(delta)
+                    self._search_queue_delta(cancel, delta)
+                res = {"success": True, "response": "".join(parts), "timings": timings, "cancelled": cancel.is_set()}
+            except Exception as e:
+                logger.exception("realtime search stream error")
+                res = {"success": False, "error": str(e), "response": "".join(parts)}
+            self.root.after(0, self._on_search_done, res, cancel)
+        self.core.submit(consume())
+
+    def _search_queue_delta(self, cancel: threading.Event, delta: str):
+        with self._search_buffer_lock:
+            if cancel is not self._search_cancel:
+                return  # superseded search
+            self._search_buffer.append(delta)
+            if self._search_flush_pending:
+                return
+            self._search_flush_pending = True
+        self.root.after(self.CHAT_FLUSH_MS, self._search_flush)
+
+    def _search_flush(self):
+        with self._search_buffer_lock:
+            text = "".join(self._search_buffer)
+            self._search_buffer.clear()
+            self._search_flush_pending = False
+        if text:
+            self._on_search_done({"success": True, "partial": True, "response": text})
+
+    def _search_write(self, text: str):
+        self.search_result.configure(state="normal")
+        self.search_result.insert(tk.END, text)
+        self.search_result.see(tk.END)
+        self.search_result.configure(state="disabled")
+
+    def _on_search_done(self, res, cancel: threading.Event = None):
+        """Receives partial results ({"partial": True}) while the answer streams, then the final result."""
+        if res.get("partial"):
+            self._search_write(res.get("response", ""))
+            return
+        if cancel is not self._search_cancel:
+            return  # superseded by a newer search, which owns the widget and the status line
+        self._search_flush()
+        with self._search_buffer_lock:
+            self._search_cancel = None
         if res.get("success"):
-            out = res.get("response")
-            s = out if isinstance(out, str) else json.dumps(out, indent=2)
-            self.search_result.configure(state="normal")
-            self.search_result.insert(tk.END, s + "\n")
-            self.search_result.configure(state="disabled")
+            self._search_write("\n")
+            t = res.get("timings") or {}
+            stages = [f"{label} {t[key]:.2f}s" for key, label in (("search_s", "search"), ("ttft_s", "first token"),
+                                                                  ("total_s", "total")) if t.get(key) is not None]
+            self._update_status("Ready" + (f" ({', '.join(stages)})" if stages else ""))
         else:
-            self.search_result.configure(state="normal")
-            self.search_result.insert(tk.END, "Search error: " + str(res.get("error")) + "\n")
-            self.search_result.configure(state="disabled")
+            self._search_write("Search error: " + str(res.get("error")) + "\n")
+            self._update_status("Ready")
 
     def _search_to_chat(self):
         q = self.search_query.get("1.0", tk.END).strip()
@@ -951,10 +1563,12 @@ class NioApp:
             return
         cmds = [line.strip() for line in txt.splitlines() if line.strip()]
         self._append_auto(f"Running: {cmds}")
-        self._run_bg(self.core.run_automation, args=(cmds,), on_done=self._on_automation_done)
+        self._run_async(self.core.arun_automation(cmds), on_done=self._on_automation_done)
 
     def _on_automation_done(self, res):
         if res.get("success"):
+            if res.get("commands"):
+                self._append_auto("Commands: " + str(res.get("commands")))
             self._append_auto("Result: " + str(res.get("results")))
         else:
             self._append_auto("Automation error: " + str(res.get("error")))
@@ -1008,11 +1622,15 @@ class NioApp:
                 logger.debug("Model intent failed, falling back to keywords")
         return simple_keyword_intent(text)
 
+    def _with_intent(self, text: str, then: Callable):
+        """Classify off the Tk thread (a cache miss may import Model or call Cohere); then(intent) runs on the Tk thread."""
+        self._run_bg(self._detect_intent, args=(text,),
+                     on_done=lambda intent: then(intent if isinstance(intent, str) else "chat"))
+
     def _maybe_route_from_text(self, text: str):
         if not self.auto_route:
             return
-        intent = self._detect_intent(text)
-        self._route_intent(intent, text)
+        self._with_intent(text, lambda intent: self._route_intent(intent, text))
 
     def _route_intent(self, intent: str, text: str):
         # central routing logic used by several places